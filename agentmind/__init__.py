@@ -3,7 +3,17 @@ AgentMind Memory - The missing memory layer for AI agents
 """
 
 from .memory import Memory
+from .async_memory import AsyncMemory
 from .types import MemoryConfig, RecallStrategy, MemoryEntry
+from .embedders import Embedder, HashingEmbedder
+from .storage import StorageBackend, InMemoryStorage
+from .sqlite_storage import SQLiteStorage
+from .logstore import LogStorage
+from .snapshot import SnapshotStorage
+from .bounded_storage import BoundedStorage
+from .ratelimit import TokenBucket
 
 __version__ = "0.1.0"
-__all__ = ["Memory", "MemoryConfig", "RecallStrategy", "MemoryEntry"]
\ No newline at end of file
+__all__ = ["Memory", "AsyncMemory", "MemoryConfig", "RecallStrategy", "MemoryEntry", "Embedder",
+           "HashingEmbedder", "StorageBackend", "InMemoryStorage", "SQLiteStorage", "LogStorage",
+           "SnapshotStorage", "BoundedStorage", "TokenBucket"]
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Approximate nearest-neighbour search for large embedding stores
+"""
+import math
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+
+# Rows scored per block when assigning vectors to centroids
+_BLOCK = 65536
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index written in plain NumPy.
+
+    Unit vectors are clustered with spherical k-means; each centroid owns a
+    list of matrix rows. A query only scores the rows in its nprobe closest
+    lists, trading a little recall for a large cut in work. Rows are handed
+    in by the owning EmbeddingStore, which also filters out tombstoned rows,
+    so deletes are lazy.
+
+    Args:
+        nlist: Number of clusters (defaults to 4 * sqrt(n) at training time)
+        nprobe: Lists scanned per query; higher is slower and more exact
+        train_iterations: Lloyd iterations when training
+        seed: Random seed for centroid initialisation
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        train_iterations: int = 10,
+        seed: int = 0
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.trained_size = 0
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._pending: List[List[int]] = []
+        # Searches fold pending rows into the lists, possibly from several threads
+        self._fold_lock = threading.Lock()
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def untrained_copy(self) -> "IVFIndex":
+        """A fresh index with the same settings, to train while this one keeps serving"""
+        return IVFIndex(self.nlist, self.nprobe, self.train_iterations, int(self._rng.integers(2 ** 63)))
+
+    def train(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """Cluster the given unit vectors and rebuild every list from them"""
+        n = len(vectors)
+        nlist = self.nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = min(nlist, n)
+
+        # Train on a sample; assignment of all rows happens afterwards
+        sample_size = min(n, max(nlist * 64, 10000))
+        sample = vectors[self._rng.choice(n, sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            assign = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[self._rng.choice(sample_size, len(empty))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self._centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._pending = [[] for _ in range(nlist)]
+        self.trained_size = n
+        self.add(rows, vectors)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Assign newly appended rows to their nearest lists"""
+        if not self.trained or not len(rows):
+            return
+        for row, cluster in zip(rows.tolist(), _nearest(vectors, self._centroids).tolist()):
+            self._pending[cluster].append(row)
+
+    def remap(self, remap: np.ndarray) -> None:
+        """Apply an old-row to new-row mapping after the store compacts"""
+        for cluster in range(len(self._lists)):
+            rows = remap[self._list(cluster)]
+            self._lists[cluster] = rows[rows >= 0]
+
+    def candidates(self, queries: np.ndarray) -> List[np.ndarray]:
+        """Rows to score for each query: the union of its nprobe closest lists"""
+        scores = queries @ self._centroids.T
+        nprobe = min(self.nprobe, scores.shape[1])
+        probes = np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
+        return [
+            np.concatenate([self._list(cluster) for cluster in row])
+            for row in probes.tolist()
+        ]
+
+    def _list(self, cluster: int) -> np.ndarray:
+        """Rows of a list, folding in pending appends"""
+        if self._pending[cluster]:
+            with self._fold_lock:
+                pending = self._pending[cluster]
+                if pending:
+                    self._lists[cluster] = np.concatenate(
+                        [self._lists[cluster], np.asarray(pending, dtype=np.int64)]
+                    )
+                    self._pending[cluster] = []
+        return self._lists[cluster]
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every vector, in bounded blocks"""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _BLOCK):
+        block = vectors[start:start + _BLOCK]
+        assign[start:start + _BLOCK] = np.argmax(block @ centroids.T, axis=1)
+    return assign
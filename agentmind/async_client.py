@@ -0,0 +1,294 @@
+"""
+Non-blocking client for the AgentMind hosted service
+"""
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from .client import (
+    IDEMPOTENT_METHODS, TRANSIENT_ERRORS, CircuitOpenError, Fallback, cached_body, chunked, invalidate_memories,
+    is_read, record_outcome, record_response
+)
+from .ratelimit import TokenBucket
+from .response_cache import MISS, NOT_FOUND, ResponseCache
+from .retry import CircuitBreaker, RetryPolicy
+from .transport import encode_body
+
+
+class AsyncAPIClient:
+    """
+    asyncio counterpart of APIClient, built on httpx.AsyncClient.
+
+    Connections are pooled and kept alive across requests, and the
+    client-side rate limiter and retry delays wait with asyncio.sleep
+    instead of blocking the event loop. Retries, the circuit breaker and
+    the read fallback behave as in APIClient, and given a ResponseCache
+    (which may be an APIClient's own) reads are served and revalidated
+    from it and writes invalidate it in the same way. Requires the optional
+    httpx dependency (pip install "agentmind[async]").
+
+    Args:
+        api_key: AgentMind API key
+        base_url: API base URL
+        max_connections: Size of the connection pool
+        connect_timeout: Seconds to wait for a connection
+        read_timeout: Seconds to wait for a response
+        compress_min_bytes: Gzip request bodies at least this large
+            (None never compresses)
+        rate_limiter: TokenBucket to draw on (defaults to 10 req/sec with
+            bursts of 10); may be shared with other clients and threads
+        retry_policy: When to retry transient failures
+        circuit_breaker: CircuitBreaker to fail fast while the service is down
+        fallback: Answers failed reads locally, as in APIClient
+        cache: ResponseCache for get_memory, get_memories and recall_memories
+    """
+
+    # Items per batch request
+    max_batch_size = 100
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.agentmind.ai/v1",
+        max_connections: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        compress_min_bytes: Optional[int] = 8192,
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        fallback: Optional[Fallback] = None,
+        cache: Optional[ResponseCache] = None
+    ):
+        if httpx is None:
+            raise ImportError('AsyncAPIClient requires httpx: pip install "agentmind[async]"')
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "User-Agent": "agentmind-python/0.1.0",
+                "Accept-Encoding": "gzip, deflate"
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        self.compress_min_bytes = compress_min_bytes
+        self.rate_limiter = rate_limiter or TokenBucket(rate=10, burst=10)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.fallback = fallback
+        self.cache = cache
+        self._request_count = 0
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        idempotent: Optional[bool] = None,
+        cache_key: Optional[Tuple[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Make an API request with retries, without blocking the event loop"""
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS or idempotency_key is not None
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+
+        attempt = 1
+        error = None
+        while True:
+            try:
+                return await self._send(method, endpoint, data, params, headers, cache_key)
+            except TRANSIENT_ERRORS as e:
+                if isinstance(e, CircuitOpenError):
+                    # Report why the breaker opened if this request saw it
+                    return self._fall_back(method, endpoint, data, error or e)
+                error = e
+                if not idempotent or not self.retry_policy.should_retry(attempt):
+                    return self._fall_back(method, endpoint, data, e)
+                await asyncio.sleep(self.retry_policy.delay(attempt, getattr(e, "retry_after", None)))
+                attempt += 1
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        cache_key: Optional[Tuple[str, str]] = None,
+        conditional: bool = True
+    ) -> Dict[str, Any]:
+        """
+        One attempt at a request, guarded by the circuit breaker and rate limiter
+
+        With a cache_key, a cached ETag is sent as If-None-Match unless
+        conditional is False.
+        """
+        request_headers = headers
+        if cache_key is not None and self.cache is not None:
+            etag = self.cache.etag(cache_key) if conditional else None
+            if etag is not None:
+                headers = {**(headers or {}), "If-None-Match": etag}
+        else:
+            cache_key = None
+
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError("AgentMind API unavailable, not retrying until the circuit breaker resets")
+
+        await self.rate_limiter.acquire_async()
+
+        url = urljoin(self.base_url, endpoint)
+        try:
+            body = None
+            if data is not None:
+                body, body_headers = encode_body(data, self.compress_min_bytes)
+                headers = {**(headers or {}), **body_headers}
+            response = await self._client.request(method, url, content=body, params=params, headers=headers)
+        except httpx.TimeoutException:
+            self.circuit_breaker.record_failure()
+            raise TimeoutError("Request timed out")
+        except httpx.TransportError:
+            self.circuit_breaker.record_failure()
+            raise ConnectionError("Could not connect to AgentMind API")
+        except httpx.RequestError as e:
+            # e.g. an undecodable response body
+            self.circuit_breaker.record_failure()
+            raise ConnectionError(f"AgentMind API request failed: {e}") from e
+        except BaseException:
+            # Cancelled or failed locally; a half-open probe must not stay outstanding
+            self.circuit_breaker.release()
+            raise
+
+        self._request_count += 1
+        record_outcome(self.circuit_breaker, response.status_code)
+
+        if response.status_code == 304 and cache_key is not None:
+            # Unchanged since we cached it
+            self.rate_limiter.on_success()
+            body = self.cache.revalidate(cache_key)
+            if body is not MISS:
+                return body
+            # Invalidated or evicted since its ETag was sent: fetch the body
+            return await self._send(method, endpoint, data, params, request_headers, cache_key, conditional=False)
+        if response.status_code == 404 and cache_key is not None:
+            self.cache.put_missing(cache_key)
+
+        record_response(self.rate_limiter, response.status_code, response.headers)
+        response.raise_for_status()
+        body = response.json()
+        if cache_key is not None:
+            self.cache.put(cache_key, body, etag=response.headers.get("ETag"))
+        return body
+
+    def _fall_back(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], error: Exception) -> Dict[str, Any]:
+        """Answer a failed read from the fallback, or re-raise its error"""
+        if self.fallback is not None and is_read(method, endpoint):
+            result = self.fallback(method, endpoint, data)
+            if result is not None:
+                return result
+        raise error
+
+    async def store_memory(self, memory_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Store a memory via API; retries reuse one Idempotency-Key"""
+        result = await self._make_request(
+            "POST", "/memories", data=memory_data, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
+        invalidate_memories(self.cache, [memory_data.get("id"), result.get("id")])
+        return result
+
+    async def store_memories(
+        self,
+        memories: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Store many memories with one request per max_batch_size of them"""
+        key = idempotency_key or str(uuid.uuid4())
+        results = []
+        for number, chunk in enumerate(chunked(memories, self.max_batch_size)):
+            response = await self._make_request(
+                "POST", "/memories/batch", data={"memories": chunk}, idempotency_key=f"{key}-{number}"
+            )
+            results.extend(response["results"])
+        invalidate_memories(self.cache, [memory.get("id") for memory in memories])
+        return results
+
+    async def recall_memories(self, recall_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Recall memories via API"""
+        cache_key = ("recall", json.dumps(recall_params, sort_keys=True, default=str))
+        body = cached_body(self.cache, cache_key)
+        if body is not MISS:
+            return body
+        return await self._make_request("POST", "/recall", data=recall_params, idempotent=True, cache_key=cache_key)
+
+    async def get_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Get specific memory"""
+        cache_key = ("memory", memory_id)
+        body = cached_body(self.cache, cache_key)
+        if body is not MISS:
+            return body
+        return await self._make_request("GET", f"/memories/{memory_id}", cache_key=cache_key)
+
+    async def get_memories(self, memory_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get many memories by ID, in input order (None for missing IDs)"""
+        found = {}
+        wanted = memory_ids
+        if self.cache is not None:
+            wanted = []
+            for memory_id in memory_ids:
+                body = self.cache.get(("memory", memory_id))
+                if body is MISS:
+                    wanted.append(memory_id)
+                else:
+                    found[memory_id] = None if body is NOT_FOUND else body
+
+        for chunk in chunked(list(dict.fromkeys(wanted)), self.max_batch_size):
+            response = await self._make_request("POST", "/memories/batch/get", data={"ids": chunk}, idempotent=True)
+            for memory_id, body in zip(chunk, response["results"]):
+                found[memory_id] = body
+                if self.cache is not None and response.get("source") != "local":
+                    if body is None:
+                        self.cache.put_missing(("memory", memory_id))
+                    else:
+                        self.cache.put(("memory", memory_id), body)
+        return [found[memory_id] for memory_id in memory_ids]
+
+    async def delete_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Delete specific memory"""
+        result = await self._make_request("DELETE", f"/memories/{memory_id}")
+        invalidate_memories(self.cache, [memory_id])
+        return result
+
+    async def delete_memories(self, memory_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Delete many memories by ID, returns the per-ID results in input order (None for missing IDs)"""
+        results = []
+        for chunk in chunked(memory_ids, self.max_batch_size):
+            response = await self._make_request("POST", "/memories/batch/delete", data={"ids": chunk}, idempotent=True)
+            results.extend(response["results"])
+        invalidate_memories(self.cache, memory_ids)
+        return results
+
+    async def get_usage(self) -> Dict[str, Any]:
+        """Get current usage stats"""
+        return await self._make_request("GET", "/usage")
+
+    async def health_check(self) -> bool:
+        """Check if API is healthy"""
+        try:
+            response = await self._make_request("GET", "/health")
+            return response.get("status") == "healthy"
+        except Exception:
+            return False
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        await self._client.aclose()
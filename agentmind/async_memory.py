@@ -0,0 +1,307 @@
+"""
+asyncio interface to Memory
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar, Union
+
+from .async_client import AsyncAPIClient
+from .client import NotFoundError
+from .embedders import Embedder
+from .memory import Memory
+from .ratelimit import TokenBucket
+from .storage import StorageBackend
+from .types import MemoryConfig, MemoryStats, RecallStrategy
+
+
+T = TypeVar("T")
+
+
+class AsyncMemory:
+    """
+    Memory for asyncio applications.
+
+    Every method mirrors the Memory method of the same name but is a
+    coroutine. Index and storage work runs on a thread pool, so the event
+    loop stays free while recall scores or a batch is embedded; Memory's
+    reader-writer lock lets concurrent reads run in parallel there.
+
+    With config.hosted_sync, remember, remember_batch, recall, recall_many,
+    get, forget and delete call the service through AsyncAPIClient, which
+    pools up to max_connections connections, never sleeps on the loop and
+    shares the sync client's rate limiter, breaker and response cache;
+    only the local update runs on the executor. Queued writes
+    (config.write_behind) and the bulk deletes still go through Memory.
+
+    Example:
+        async with AsyncMemory(local_mode=True) as memory:
+            await memory.remember("User prefers dark mode")
+            context = await memory.recall("display preferences")
+
+    Args:
+        api_key, config, base_url, local_mode, embedder, storage, path,
+            rate_limiter: As for Memory
+        executor: Executor for the blocking work (defaults to a private
+            thread pool of max_workers threads, shut down by aclose())
+        max_workers: Threads in the default executor
+        max_connections: Connection pool size of the hosted-mode client
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        config: Optional[MemoryConfig] = None,
+        base_url: str = "https://api.agentmind.ai/v1",
+        local_mode: bool = False,
+        embedder: Optional[Embedder] = None,
+        storage: Optional[StorageBackend] = None,
+        path: Optional[str] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        executor: Optional[Executor] = None,
+        max_workers: int = 4,
+        max_connections: int = 10
+    ):
+        self.memory = Memory(
+            api_key=api_key, config=config, base_url=base_url, local_mode=local_mode,
+            embedder=embedder, storage=storage, path=path, rate_limiter=rate_limiter
+        )
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agentmind")
+        self._client: Optional[AsyncAPIClient] = None
+
+    @property
+    def client(self) -> Optional[AsyncAPIClient]:
+        """Non-blocking hosted-service client (None in local mode), created on first use"""
+        if self.memory.local_mode:
+            return None
+        if self._client is None:
+            self._client = AsyncAPIClient(
+                self.memory.api_key, self.base_url, max_connections=self.max_connections,
+                connect_timeout=self.memory.config.http_connect_timeout,
+                read_timeout=self.memory.config.http_read_timeout,
+                compress_min_bytes=self.memory.config.http_compress_min_bytes,
+                rate_limiter=self.memory.client.rate_limiter,
+                retry_policy=self.memory.client.retry_policy,
+                circuit_breaker=self.memory.client.circuit_breaker,
+                fallback=self.memory.client.fallback,
+                cache=self.memory.client.cache
+            )
+        return self._client
+
+    async def __aenter__(self) -> "AsyncMemory":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking Memory call on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    @property
+    def _calls_service(self) -> bool:
+        """Whether writes and reads go straight to the service through self.client"""
+        return self.memory._hosted_sync and self.memory._spool is None
+
+    async def _store(self, items: List[Any]) -> None:
+        """Memory._store with the service request made on the event loop"""
+        if not self._calls_service:
+            return await self._run(self.memory._store, items)
+        items = self.memory._latest(items)
+        payloads = self.memory._payloads(items)
+        if len(payloads) == 1:
+            await self.client.store_memory(payloads[0])
+        else:
+            await self.client.store_memories(payloads)
+        await self._run(self.memory._store_embedded, items)
+
+    async def remember(
+        self,
+        content: Any,
+        metadata: Optional[Dict[str, Any]] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        ttl: Optional[int] = None,
+        id: Optional[str] = None
+    ) -> str:
+        """Store a memory, returns its ID"""
+        if not self._calls_service:
+            return await self._run(self.memory.remember, content, metadata, user_id, session_id, ttl, id)
+        entry, original = self.memory._build_entry(content, metadata, user_id, session_id, ttl, id)
+        await self._store([(entry, original)])
+        return entry.id
+
+    async def remember_batch(
+        self,
+        memories: List[Union[str, Dict[str, Any]]],
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> List[str]:
+        """Store multiple memories at once, returns list of memory IDs"""
+        if not self._calls_service:
+            return await self._run(self.memory.remember_batch, memories, user_id, session_id)
+        items = self.memory._batch_entries(memories, user_id, session_id)
+        await self._store(items)
+        return [entry.id for entry, _ in items]
+
+    async def recall(
+        self,
+        query: str,
+        strategy: RecallStrategy = RecallStrategy.HYBRID,
+        limit: int = 5,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """Recall relevant memories"""
+        if not self._calls_service:
+            return await self._run(self.memory.recall, query, strategy, limit, user_id, filters)
+        response = await self.client.recall_memories(
+            self.memory._recall_params(query, strategy, limit, user_id, filters)
+        )
+        return response["memories"]
+
+    async def recall_many(
+        self,
+        queries: List[str],
+        strategy: RecallStrategy = RecallStrategy.HYBRID,
+        limit: int = 5,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[str]]:
+        """Recall memories for several queries at once"""
+        if not self._calls_service:
+            return await self._run(self.memory.recall_many, queries, strategy, limit, user_id, filters)
+        # Concurrent requests over the pooled connections
+        return list(await asyncio.gather(*(
+            self.recall(query, strategy, limit, user_id, filters) for query in queries
+        )))
+
+    async def get(self, memory_id: str, include_metadata: bool = False) -> Any:
+        """Retrieve memory by ID, raises KeyError if not found"""
+        if not self._calls_service:
+            return await self._run(self.memory.get, memory_id, include_metadata)
+        try:
+            memory = await self.client.get_memory(memory_id)
+        except NotFoundError:
+            raise KeyError(f"Memory ID '{memory_id}' not found.")
+        return memory if include_metadata else memory["content"]
+
+    async def list(
+        self,
+        include_data: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        **filters
+    ) -> List[Dict[str, Any]]:
+        """List memories with their metadata, newest first"""
+        return await self._run(self.memory.list, include_data, limit, offset, **filters)
+
+    async def list_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_data: bool = False,
+        **filters
+    ) -> Dict[str, Any]:
+        """List one page of memories using a keyset cursor"""
+        return await self._run(self.memory.list_page, limit, cursor, include_data, **filters)
+
+    async def scan(
+        self,
+        batch_size: int = 1000,
+        include_data: bool = False,
+        **filters
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Lazily iterate over every matching memory, newest first"""
+        cursor = None
+        while True:
+            page = await self.list_page(limit=batch_size, cursor=cursor, include_data=include_data, **filters)
+            for memory in page["memories"]:
+                yield memory
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    async def get_facts(self, category: Optional[str] = None, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get structured facts from memory"""
+        return await self._run(self.memory.get_facts, category, user_id)
+
+    async def get_recent(self, hours: int = 24, user_id: Optional[str] = None) -> List[str]:
+        """Get recent memories, newest first"""
+        return await self._run(self.memory.get_recent, hours, user_id)
+
+    async def forget(self, memory_id: str) -> bool:
+        """Delete a specific memory"""
+        return await self.delete(memory_id)
+
+    async def forget_before(self, date: Union[str, datetime], user_id: Optional[str] = None) -> int:
+        """Delete memories before a certain date"""
+        return await self._run(self.memory.forget_before, date, user_id)
+
+    async def update_confidence(self, memory_id: str, confidence: float) -> bool:
+        """Update memory confidence score"""
+        return await self._run(self.memory.update_confidence, memory_id, confidence)
+
+    async def summarize_session(self, session_id: str) -> str:
+        """Summarize a session's memories"""
+        return await self._run(self.memory.summarize_session, session_id)
+
+    async def clear_session(self, session_id: str) -> int:
+        """Clear all memories from a session"""
+        return await self._run(self.memory.clear_session, session_id)
+
+    async def export_user_data(self, user_id: str) -> Dict[str, Any]:
+        """Export all user data (GDPR compliance)"""
+        return await self._run(self.memory.export_user_data, user_id)
+
+    async def delete_user_data(self, user_id: str) -> int:
+        """Delete all user data (GDPR right to erasure)"""
+        return await self._run(self.memory.delete_user_data, user_id)
+
+    async def get_stats(self) -> MemoryStats:
+        """Get memory usage statistics"""
+        return await self._run(self.memory.get_stats)
+
+    async def inspect(self, memory_id: str) -> Dict[str, Any]:
+        """Get detailed information about a specific memory"""
+        return await self._run(self.memory.inspect, memory_id)
+
+    async def exists(self, memory_id: str) -> bool:
+        """Check if a memory ID exists"""
+        return await self._run(self.memory.exists, memory_id)
+
+    async def delete(self, memory_id: str) -> bool:
+        """Delete a memory by ID"""
+        if not self._calls_service:
+            return await self._run(self.memory.delete, memory_id)
+        try:
+            await self.client.delete_memory(memory_id)
+        except NotFoundError:
+            return await self._run(self.memory._remove_locked, memory_id)
+        await self._run(self.memory._remove_locked, memory_id)
+        return True
+
+    async def purge_expired(self, limit: Optional[int] = None) -> int:
+        """Delete memories past their ttl or retention"""
+        return await self._run(self.memory.purge_expired, limit)
+
+    async def save_snapshot(self, path: str) -> int:
+        """Write every memory and embedding to a columnar snapshot file"""
+        return await self._run(self.memory.save_snapshot, path)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued hosted-service writes have been sent"""
+        return await self._run(self.memory.flush, timeout)
+
+    async def aclose(self) -> None:
+        """Close the storage backend, the hosted client and the default executor"""
+        await self._run(self.memory.close)
+        if self._client is not None:
+            await self._client.aclose()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
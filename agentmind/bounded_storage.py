@@ -0,0 +1,297 @@
+"""
+In-memory storage with a bounded resident set that spills content to disk
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cache import BoundedCache
+from .sqlite_storage import _chunks, _marks
+from .storage import InMemoryStorage
+from .store import Record, RecordStore, _unpack_float
+
+
+# Stands in for content that currently lives only in the spill file
+_SPILLED = object()
+
+# Estimated RAM per memory that never spills: its record fields, interned
+# ID and entries in the field and time indexes
+_BOOKKEEPING_BYTES = 400
+
+
+class BoundedStorage(InMemoryStorage):
+    """
+    InMemoryStorage that bounds the memory content resident in RAM.
+
+    Only content is evicted: once max_resident_entries or
+    max_resident_bytes is exceeded, the content of the entries chosen by
+    the eviction policy (LRU, LFU or importance-aware) is written to a local
+    spill file and dropped from the record store. Reading an evicted memory
+    through get, recall, list or any other accessor faults it back in
+    transparently, possibly evicting others.
+
+    The rest of the store is not bounded: IDs, record fields, the field and
+    time indexes and the keyword index stay in RAM for every memory, so
+    queries never touch the spill file, and that overhead grows with the
+    number of memories whatever the limits. The keyword index shares
+    max_resident_bytes with the content (see cache_stats()'s index_bytes),
+    so a growing index evicts content; once the non-evictable overhead alone
+    exceeds max_resident_bytes a RuntimeWarning is issued, as the limit can
+    no longer hold. Memory keeps the embeddings of a bounded store in a
+    memory-mapped file rather than on the heap.
+
+    The spill file is scratch space: it is recreated on open and, unless
+    spill_path is given, deleted on close.
+
+    Example:
+        storage = BoundedStorage(max_resident_entries=100000, max_resident_bytes=256 * 1024 * 1024, policy="lfu")
+        memory = Memory(local_mode=True, storage=storage)
+
+    Args:
+        max_resident_entries: Memories whose content stays resident (None for no limit)
+        max_resident_bytes: Total UTF-8 size of resident content plus the
+            keyword index (None for no limit)
+        policy: Eviction policy, "lru", "lfu" or "importance"
+        spill_path: File for evicted content (defaults to a temporary file)
+    """
+
+    def __init__(
+        self,
+        max_resident_entries: Optional[int] = None,
+        max_resident_bytes: Optional[int] = None,
+        policy: str = "lru",
+        spill_path: Optional[str] = None
+    ):
+        super().__init__()
+        self.max_resident_bytes = max_resident_bytes
+        self._records = SpillingRecordStore(
+            BoundedCache(max_resident_entries, max_resident_bytes, policy), _SpillFile(spill_path)
+        )
+        self._warned = False
+
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        removed = super().remove_many(memory_ids)
+        self._records.reserve(self._term_index.nbytes)
+        return removed
+
+    @property
+    def overhead_bytes(self) -> int:
+        """Estimated RAM that stays resident whatever the limits: the keyword index and per-memory bookkeeping"""
+        return self._term_index.nbytes + len(self._records) * _BOOKKEEPING_BYTES
+
+    def storage_bytes(self) -> int:
+        # Materializing every entry would fault all spilled content back in
+        return self._records.cache.nbytes + self._records.spilled_bytes
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Resident and spilled counts and sizes, evictions and faults so far"""
+        records = self._records
+        return {
+            "resident": len(records.cache),
+            "resident_bytes": records.cache.nbytes,
+            "spilled": len(records) - len(records.cache),
+            "spilled_bytes": records.spilled_bytes,
+            "evictions": records.cache.evictions,
+            "faults": records.faults,
+            "index_bytes": records.cache.reserved,
+            "overhead_bytes": self.overhead_bytes,
+        }
+
+    def _put_record(self, memory_id: str, record: Record, text: str) -> None:
+        super()._put_record(memory_id, record, text)
+        self._records.reserve(self._term_index.nbytes)
+        if not self._warned and self.max_resident_bytes is not None and self.overhead_bytes > self.max_resident_bytes:
+            self._warned = True
+            warnings.warn(
+                f"BoundedStorage overhead ({self.overhead_bytes} bytes for the keyword index, fields and indexes "
+                f"of {len(self._records)} memories) exceeds max_resident_bytes={self.max_resident_bytes}; "
+                "the limit cannot hold, and RAM keeps growing with the number of memories",
+                RuntimeWarning,
+                stacklevel=2
+            )
+
+    def close(self) -> None:
+        self._records.spill.close()
+
+
+class SpillingRecordStore(RecordStore):
+    """
+    RecordStore whose content column is bounded by a BoundedCache.
+
+    Evicted content is replaced by a placeholder after being written to the
+    spill file; content(), text(), record() and entry() load it back. A
+    spilled copy stays valid until the memory is replaced or removed, so
+    content evicted again after a fault is not rewritten.
+    """
+
+    def __init__(self, cache: BoundedCache, spill: "_SpillFile"):
+        super().__init__()
+        self.cache = cache
+        self.spill = spill
+        self.spilled_bytes = 0
+        self.faults = 0
+        # IDs with a valid copy in the spill file -> content size
+        self._on_disk: Dict[str, int] = {}
+        # Concurrent readers fault content in and reorder the cache
+        self._lock = threading.RLock()
+
+    def put_record(self, memory_id: str, record: Record) -> None:
+        with self._lock:
+            if memory_id in self._slots:
+                self._forget(memory_id)
+            super().put_record(memory_id, record)
+            self._admit(memory_id, record.content, record.importance)
+
+    def remove(self, memory_id: str) -> bool:
+        with self._lock:
+            if memory_id not in self._slots:
+                return False
+            self._forget(memory_id)
+            return super().remove(memory_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self.cache.clear()
+            self.spill.clear()
+            self._on_disk.clear()
+            self.spilled_bytes = 0
+
+    def copy(self) -> RecordStore:
+        """
+        Point-in-time copy as a plain RecordStore.
+
+        Spilled content is read back into the copy, so unlike this store it
+        holds every memory's content in RAM.
+        """
+        with self._lock:
+            other = super().copy()
+            spilled = [memory_id for memory_id, slot in self._slots.items() if self._content[slot] is _SPILLED]
+            for memory_id, content in zip(spilled, self.spill.read_many(spilled)):
+                other._content[other._slots[memory_id]] = content
+        return other
+
+    def reserve(self, nbytes: int) -> None:
+        """Count nbytes held elsewhere against the cache's max_bytes, spilling content to make room"""
+        with self._lock:
+            victims = self.cache.reserve(nbytes)
+            if victims:
+                self._evict(victims)
+
+    def content(self, memory_id: str) -> Any:
+        with self._lock:
+            slot = self._slots[memory_id]
+            content = self._content[slot]
+            if content is not _SPILLED:
+                self.cache.touch(memory_id)
+                return content
+
+            content = self.spill.read(memory_id)
+            self._content[slot] = content
+            self.spilled_bytes -= self._on_disk[memory_id]
+            self.faults += 1
+            self._admit(memory_id, content, _unpack_float(self._importance[slot]))
+            return content
+
+    def text(self, memory_id: str) -> str:
+        content = self.content(memory_id)
+        return content if isinstance(content, str) else json.dumps(content)
+
+    def record(self, memory_id: str) -> Record:
+        # Fault the content in first so the record carries it
+        with self._lock:
+            self.content(memory_id)
+            return super().record(memory_id)
+
+    def _admit(self, memory_id: str, content: Any, importance: Optional[float]) -> None:
+        """Make content resident and evict whatever the cache picks"""
+        text = content if isinstance(content, str) else json.dumps(content)
+        victims = self.cache.add(memory_id, len(text.encode("utf-8")), 0.5 if importance is None else importance)
+        if victims:
+            self._evict(victims)
+
+    def _evict(self, memory_ids: List[str]) -> None:
+        writes = []
+        for memory_id in memory_ids:
+            slot = self._slots[memory_id]
+            content = self._content[slot]
+            if memory_id not in self._on_disk:
+                is_json = not isinstance(content, str)
+                text = json.dumps(content) if is_json else content
+                writes.append((memory_id, text, is_json))
+                self._on_disk[memory_id] = len(text.encode("utf-8"))
+            self._content[slot] = _SPILLED
+            self.spilled_bytes += self._on_disk[memory_id]
+        self.spill.write_many(writes)
+
+    def _forget(self, memory_id: str) -> None:
+        """Drop the cache entry and spilled copy of a memory about to be replaced or removed"""
+        if self._content[self._slots[memory_id]] is _SPILLED:
+            self.spilled_bytes -= self._on_disk[memory_id]
+        self.cache.discard(memory_id)
+        if self._on_disk.pop(memory_id, None) is not None:
+            self.spill.delete(memory_id)
+
+
+class _SpillFile:
+    """Evicted content keyed by memory ID, in a scratch SQLite table"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="agentmind-", suffix=".spill")
+            os.close(fd)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Spilled content is rebuilt from the live process, never recovered
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("DROP TABLE IF EXISTS spill")
+        self._conn.execute(
+            "CREATE TABLE spill (id TEXT PRIMARY KEY, content TEXT NOT NULL, is_json INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+    def write_many(self, rows: Sequence[Tuple[str, str, bool]]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO spill VALUES (?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def read(self, memory_id: str) -> Any:
+        with self._lock:
+            text, is_json = self._conn.execute(
+                "SELECT content, is_json FROM spill WHERE id = ?", (memory_id,)
+            ).fetchone()
+        return json.loads(text) if is_json else text
+
+    def read_many(self, memory_ids: Sequence[str]) -> List[Any]:
+        """Spilled content of memory_ids, in order"""
+        found = {}
+        with self._lock:
+            for chunk in _chunks(list(memory_ids)):
+                for memory_id, text, is_json in self._conn.execute(
+                    f"SELECT id, content, is_json FROM spill WHERE id IN ({_marks(chunk)})", chunk
+                ):
+                    found[memory_id] = json.loads(text) if is_json else text
+        return [found[memory_id] for memory_id in memory_ids]
+
+    def delete(self, memory_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM spill WHERE id = ?", (memory_id,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM spill")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        if self._temporary and os.path.exists(self.path):
+            os.remove(self.path)
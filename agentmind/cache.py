@@ -0,0 +1,148 @@
+"""
+Size-bounded caches with pluggable eviction policies
+"""
+import heapq
+import itertools
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+POLICIES = ("lru", "lfu", "importance")
+
+
+class BoundedCache:
+    """
+    Track which keys are resident and choose which to evict.
+
+    The cache holds no values itself, only each key's size, so callers
+    decide where values live and what eviction means. It is bounded by key
+    count and by total size; add() returns the keys that must be evicted to
+    get back under both limits. Bytes held by something that cannot be
+    evicted count against max_bytes through reserve().
+
+    Policies:
+        lru: evict the least recently used key
+        lfu: evict the least frequently used key (ties: least recent)
+        importance: evict the least important key (ties: least recent)
+
+    Victims are found with a lazy min-heap: every access pushes the key's new
+    priority and outdated heap entries are skipped when popped, so add and
+    touch are O(log n).
+
+    Args:
+        max_entries: Maximum number of resident keys (None for no limit)
+        max_bytes: Maximum total size of resident keys (None for no limit)
+        policy: One of "lru", "lfu" or "importance"
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru"
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.evictions = 0
+        self._size: Dict[Hashable, int] = {}
+        self._priority: Dict[Hashable, Tuple] = {}
+        self._importance: Dict[Hashable, float] = {}
+        self._hits: Dict[Hashable, int] = {}
+        self._heap: List[Tuple] = []
+        self._clock = itertools.count()
+        self._bytes = 0
+        self.reserved = 0
+
+    def __len__(self) -> int:
+        return len(self._size)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of resident keys"""
+        return self._bytes
+
+    def add(self, key: Hashable, size: int, importance: float = 0.5) -> List[Hashable]:
+        """
+        Make key resident (or update it) and return the keys to evict.
+
+        The key just added is never among the victims, even if it alone
+        exceeds max_bytes.
+        """
+        self._bytes += size - self._size.get(key, 0)
+        self._size[key] = size
+        self._importance[key] = importance
+        self._hits[key] = self._hits.get(key, 0) + 1
+        self._push(key)
+        return self._victims(keep=key)
+
+    def reserve(self, nbytes: int) -> List[Hashable]:
+        """Set the unevictable bytes counted against max_bytes, returning the keys to evict"""
+        self.reserved = nbytes
+        return self._victims(keep=None)
+
+    def touch(self, key: Hashable) -> None:
+        """Record an access to a resident key"""
+        if key in self._size:
+            self._hits[key] += 1
+            self._push(key)
+
+    def discard(self, key: Hashable) -> None:
+        """Forget a key without counting it as an eviction"""
+        size = self._size.pop(key, None)
+        if size is None:
+            return
+        self._bytes -= size
+        del self._priority[key], self._importance[key], self._hits[key]
+
+    def clear(self) -> None:
+        self._size.clear()
+        self._priority.clear()
+        self._importance.clear()
+        self._hits.clear()
+        self._heap.clear()
+        self._bytes = 0
+        self.reserved = 0
+
+    def _push(self, key: Hashable) -> None:
+        tick = next(self._clock)
+        if self.policy == "lfu":
+            priority = (self._hits[key], tick)
+        elif self.policy == "importance":
+            priority = (self._importance[key], tick)
+        else:
+            priority = (tick,)
+        self._priority[key] = priority
+        heapq.heappush(self._heap, (priority, key))
+
+        # Outdated entries pile up with every access; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._priority) + 1024:
+            self._heap = [(priority, key) for key, priority in self._priority.items()]
+            heapq.heapify(self._heap)
+
+    def _over(self) -> bool:
+        return (
+            (self.max_entries is not None and len(self._size) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes + self.reserved > self.max_bytes)
+        )
+
+    def _victims(self, keep: Optional[Hashable]) -> List[Hashable]:
+        victims = []
+        deferred = None
+        while self._over() and self._heap:
+            priority, key = heapq.heappop(self._heap)
+            if self._priority.get(key) != priority:
+                continue
+            if key == keep:
+                deferred = (priority, key)
+                continue
+            victims.append(key)
+            self.discard(key)
+        if deferred is not None:
+            heapq.heappush(self._heap, deferred)
+        self.evictions += len(victims)
+        return victims
@@ -2,27 +2,88 @@
 AgentMind API Client - handles communication with hosted service
 """
 import os
+import json
 import time
+import uuid
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
 from urllib.parse import urljoin
 
+from .ratelimit import TokenBucket, parse_retry_after
+from .retry import CircuitBreaker, RetryPolicy
+from .transport import Transport, shared_transport
+from .response_cache import MISS, NOT_FOUND, ResponseCache
+
+
+# Answers a read locally: (method, endpoint, data) -> response or None
+Fallback = Callable[[str, str, Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+# Methods that are safe to repeat without an idempotency key
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+# POST endpoints that only read
+READ_ENDPOINTS = frozenset({"/recall", "/memories/batch/get"})
+
 
 class APIClient:
-    """Internal API client for AgentMind hosted service"""
+    """
+    Internal API client for AgentMind hosted service
+    
+    Requests draw on a TokenBucket (10 req/sec with bursts of 10 by
+    default). Pass one rate_limiter to several clients to share a budget
+    between them.
+    
+    Transient failures are retried according to retry_policy, and a
+    circuit_breaker fails requests fast while the service is down. Reads
+    (GET requests and recall) that still fail are offered to fallback, a
+    callable taking (method, endpoint, data) that may answer them from
+    local data; returning None re-raises the original error.
+    
+    The *_memories methods send up to max_batch_size items per request.
     
-    def __init__(self, api_key: str, base_url: str = "https://api.agentmind.ai/v1"):
+    Connections come from a Transport, by default the process-wide one for
+    base_url's host, so clients of the same host share warm keep-alive
+    connections. Bodies of compress_min_bytes or more are gzipped.
+    
+    Given a ResponseCache, get_memory, get_memories and recall_memories
+    are read-through: fresh answers (including "not found") come from the
+    cache, stale memories are revalidated with their ETag, and stores and
+    deletes through this client invalidate what they touch.
+    """
+    
+    # Items per batch request
+    max_batch_size = 100
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.agentmind.ai/v1",
+        rate_limiter: Optional[TokenBucket] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        fallback: Optional[Fallback] = None,
+        transport: Optional[Transport] = None,
+        pool_maxsize: int = 32,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        compress_min_bytes: Optional[int] = 8192,
+        cache: Optional[ResponseCache] = None
+    ):
         self.api_key = api_key
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "User-Agent": "agentmind-python/0.1.0"
-        })
+        self.transport = transport or shared_transport(base_url, pool_maxsize=pool_maxsize)
+        self.session = self.transport.session
+        # The session may be shared with other API keys
+        self._headers = {"Authorization": f"Bearer {api_key}"}
+        self.timeout = (connect_timeout, read_timeout)
+        self.compress_min_bytes = compress_min_bytes
+        self.cache = cache
         
-        # Track usage for client-side rate limiting
-        self._last_request_time = 0
+        # Client-side rate limiting
+        self.rate_limiter = rate_limiter or TokenBucket(rate=10, burst=10)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.fallback = fallback
         self._request_count = 0
     
     def _make_request(
@@ -30,68 +91,210 @@ class APIClient:
         method: str,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        idempotent: Optional[bool] = None,
+        cache_key: Optional[Tuple[str, str]] = None
     ) -> Dict[str, Any]:
         """Make API request with retries and error handling"""
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS or idempotency_key is not None
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
         
-        # Simple client-side rate limiting
-        current_time = time.time()
-        if current_time - self._last_request_time < 0.1:  # Max 10 req/sec
-            time.sleep(0.1 - (current_time - self._last_request_time))
+        attempt = 1
+        error = None
+        while True:
+            try:
+                return self._send(method, endpoint, data, params, headers, cache_key)
+            except TRANSIENT_ERRORS as e:
+                if isinstance(e, CircuitOpenError):
+                    # Report why the breaker opened if this request saw it
+                    return self._fall_back(method, endpoint, data, error or e)
+                error = e
+                if not idempotent or not self.retry_policy.should_retry(attempt):
+                    return self._fall_back(method, endpoint, data, e)
+                time.sleep(self.retry_policy.delay(attempt, getattr(e, "retry_after", None)))
+                attempt += 1
+    
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        cache_key: Optional[Tuple[str, str]] = None,
+        conditional: bool = True
+    ) -> Dict[str, Any]:
+        """
+        One attempt at a request, guarded by the circuit breaker and rate limiter
+        
+        With a cache_key, a cached ETag is sent as If-None-Match unless
+        conditional is False.
+        """
+        request_headers = headers
+        if cache_key is not None and self.cache is not None:
+            etag = self.cache.etag(cache_key) if conditional else None
+            if etag is not None:
+                headers = {**(headers or {}), "If-None-Match": etag}
+        else:
+            cache_key = None
+        
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError("AgentMind API unavailable, not retrying until the circuit breaker resets")
+        
+        self.rate_limiter.acquire()
         
         url = urljoin(self.base_url, endpoint)
         
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                json=data,
+            response = self.transport.request(
+                method,
+                url,
+                data=data,
                 params=params,
-                timeout=30
+                headers={**self._headers, **(headers or {})},
+                timeout=self.timeout,
+                compress_min_bytes=self.compress_min_bytes
             )
-            
-            # Track for rate limiting
-            self._last_request_time = time.time()
-            self._request_count += 1
-            
-            # Handle errors
-            if response.status_code == 401:
-                raise AuthenticationError("Invalid API key")
-            elif response.status_code == 429:
-                raise RateLimitError("Rate limit exceeded")
-            elif response.status_code == 402:
-                raise PaymentRequiredError("Payment required - upgrade your plan")
-            elif response.status_code >= 500:
-                raise ServerError(f"Server error: {response.status_code}")
-            
-            response.raise_for_status()
-            return response.json()
-            
         except requests.exceptions.Timeout:
+            self.circuit_breaker.record_failure()
             raise TimeoutError("Request timed out")
         except requests.exceptions.ConnectionError:
+            self.circuit_breaker.record_failure()
             raise ConnectionError("Could not connect to AgentMind API")
+        except requests.exceptions.RequestException as e:
+            # e.g. a truncated or undecodable response body
+            self.circuit_breaker.record_failure()
+            raise ConnectionError(f"AgentMind API request failed: {e}") from e
+        except BaseException:
+            # Failed before reaching the service; a half-open probe must not stay outstanding
+            self.circuit_breaker.release()
+            raise
+        
+        self._request_count += 1
+        record_outcome(self.circuit_breaker, response.status_code)
+        
+        if response.status_code == 304 and cache_key is not None:
+            # Unchanged since we cached it
+            self.rate_limiter.on_success()
+            body = self.cache.revalidate(cache_key)
+            if body is not MISS:
+                return body
+            # Invalidated or evicted since its ETag was sent: fetch the body
+            return self._send(method, endpoint, data, params, request_headers, cache_key, conditional=False)
+        if response.status_code == 404 and cache_key is not None:
+            self.cache.put_missing(cache_key)
+        
+        # Handle errors
+        record_response(self.rate_limiter, response.status_code, response.headers)
+        response.raise_for_status()
+        body = response.json()
+        if cache_key is not None:
+            self.cache.put(cache_key, body, etag=response.headers.get("ETag"))
+        return body
+    
+    def _fall_back(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], error: Exception) -> Dict[str, Any]:
+        """Answer a failed read from the fallback, or re-raise its error"""
+        if self.fallback is not None and is_read(method, endpoint):
+            result = self.fallback(method, endpoint, data)
+            if result is not None:
+                return result
+        raise error
     
-    def store_memory(self, memory_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Store a memory via API"""
-        return self._make_request("POST", "/memories", data=memory_data)
+    def store_memory(self, memory_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a memory via API
+        
+        Every attempt carries the same Idempotency-Key header (a fresh UUID
+        unless given), so a retried store is applied at most once.
+        """
+        result = self._make_request(
+            "POST", "/memories", data=memory_data, idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
+        invalidate_memories(self.cache, [memory_data.get("id"), result.get("id")])
+        return result
+    
+    def store_memories(self, memories: List[Dict[str, Any]], idempotency_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Store many memories with one request per max_batch_size of them
+        
+        Returns the per-memory results in input order. Each chunk gets its
+        own Idempotency-Key, derived from idempotency_key when given.
+        """
+        key = idempotency_key or str(uuid.uuid4())
+        results = []
+        for number, chunk in enumerate(chunked(memories, self.max_batch_size)):
+            response = self._make_request(
+                "POST", "/memories/batch", data={"memories": chunk}, idempotency_key=f"{key}-{number}"
+            )
+            results.extend(response["results"])
+        invalidate_memories(self.cache, [memory.get("id") for memory in memories])
+        return results
     
     def recall_memories(self, recall_params: Dict[str, Any]) -> Dict[str, Any]:
         """Recall memories via API"""
-        return self._make_request("POST", "/recall", data=recall_params)
+        cache_key = ("recall", json.dumps(recall_params, sort_keys=True, default=str))
+        body = cached_body(self.cache, cache_key)
+        if body is not MISS:
+            return body
+        return self._make_request("POST", "/recall", data=recall_params, idempotent=True, cache_key=cache_key)
     
     def get_memory(self, memory_id: str) -> Dict[str, Any]:
         """Get specific memory"""
-        return self._make_request("GET", f"/memories/{memory_id}")
+        cache_key = ("memory", memory_id)
+        body = cached_body(self.cache, cache_key)
+        if body is not MISS:
+            return body
+        return self._make_request("GET", f"/memories/{memory_id}", cache_key=cache_key)
+    
+    def get_memories(self, memory_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get many memories by ID, in input order (None for missing IDs)"""
+        found = {}
+        wanted = memory_ids
+        if self.cache is not None:
+            wanted = []
+            for memory_id in memory_ids:
+                body = self.cache.get(("memory", memory_id))
+                if body is MISS:
+                    wanted.append(memory_id)
+                else:
+                    found[memory_id] = None if body is NOT_FOUND else body
+        
+        for chunk in chunked(list(dict.fromkeys(wanted)), self.max_batch_size):
+            response = self._make_request("POST", "/memories/batch/get", data={"ids": chunk}, idempotent=True)
+            for memory_id, body in zip(chunk, response["results"]):
+                found[memory_id] = body
+                if self.cache is not None and response.get("source") != "local":
+                    if body is None:
+                        self.cache.put_missing(("memory", memory_id))
+                    else:
+                        self.cache.put(("memory", memory_id), body)
+        return [found[memory_id] for memory_id in memory_ids]
     
     def delete_memory(self, memory_id: str) -> Dict[str, Any]:
         """Delete specific memory"""
-        return self._make_request("DELETE", f"/memories/{memory_id}")
+        result = self._make_request("DELETE", f"/memories/{memory_id}")
+        invalidate_memories(self.cache, [memory_id])
+        return result
+    
+    def delete_memories(self, memory_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Delete many memories by ID, returns the per-ID results in input order (None for missing IDs)"""
+        results = []
+        for chunk in chunked(memory_ids, self.max_batch_size):
+            response = self._make_request("POST", "/memories/batch/delete", data={"ids": chunk}, idempotent=True)
+            results.extend(response["results"])
+        invalidate_memories(self.cache, memory_ids)
+        return results
     
     def get_usage(self) -> Dict[str, Any]:
         """Get current usage stats"""
         return self._make_request("GET", "/usage")
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics of this client's transport"""
+        return self.transport.pool_stats()
+    
     def health_check(self) -> bool:
         """Check if API is healthy"""
         try:
@@ -101,6 +304,71 @@ class APIClient:
             return False
 
 
+def is_read(method: str, endpoint: str) -> bool:
+    """Whether a request only reads, so local data may stand in for it"""
+    return method == "GET" or endpoint in READ_ENDPOINTS
+
+
+def cached_body(cache: Optional[ResponseCache], cache_key: Tuple[str, str]) -> Any:
+    """Fresh cached answer for cache_key, MISS if there is none; raises for a cached 404"""
+    if cache is None:
+        return MISS
+    body = cache.get(cache_key)
+    if body is NOT_FOUND:
+        raise NotFoundError(f"{cache_key[0].capitalize()} '{cache_key[1]}' not found")
+    return body
+
+
+def invalidate_memories(cache: Optional[ResponseCache], memory_ids: List[Optional[str]]) -> None:
+    """Forget cached answers a write to memory_ids may have changed"""
+    if cache is None:
+        return
+    for memory_id in memory_ids:
+        if memory_id is not None:
+            cache.invalidate(("memory", memory_id))
+    # Any recall could now rank differently
+    cache.invalidate_kind("recall")
+
+
+def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive slices of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def record_outcome(circuit_breaker: CircuitBreaker, status_code: int) -> None:
+    """Count 5xx responses against the circuit breaker; any other answer shows it is up"""
+    if status_code >= 500:
+        circuit_breaker.record_failure()
+    else:
+        circuit_breaker.record_success()
+
+
+def record_response(rate_limiter: TokenBucket, status_code: int, headers: Any) -> None:
+    """Feed a response back into the rate limiter, then raise for error statuses"""
+    retry_after = None
+    if status_code == 429:
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        rate_limiter.on_rate_limited(retry_after)
+    elif status_code < 400:
+        rate_limiter.on_success()
+    check_status(status_code, retry_after)
+
+
+def check_status(status_code: int, retry_after: Optional[float] = None) -> None:
+    """Raise the AgentMind exception for an error status code"""
+    if status_code == 401:
+        raise AuthenticationError("Invalid API key")
+    elif status_code == 429:
+        raise RateLimitError("Rate limit exceeded", retry_after=retry_after)
+    elif status_code == 402:
+        raise PaymentRequiredError("Payment required - upgrade your plan")
+    elif status_code == 404:
+        raise NotFoundError("Not found")
+    elif status_code >= 500:
+        raise ServerError(f"Server error: {status_code}")
+
+
 # Custom exceptions
 class AgentMindError(Exception):
     """Base exception for AgentMind"""
@@ -112,7 +380,11 @@ class AuthenticationError(AgentMindError):
 
 class RateLimitError(AgentMindError):
     """Rate limit exceeded"""
-    pass
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Seconds the server asked us to wait (from Retry-After), if given
+        self.retry_after = retry_after
 
 class PaymentRequiredError(AgentMindError):
     """Payment required - need to upgrade plan"""
@@ -120,4 +392,20 @@ class PaymentRequiredError(AgentMindError):
 
 class ServerError(AgentMindError):
     """Server-side error"""
-    pass
\ No newline at end of file
+    pass
+
+class NotFoundError(AgentMindError):
+    """Requested memory does not exist"""
+    pass
+
+class CircuitOpenError(AgentMindError):
+    """Hosted service marked down by the circuit breaker"""
+    pass
+
+class SpoolFullError(AgentMindError):
+    """Too many writes waiting for the hosted service"""
+    pass
+
+
+# Failures worth retrying or answering from local data
+TRANSIENT_ERRORS = (TimeoutError, ConnectionError, ServerError, RateLimitError, CircuitOpenError)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Merging concurrent single-item API calls into batch requests
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import APIClient, NotFoundError
+
+
+class _Batch:
+    """Items waiting to go out in one request, and the callers waiting on them"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[Future] = []
+        self.full = threading.Event()
+
+
+class RequestCoalescer:
+    """
+    Drop-in wrapper for APIClient that coalesces concurrent single-item calls.
+
+    store_memory, get_memory and delete_memory calls made from different
+    threads within window seconds of each other are sent as one
+    store_memories / get_memories / delete_memories request, and each caller
+    gets back its own item's result (or the request's exception). A batch
+    goes out as soon as it holds max_batch items. There is no background
+    thread: the first caller of a window waits it out and sends the batch
+    on everyone's behalf.
+
+    Coalescing adds up to window seconds of latency to every call in
+    exchange for far fewer requests, so it only pays off with many
+    concurrent callers. Every other attribute is the wrapped client's.
+
+    Example:
+        client = RequestCoalescer(APIClient(api_key), window=0.005)
+
+    Args:
+        client: Client to send batches with
+        window: Seconds to wait for more calls before sending a batch
+        max_batch: Items that trigger sending a batch right away (defaults to
+            the client's max_batch_size)
+    """
+
+    def __init__(self, client: APIClient, window: float = 0.005, max_batch: Optional[int] = None):
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch or client.max_batch_size
+        self.requests_saved = 0
+        self._pending: Dict[str, _Batch] = {}
+        self._lock = threading.Lock()
+        self._senders: Dict[str, Callable[[List[Any]], List[Any]]] = {
+            "store": client.store_memories,
+            "get": client.get_memories,
+            "delete": client.delete_memories,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def store_memory(self, memory_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a memory as part of the current batch.
+
+        A store with its own idempotency_key is sent on its own, since a
+        batch request carries a single key for all of its items.
+        """
+        if idempotency_key is not None:
+            return self.client.store_memory(memory_data, idempotency_key=idempotency_key)
+        return self._submit("store", memory_data)
+
+    def get_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Get a memory as part of the current batch, raises NotFoundError if it does not exist"""
+        memory = self._submit("get", memory_id)
+        if memory is None:
+            raise NotFoundError(f"Memory '{memory_id}' not found")
+        return memory
+
+    def delete_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Delete a memory as part of the current batch, raises NotFoundError if it does not exist"""
+        result = self._submit("delete", memory_id)
+        if result is None:
+            raise NotFoundError(f"Memory '{memory_id}' not found")
+        return result
+
+    def _submit(self, kind: str, item: Any) -> Any:
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(kind)
+            leader = batch is None
+            if leader:
+                batch = self._pending[kind] = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch:
+                # Later callers start a new batch
+                del self._pending[kind]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(kind) is batch:
+                    del self._pending[kind]
+            self._send(kind, batch)
+        return future.result()
+
+    def _send(self, kind: str, batch: _Batch) -> None:
+        """Send a closed batch and hand each caller its result"""
+        try:
+            results = self._senders[kind](batch.items)
+            if len(results) != len(batch.items):
+                raise ValueError(f"Batch of {len(batch.items)} answered with {len(results)} results")
+        except BaseException as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.requests_saved += len(batch.items) - 1
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
@@ -0,0 +1,136 @@
+"""
+Text embedders for semantic recall
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Protocol, Sequence, runtime_checkable
+
+import numpy as np
+
+from .index import tokenize
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """
+    Anything that turns a batch of texts into vectors.
+
+    embed() receives a list of texts and returns an array-like of shape
+    (len(texts), dimension).
+    """
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic offline embedder using feature-hashed n-grams.
+
+    Each word and each character n-gram of each word is hashed into one of
+    `dimension` buckets with a hash-derived sign, then the counts are L2
+    normalized. Texts sharing words or word fragments end up with similar
+    vectors; no model download or network access is needed, and the output
+    is identical across processes and machines.
+
+    Args:
+        dimension: Output vector size
+        ngram_range: Inclusive (min, max) character n-gram lengths
+    """
+
+    def __init__(self, dimension: int = 512, ngram_range: Sequence[int] = (3, 4)):
+        self.dimension = dimension
+        self.ngram_range = tuple(ngram_range)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, buckets = [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                rows.append(row)
+                buckets.append(zlib.crc32(feature.encode("utf-8")))
+
+        hashes = np.asarray(buckets, dtype=np.uint32)
+        signs = np.where(hashes >> 31, 1.0, -1.0).astype(np.float32)
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.int64), hashes % self.dimension), signs)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _features(self, text: str) -> List[str]:
+        low, high = self.ngram_range
+        features = []
+        for word in tokenize(text):
+            features.append(word)
+            padded = f"<{word}>"
+            for n in range(low, high + 1):
+                features.extend(
+                    "#" + padded[i:i + n] for i in range(len(padded) - n + 1)
+                )
+        return features
+
+
+class CachedEmbedder:
+    """
+    Wrap an embedder with an LRU cache keyed on a hash of the text.
+
+    Within a batch, only texts that are neither cached nor repeated earlier in
+    the same batch are sent to the wrapped embedder, in a single call.
+
+    Args:
+        embedder: The embedder to wrap
+        max_size: Maximum number of cached vectors
+    """
+
+    def __init__(self, embedder: Embedder, max_size: int = 10000):
+        self.embedder = embedder
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # Concurrent recalls share the cache; the wrapped embedder runs unlocked
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        keys = [hashlib.sha1(text.encode("utf-8")).digest() for text in texts]
+
+        cached, missing = {}, {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    cached[key] = self._cache[key]
+                elif key not in missing:
+                    missing[key] = text
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        if missing:
+            vectors = np.asarray(self.embedder.embed(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing, vectors))
+            cached.update(fresh)
+            with self._lock:
+                for key, vector in fresh.items():
+                    self._put(key, vector)
+
+        rows = [cached[key] for key in keys]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _put(self, key: bytes, vector: np.ndarray) -> None:
+        if self.max_size <= 0:
+            return
+        self._cache[key] = vector
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,103 @@
+"""
+Expiry tracking for memories with a time-to-live
+"""
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ExpiryQueue:
+    """
+    Memory IDs keyed by the time they expire (epoch ns), in a min-heap.
+
+    Each ID has at most one live deadline. Rescheduling or discarding an ID
+    leaves its old heap entry behind; pop_due drops stale entries when they
+    reach the top and the heap is rebuilt once they outnumber live ones.
+    Finding the next deadline looks past stale entries at the top without
+    removing them, so next_expiry and has_due never change the queue and
+    may run from several reader threads at once. Popping the k due IDs is
+    O(k log n), independent of how many IDs are not due yet.
+
+    Example:
+        queue = ExpiryQueue()
+        queue.add("mem_1", expires_ns)
+        queue.pop_due(time.time_ns())  # ["mem_1"] once the deadline passed
+    """
+
+    def __init__(self, deadlines: Iterable[Tuple[str, int]] = ()):
+        self._deadline: Dict[str, int] = dict(deadlines)
+        self._heap: List[Tuple[int, str]] = []
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._deadline)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._deadline
+
+    def add(self, memory_id: str, expires_ns: int) -> None:
+        """Schedule memory_id to expire at expires_ns, replacing any earlier deadline"""
+        if self._deadline.get(memory_id) == expires_ns:
+            return
+        self._deadline[memory_id] = expires_ns
+        heapq.heappush(self._heap, (expires_ns, memory_id))
+        if len(self._heap) > 2 * len(self._deadline) + 1024:
+            self._rebuild()
+
+    def discard(self, memory_id: str) -> None:
+        self._deadline.pop(memory_id, None)
+
+    def expires_at(self, memory_id: str) -> Optional[int]:
+        return self._deadline.get(memory_id)
+
+    def is_expired(self, memory_id: str, now_ns: int) -> bool:
+        expires = self._deadline.get(memory_id)
+        return expires is not None and expires <= now_ns
+
+    def next_expiry(self) -> Optional[int]:
+        """The earliest deadline, or None when nothing is scheduled (read-only)"""
+        heap, deadline = self._heap, self._deadline
+        earliest = None
+        # Descend through stale entries only: below a live entry nothing is earlier
+        pending = [0] if heap else []
+        while pending:
+            position = pending.pop()
+            if position >= len(heap):
+                continue
+            expires, memory_id = heap[position]
+            if earliest is not None and expires >= earliest:
+                continue
+            if deadline.get(memory_id) == expires:
+                earliest = expires
+            else:
+                pending.extend((2 * position + 1, 2 * position + 2))
+        return earliest
+
+    def has_due(self, now_ns: int) -> bool:
+        """Whether any scheduled ID has expired by now_ns"""
+        expires = self.next_expiry()
+        return expires is not None and expires <= now_ns
+
+    def pop_due(self, now_ns: int, limit: Optional[int] = None) -> List[str]:
+        """Remove and return IDs expired by now_ns, earliest first"""
+        due = []
+        while limit is None or len(due) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now_ns:
+                break
+            _, memory_id = heapq.heappop(self._heap)
+            del self._deadline[memory_id]
+            due.append(memory_id)
+        return due
+
+    def clear(self) -> None:
+        self._deadline.clear()
+        self._heap.clear()
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._deadline.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _rebuild(self) -> None:
+        self._heap = [(expires, memory_id) for memory_id, expires in self._deadline.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,436 @@
+"""
+Local indexes used by Memory to answer queries without scanning every entry
+"""
+import re
+import heapq
+import math
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Approximate CPython sizes behind TermIndex.nbytes: a posting plus its slot
+# in the document's term tuple, and a document's tuple, length and number
+_POSTING_BYTES = 40
+_DOCUMENT_BYTES = 200
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def fuse_rankings(rankings: List[List[str]], limit: int, k: int = 60) -> List[str]:
+    """
+    Merge ranked ID lists with reciprocal rank fusion.
+
+    A single ranking is returned unchanged (truncated to limit).
+    """
+    rankings = [r for r in rankings if r]
+    if not rankings:
+        return []
+    if len(rankings) == 1:
+        return rankings[0][:limit]
+
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking):
+            scores[memory_id] = scores.get(memory_id, 0.0) + 1.0 / (k + rank + 1)
+    return heapq.nlargest(limit, scores, key=scores.__getitem__)
+
+
+class FieldIndex:
+    """
+    Hash index from a field value to the IDs of memories having that value.
+
+    Each value maps to an insertion-ordered set of IDs. Multi-valued fields
+    such as tags are indexed under every value.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Any, Dict[str, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, memory_id: str, values: Iterable[Any]) -> None:
+        for value in values:
+            self._ids.setdefault(value, {})[memory_id] = None
+
+    def remove(self, memory_id: str, values: Iterable[Any]) -> None:
+        for value in values:
+            ids = self._ids.get(value)
+            if ids is None:
+                continue
+            ids.pop(memory_id, None)
+            if not ids:
+                del self._ids[value]
+
+    def get(self, value: Any) -> Dict[str, None]:
+        """Insertion-ordered IDs having value (do not mutate)"""
+        return self._ids.get(value, _EMPTY)
+
+    def counts(self) -> Dict[Any, int]:
+        """Number of IDs per value"""
+        return {value: len(ids) for value, ids in self._ids.items()}
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+
+def intersect(id_sets: List[Dict[str, None]]) -> List[str]:
+    """IDs present in every set, walking the smallest set"""
+    id_sets = sorted(id_sets, key=len)
+    smallest, rest = id_sets[0], id_sets[1:]
+    return [memory_id for memory_id in smallest if all(memory_id in ids for ids in rest)]
+
+
+_EMPTY: Dict[str, None] = {}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_ns(timestamp: datetime) -> int:
+    """Exact nanoseconds since the epoch; naive datetimes are taken as UTC"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - _EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds) * 1000
+
+
+def from_epoch_ns(timestamp_ns: int) -> datetime:
+    """Inverse of to_epoch_ns, as an aware UTC datetime"""
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+
+class TimeIndex:
+    """
+    Memory IDs sorted by (timestamp, id).
+
+    Timestamps are kept as epoch nanoseconds in a packed array next to a
+    parallel list of IDs. New memories almost always carry the latest
+    timestamp, so inserts are usually appends; out-of-order inserts and
+    removals are located by bisection. Range queries cost O(log n + k).
+    """
+
+    def __init__(self):
+        self._ts = array("q")
+        self._ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, memory_id: str, timestamp_ns: int) -> None:
+        if not self._ids or (timestamp_ns, memory_id) >= (self._ts[-1], self._ids[-1]):
+            self._ts.append(timestamp_ns)
+            self._ids.append(memory_id)
+            return
+        i = self.position(timestamp_ns, memory_id)
+        self._ts.insert(i, timestamp_ns)
+        self._ids.insert(i, memory_id)
+
+    def remove(self, memory_id: str, timestamp_ns: int) -> bool:
+        i = self.position(timestamp_ns, memory_id)
+        if i < len(self._ids) and self._ids[i] == memory_id and self._ts[i] == timestamp_ns:
+            del self._ts[i]
+            del self._ids[i]
+            return True
+        return False
+
+    def position(self, timestamp_ns: int, memory_id: Optional[str] = None) -> int:
+        """Index of the first key >= (timestamp_ns, memory_id)"""
+        i = bisect_left(self._ts, timestamp_ns)
+        if memory_id is not None:
+            while i < len(self._ids) and self._ts[i] == timestamp_ns and self._ids[i] < memory_id:
+                i += 1
+        return i
+
+    def count_between(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> int:
+        """Number of IDs with start_ns <= timestamp < end_ns"""
+        lo, hi = self._bounds(start_ns, end_ns)
+        return hi - lo
+
+    def ids_between(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        """IDs with start_ns <= timestamp < end_ns, oldest first unless newest_first"""
+        lo, hi = self._bounds(start_ns, end_ns)
+        ids = self._ids[lo:hi]
+        if newest_first:
+            ids.reverse()
+        return ids
+
+    def iter_newest(self, start: Optional[int] = None, stop: int = 0) -> Iterator[str]:
+        """Walk IDs newest first from position start - 1 down to position stop"""
+        i = len(self._ids) if start is None else start
+        ids = self._ids
+        while i > stop:
+            i -= 1
+            yield ids[i]
+
+    def clear(self) -> None:
+        self._ts = array("q")
+        self._ids.clear()
+
+    def _bounds(self, start_ns: Optional[int], end_ns: Optional[int]) -> Tuple[int, int]:
+        lo = 0 if start_ns is None else bisect_left(self._ts, start_ns)
+        hi = len(self._ids) if end_ns is None else bisect_left(self._ts, end_ns)
+        return lo, max(lo, hi)
+
+
+class TermIndex:
+    """
+    Inverted index from terms to the memory IDs that contain them.
+
+    Postings keep per-document term frequencies and the index tracks document
+    lengths incrementally, so BM25 scores can be computed for any query
+    without touching documents that share no terms with it.
+
+    Every indexed memory gets an increasing document number so that matches
+    can be returned in insertion order without looking at the rest of the store.
+    """
+
+    # BM25 parameters
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._doc_num: Dict[str, int] = {}
+        self._next_doc = 0
+        self._total_len = 0
+        # Postings across all terms
+        self._entries = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated RAM held by the postings and per-document bookkeeping"""
+        return self._entries * _POSTING_BYTES + len(self._doc_terms) * _DOCUMENT_BYTES
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._doc_terms
+
+    def add(self, memory_id: str, text: str) -> None:
+        """Index text under memory_id, replacing any previous version"""
+        if memory_id in self._doc_terms:
+            self.remove(memory_id)
+
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        # Interned, so every document's term tuple shares the posting keys'
+        # strings instead of holding copies
+        terms = tuple(sys.intern(term) for term in counts)
+        for term, tf in zip(terms, counts.values()):
+            self._postings.setdefault(term, {})[memory_id] = tf
+
+        self._doc_terms[memory_id] = terms
+        self._entries += len(terms)
+        self._doc_len[memory_id] = len(tokens)
+        self._total_len += len(tokens)
+        self._doc_num[memory_id] = self._next_doc
+        self._next_doc += 1
+
+    def remove(self, memory_id: str) -> bool:
+        """Drop memory_id from the index, returns False if it was not indexed"""
+        terms = self._doc_terms.pop(memory_id, None)
+        if terms is None:
+            return False
+
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(memory_id, None)
+            if not posting:
+                del self._postings[term]
+        self._entries -= len(terms)
+
+        self._total_len -= self._doc_len.pop(memory_id)
+        del self._doc_num[memory_id]
+        return True
+
+    def lookup(self, terms: Iterable[str]) -> List[str]:
+        """Return IDs containing any of the terms, oldest first"""
+        matches = {}
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting:
+                matches.update(posting)
+        return self.order(matches)
+
+    def order(self, memory_ids: Iterable[str]) -> List[str]:
+        """Sort indexed IDs by insertion order"""
+        return sorted(memory_ids, key=self._doc_num.__getitem__)
+
+    def postings(self, term: str) -> Dict[str, int]:
+        """memory_id -> term frequency of the memories containing term (do not mutate)"""
+        return self._postings.get(term, {})
+
+    def length(self, memory_id: str) -> int:
+        """Number of tokens indexed for memory_id"""
+        return self._doc_len[memory_id]
+
+    @property
+    def total_length(self) -> int:
+        """Number of tokens indexed across all memories"""
+        return self._total_len
+
+    def document_frequency(self, term: str) -> int:
+        """Number of memories containing term"""
+        return len(self._postings.get(term, ()))
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency of term"""
+        df = self.document_frequency(term)
+        return math.log(1.0 + (len(self._doc_terms) - df + 0.5) / (df + 0.5))
+
+    def top_k(
+        self,
+        terms: Iterable[str],
+        k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return the k best (memory_id, score) pairs for a query by BM25.
+
+        Terms are processed rarest first, each with an upper bound on what it
+        can add to a score. Once the bounds of the remaining terms can no longer
+        lift an unseen document past the current k-th best score, the long
+        postings of common terms are not walked; only documents that are
+        already candidates get their scores completed.
+
+        Args:
+            terms: Query terms (duplicates are ignored)
+            k: Number of results to return
+            accept: Optional predicate; rejected IDs are never returned
+
+        Returns:
+            Up to k pairs, best first, ties broken by insertion order
+        """
+        return self.top_k_many([terms], k, accept)[0]
+
+    def top_k_many(
+        self,
+        queries: Iterable[Iterable[str]],
+        k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        top_k() for several queries at once.
+
+        Term weights, document length norms and accept() verdicts are worked
+        out once for the whole batch instead of once per query, so queries
+        that share terms or candidates share that work. Each query keeps its
+        own early termination.
+
+        Returns:
+            One list of (memory_id, score) pairs per query, best first
+        """
+        queries = list(queries)
+        if k <= 0 or not self._doc_terms:
+            return [[] for _ in queries]
+
+        avg_len = self._total_len / len(self._doc_terms) or 1.0
+        weights: Dict[str, float] = {}
+        norms: Dict[str, float] = {}
+        verdicts: Dict[str, bool] = {}
+        results = []
+        for terms in queries:
+            query = [t for t in dict.fromkeys(terms) if t in self._postings]
+            for term in query:
+                if term not in weights:
+                    weights[term] = self.idf(term)
+            results.append(self._top_k(query, k, accept, avg_len, weights, norms, verdicts) if query else [])
+        return results
+
+    def _top_k(
+        self,
+        query: List[str],
+        k: int,
+        accept: Optional[Callable[[str], bool]],
+        avg_len: float,
+        weights: Dict[str, float],
+        norms: Dict[str, float],
+        verdicts: Dict[str, bool]
+    ) -> List[Tuple[str, float]]:
+        """Pruned BM25 walk of one query's postings, filling the shared caches"""
+        k1, b = self.k1, self.b
+        query = sorted(query, key=lambda t: weights[t], reverse=True)
+
+        # remaining[i] bounds the score a document can still gain from query[i:]
+        remaining = [0.0] * (len(query) + 1)
+        for i in range(len(query) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + weights[query[i]] * (k1 + 1)
+
+        scores: Dict[str, float] = {}
+        # Min-heap of (score, id) for the k best documents so far; entries
+        # whose score has since grown are stale and skipped at the root
+        top: List[Tuple[float, str]] = []
+        in_top: Dict[str, float] = {}
+        # Score a document must beat to enter a full heap
+        floor = -math.inf
+
+        for i, term in enumerate(query):
+            posting = self._postings[term]
+            weight = weights[term]
+            accepting_new = len(scores) < k or remaining[i] > floor
+
+            if accepting_new:
+                items = posting.items()
+            elif len(scores) < len(posting):
+                items = [(d, posting[d]) for d in scores if d in posting]
+            else:
+                items = [(d, tf) for d, tf in posting.items() if d in scores]
+
+            for memory_id, tf in items:
+                if memory_id not in scores:
+                    if accept is not None:
+                        verdict = verdicts.get(memory_id)
+                        if verdict is None:
+                            verdict = verdicts[memory_id] = bool(accept(memory_id))
+                        if not verdict:
+                            continue
+                    scores[memory_id] = 0.0
+                norm = norms.get(memory_id)
+                if norm is None:
+                    norm = norms[memory_id] = k1 * (1.0 - b + b * self._doc_len[memory_id] / avg_len)
+                score = scores[memory_id] = scores[memory_id] + weight * tf * (k1 + 1) / (tf + norm)
+
+                # Scores only grow, so anything at or under the floor is outside the heap
+                if score <= floor:
+                    continue
+                if memory_id in in_top or len(in_top) < k:
+                    heapq.heappush(top, (score, memory_id))
+                else:
+                    del in_top[heapq.heapreplace(top, (score, memory_id))[1]]
+                in_top[memory_id] = score
+                while in_top.get(top[0][1]) != top[0][0]:
+                    heapq.heappop(top)
+                if len(in_top) >= k:
+                    floor = top[0][0]
+
+        doc_num = self._doc_num
+        best = heapq.nlargest(k, scores, key=lambda d: (scores[d], -doc_num[d]))
+        return [(memory_id, scores[memory_id]) for memory_id in best]
+
+    def clear(self) -> None:
+        """Remove everything from the index"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_len.clear()
+        self._doc_num.clear()
+        self._total_len = 0
+        self._entries = 0
@@ -0,0 +1,116 @@
+"""
+Reader-writer locking for objects shared between threads
+"""
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+
+F = TypeVar("F", bound=Callable)
+
+
+class RWLock:
+    """
+    A reader-writer lock: many readers at once, or a single writer.
+
+    Writers are preferred: once a writer is waiting, new readers queue
+    behind it, so a steady stream of reads cannot starve writes. Both sides
+    are reentrant per thread, and a thread holding the write lock may also
+    read. Upgrading a read lock to a write lock is refused with RuntimeError,
+    as two threads doing so at once would deadlock.
+
+    Example:
+        lock = RWLock()
+        with lock.read():
+            ...
+        with lock.write():
+            ...
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self) -> None:
+        depth = getattr(self._local, "reads", 0)
+        if depth or self._writer == threading.get_ident():
+            # Nested inside a lock this thread already holds
+            self._local.reads = depth + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.reads = 1
+
+    def release_read(self) -> None:
+        self._local.reads -= 1
+        if self._local.reads or self._writer == threading.get_ident():
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, "reads", 0):
+                raise RuntimeError("Cannot acquire the write lock while holding the read lock")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+
+def reads(method: F) -> F:
+    """Run a method under the read side of self._lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writes(method: F) -> F:
+    """Run a method under the write side of self._lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
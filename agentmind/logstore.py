@@ -0,0 +1,767 @@
+"""
+Log-structured persistent storage: write-ahead log segments plus snapshots
+"""
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .index import TermIndex
+from .snapshot import SnapshotStorage, write_snapshot
+from .storage import _UNSET, InMemoryStorage
+from .store import Record, _pack_float, _unpack_float
+from .types import MemoryEntry, MemoryMetadata
+
+
+# Record types
+_PUT = 1
+_DELETE = 2
+_CONFIDENCE = 3
+
+# Frame header: payload length, CRC32 of type + payload, record type
+_HEADER = struct.Struct("<IIB")
+
+# PUT fixed fields: timestamp_ns, importance, confidence, flags, ttl
+_PUT_FIXED = struct.Struct("<qddBq")
+_FLAG_JSON = 1
+_FLAG_TTL = 2
+_FLAG_VECTOR = 4
+
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_NONE = 0xFFFFFFFF
+
+# Tail embeddings read per lock hold while writing a snapshot
+_VECTOR_BLOCK = 4096
+
+_SEGMENT_RE = re.compile(r"^wal-(\d{10})\.log$")
+_SNAPSHOT_RE = re.compile(r"^snapshot-(\d{10})\.snap$")
+
+
+class LogStorage(InMemoryStorage):
+    """
+    Durable local storage built on an append-only write-ahead log.
+
+    Every change is first appended to the current log
+    segment as a compact binary record. With sync=True the caller waits for
+    fsync, but concurrent writers share one fsync (group commit): whichever
+    writer finds no fsync running syncs everything written so far.
+
+    Once the log has grown by snapshot_bytes, a background thread writes a
+    compacted columnar snapshot (see write_snapshot) of the whole store and
+    deletes the segments it covers; the next write then serves it as the
+    base in place of the in-memory tail. Opening the directory maps the
+    latest snapshot and serves its rows in place (see SnapshotStorage); only
+    the log segments written after it are replayed, into the same in-memory
+    records and indexes as InMemoryStorage, and queries merge the two
+    layers. A memory changed or deleted since the snapshot is hidden in it,
+    so a changed memory moves after the snapshot's memories in insertion
+    order. A torn record at the end of the log (from a crash mid-write) is
+    dropped.
+
+    Args:
+        path: Directory holding the segments and snapshots (created if missing)
+        sync: fsync before a write returns (False leaves flushing to the OS)
+        segment_bytes: Size at which the current segment is closed
+        snapshot_bytes: Log growth since the last snapshot that triggers a new one
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync: bool = True,
+        segment_bytes: int = 64 * 1024 * 1024,
+        snapshot_bytes: int = 256 * 1024 * 1024
+    ):
+        super().__init__()
+        self.path = path
+        self.sync = sync
+        self.segment_bytes = segment_bytes
+        self.snapshot_bytes = snapshot_bytes
+        os.makedirs(path, exist_ok=True)
+
+        # Guards the in-memory state and appends to the current segment
+        self._lock = threading.RLock()
+        # Guards group commit; always taken after _lock, never before
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._lsn = 0
+        self._synced_lsn = 0
+
+        self._vectors = None
+        self._loaded_vectors: Dict[str, np.ndarray] = {}
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_lock = threading.Lock()
+        self._log_bytes = 0
+        # The latest snapshot, under the records written since
+        self._base: Optional[SnapshotStorage] = None
+        # While a snapshot is written: IDs changed since it started
+        self._changed: Optional[set] = None
+        # A written snapshot waiting to be swapped in by the next write
+        self._written: Optional[str] = None
+
+        self._segment_no = self._recover()
+        self._file = open(self._segment_path(self._segment_no), "ab", buffering=0)
+        self._segment_size = 0
+        _fsync_dir(path)
+
+    def __len__(self) -> int:
+        return super().__len__() + (len(self._base) if self._base is not None else 0)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return super().__contains__(memory_id) or (self._base is not None and memory_id in self._base)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._base is None:
+            return super().__iter__()
+        return itertools.chain(self._base, super().__iter__())
+
+    def attach_vectors(self, vectors) -> None:
+        self._vectors = vectors
+
+    def put_many(
+        self,
+        items: Sequence[Tuple[MemoryEntry, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ) -> None:
+        if not items:
+            return
+        vectors = [None] * len(items) if embeddings is None else embeddings
+        frames = b"".join(
+            _encode_put(entry.id, Record.from_entry(entry, content), entry.content, vector)
+            for (entry, content), vector in zip(items, vectors)
+        )
+        with self._lock:
+            self._install_snapshot()
+            lsn = self._append(frames)
+            super().put_many(items)
+        self._wait_synced(lsn)
+
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        with self._lock:
+            self._install_snapshot()
+            memory_ids = [memory_id for memory_id in memory_ids if memory_id in self]
+            if not memory_ids:
+                return 0
+            lsn = self._append(_encode_delete(memory_ids))
+            removed = self._drop(memory_ids)
+        self._wait_synced(lsn)
+        return removed
+
+    def set_confidence(self, memory_id: str, confidence: float) -> None:
+        with self._lock:
+            self._install_snapshot()
+            lsn = self._append(_frame(_CONFIDENCE, _F64.pack(_pack_float(confidence)) + _pack_str(memory_id)))
+            self._copy_up(memory_id)
+            if self._changed is not None:
+                self._changed.add(memory_id)
+            super().set_confidence(memory_id, confidence)
+        self._wait_synced(lsn)
+
+    def content(self, memory_id: str) -> Any:
+        if self._in_base(memory_id):
+            return self._base.content(memory_id)
+        return super().content(memory_id)
+
+    def text(self, memory_id: str) -> str:
+        if self._in_base(memory_id):
+            return self._base.text(memory_id)
+        return super().text(memory_id)
+
+    def timestamp_ns(self, memory_id: str) -> int:
+        if self._in_base(memory_id):
+            return self._base.timestamp_ns(memory_id)
+        return super().timestamp_ns(memory_id)
+
+    def user_id(self, memory_id: str) -> str:
+        if self._in_base(memory_id):
+            return self._base.user_id(memory_id)
+        return super().user_id(memory_id)
+
+    def session_id(self, memory_id: str) -> Optional[str]:
+        if self._in_base(memory_id):
+            return self._base.session_id(memory_id)
+        return super().session_id(memory_id)
+
+    def confidence(self, memory_id: str) -> Optional[float]:
+        if self._in_base(memory_id):
+            return self._base.confidence(memory_id)
+        return super().confidence(memory_id)
+
+    def record(self, memory_id: str) -> Record:
+        if self._in_base(memory_id):
+            return self._base.record(memory_id)
+        return super().record(memory_id)
+
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        if self._in_base(memory_id):
+            return self._base.metadata(memory_id)
+        return super().metadata(memory_id)
+
+    def entry(self, memory_id: str) -> MemoryEntry:
+        if self._in_base(memory_id):
+            return self._base.entry(memory_id)
+        return super().entry(memory_id)
+
+    def search(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        if self._base is None:
+            return super().search(terms, limit, user_id)
+        return self._search_layers(terms, limit, user_id)
+
+    def search_many(
+        self,
+        queries: List[List[str]],
+        limit: int,
+        user_id: Optional[str] = None
+    ) -> List[List[Tuple[str, float]]]:
+        if self._base is None:
+            return super().search_many(queries, limit, user_id)
+        return [self._search_layers(terms, limit, user_id) for terms in queries]
+
+    def match(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[str]:
+        if self._base is None:
+            return super().match(terms, limit, user_id)
+        found = self._base.match(terms, limit, user_id)
+        return found + super().match(terms, max(0, limit - len(found)), user_id)
+
+    def ids(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        if self._base is None:
+            return super().ids(user_id, session_id, category, tags, limit)
+        found = self._base.ids(user_id, session_id, category, tags, limit)
+        rest = None if limit is None else max(0, limit - len(found))
+        return found + super().ids(user_id, session_id, category, tags, rest)
+
+    def time_range(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        user_id: Optional[str] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        tail = super().time_range(start_ns, end_ns, user_id, newest_first)
+        if self._base is None:
+            return tail
+        base = self._base.time_range(start_ns, end_ns, user_id, newest_first)
+        return list(heapq.merge(base, tail, key=self._time_key, reverse=newest_first))
+
+    def iter_newest(
+        self,
+        start_ns: Optional[int] = None,
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> Iterator[str]:
+        if self._base is None:
+            return super().iter_newest(start_ns, before, skip, user_id, session_id, category, tags)
+        layers = (
+            self._base.iter_newest(start_ns, before, 0, user_id, session_id, category, tags),
+            super().iter_newest(start_ns, before, 0, user_id, session_id, category, tags)
+        )
+        return itertools.islice(heapq.merge(*layers, key=self._time_key, reverse=True), skip, None)
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        if self._base is None:
+            return super().expiring()
+        return itertools.chain(self._base.expiring(), super().expiring())
+
+    def user_count(self) -> int:
+        if self._base is None:
+            return super().user_count()
+        return len(set(self._base.user_ids()).union(self._by_user.counts()))
+
+    def category_counts(self) -> Dict[Optional[str], int]:
+        counts = super().category_counts()
+        if self._base is None:
+            return counts
+        merged = dict(self._base.category_counts())
+        for category, count in counts.items():
+            merged[category] = merged.get(category, 0) + count
+        return merged
+
+    def embeddings(self, batch_size: int = 10000) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Embeddings recovered from disk; handed out once, then released"""
+        if self._base is not None:
+            yield from self._base.embeddings(batch_size)
+        loaded, self._loaded_vectors = self._loaded_vectors, {}
+        memory_ids = list(loaded)
+        for start in range(0, len(memory_ids), batch_size):
+            batch = memory_ids[start:start + batch_size]
+            yield batch, np.stack([loaded[memory_id] for memory_id in batch])
+
+    def storage_bytes(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.path, name))
+            for name in os.listdir(self.path)
+            if _SEGMENT_RE.match(name) or _SNAPSHOT_RE.match(name)
+        )
+
+    def snapshot(self) -> None:
+        """
+        Write a snapshot now, delete the log segments it replaces and serve it
+
+        The snapshot replaces the in-memory tail at once, so no other
+        thread may be reading the store meanwhile; snapshots taken in the
+        background are swapped in by the next write instead.
+        """
+        self._take_snapshot()
+        with self._lock:
+            self._install_snapshot()
+
+    def close(self) -> None:
+        self._wait_snapshot()
+        with self._lock, self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            if not self._file.closed:
+                if self.sync:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+            if self._base is not None:
+                self._base.close()
+
+    # Layers
+
+    def _in_base(self, memory_id: str) -> bool:
+        """True if memory_id is not in the log tail, so a snapshot lookup must answer for it"""
+        return self._base is not None and memory_id not in self._records
+
+    def _put_record(self, memory_id: str, record: Record, text: str) -> None:
+        if self._changed is not None:
+            self._changed.add(memory_id)
+        if self._base is not None:
+            self._base.hide((memory_id,))
+        super()._put_record(memory_id, record, text)
+
+    def _drop(self, memory_ids: Sequence[str]) -> int:
+        """Remove memories from both layers (with _lock held), returning how many existed"""
+        if self._changed is not None:
+            self._changed.update(memory_ids)
+        removed = InMemoryStorage.remove_many(self, memory_ids)
+        if self._base is not None:
+            removed += len(self._base.hide(memory_ids))
+        return removed
+
+    def _copy_up(self, memory_id: str) -> None:
+        """Move a memory served from the snapshot into the log tail, so it can change"""
+        if self._in_base(memory_id) and memory_id in self._base:
+            self._put_record(memory_id, self._base.record(memory_id), self._base.text(memory_id))
+
+    def _time_key(self, memory_id: str) -> Tuple[int, str]:
+        return self.timestamp_ns(memory_id), memory_id
+
+    def _search_layers(self, terms: List[str], limit: int, user_id: Optional[str]) -> List[Tuple[str, float]]:
+        """BM25 over the snapshot and the log tail, scored as one index over both would score it"""
+        base, index = self._base, self._term_index
+        count = len(self)
+        if limit <= 0 or not count:
+            return []
+        terms = list(dict.fromkeys(terms))
+        total_len = base.total_len + index.total_length
+        tail_df = {term: index.document_frequency(term) for term in terms}
+        found = base.search_corpus(terms, limit, user_id, count, total_len, tail_df)
+
+        k1, b = TermIndex.k1, TermIndex.b
+        avg_len = total_len / count or 1.0
+        accept = self._user_filter(user_id)
+        scores: Dict[str, float] = {}
+        for term in terms:
+            posting = index.postings(term)
+            if not posting:
+                continue
+            df = len(posting) + len(base.postings(term)[0])
+            idf = math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+            for memory_id, tf in posting.items():
+                if accept is not None and not accept(memory_id):
+                    continue
+                norm = k1 * (1.0 - b + b * index.length(memory_id) / avg_len)
+                scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        # Best score first; ties keep insertion order, the snapshot's memories first
+        tail = [(memory_id, scores[memory_id]) for memory_id in index.order(scores)]
+        return sorted(found + tail, key=lambda item: -item[1])[:limit]
+
+    # Writing
+
+    def _append(self, frames: bytes) -> int:
+        """Append encoded records to the log (with _lock held), returning the LSN to wait for"""
+        self._file.write(frames)
+        self._lsn += len(frames)
+        self._segment_size += len(frames)
+        self._log_bytes += len(frames)
+        lsn = self._lsn
+        if self._segment_size >= self.segment_bytes:
+            self._rotate()
+        if self._log_bytes >= self.snapshot_bytes and self._snapshot_thread is None:
+            self._snapshot_thread = threading.Thread(
+                target=self._background_snapshot, name="agentmind-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+        return lsn
+
+    def _wait_synced(self, lsn: int) -> None:
+        """Block until the log is fsynced up to lsn, syncing for the whole group if nobody is"""
+        if not self.sync:
+            return
+        with self._sync_cond:
+            while self._synced_lsn < lsn:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                target = self._lsn
+                fd = self._file.fileno()
+                self._sync_cond.release()
+                synced = False
+                try:
+                    os.fsync(fd)
+                    synced = True
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    if synced:
+                        self._synced_lsn = max(self._synced_lsn, target)
+                    self._sync_cond.notify_all()
+
+    def _rotate(self) -> None:
+        """Close the current segment and start the next one (with _lock held)"""
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._segment_no += 1
+            self._file = open(self._segment_path(self._segment_no), "ab", buffering=0)
+            self._segment_size = 0
+            self._synced_lsn = self._lsn
+        _fsync_dir(self.path)
+
+    # Snapshots
+
+    def _begin_snapshot(self):
+        """Start a new segment and copy the records the snapshot will contain"""
+        with self._lock:
+            # A snapshot not swapped in yet is superseded by this one, which
+            # covers everything it does
+            self._written = None
+            self._rotate()
+            self._log_bytes = 0
+            # Changes from here on stay in the tail once the snapshot is swapped in
+            self._changed = set()
+            records = self._records.copy()
+            hidden = self._base.hidden_rows() if self._base is not None else None
+            return self._segment_no, records, self._base, hidden
+
+    def _write_snapshot(
+        self,
+        segment_no: int,
+        records,
+        base: Optional[SnapshotStorage],
+        hidden: Optional[np.ndarray]
+    ) -> str:
+        """Write the snapshot covering every segment before segment_no, then drop those segments"""
+        final = os.path.join(self.path, f"snapshot-{segment_no:010d}.snap")
+        # Embeddings of the tail are read in blocks as the rows are written
+        block: Dict[str, np.ndarray] = {}
+
+        def tail_items() -> Iterator[Tuple[str, Record]]:
+            memory_ids = list(records)
+            for start in range(0, len(memory_ids), _VECTOR_BLOCK):
+                batch = memory_ids[start:start + _VECTOR_BLOCK]
+                block.clear()
+                block.update(self._tail_vectors(batch))
+                for memory_id in batch:
+                    yield memory_id, records.record(memory_id)
+
+        def vector_of(memory_id: str) -> Optional[np.ndarray]:
+            if memory_id in records:
+                return block.get(memory_id)
+            return base.vector(memory_id)
+
+        items = tail_items()
+        if base is not None:
+            items = itertools.chain(base.items(hidden), items)
+        write_snapshot(final, items, vector_of)
+        _fsync_dir(self.path)
+
+        for name in os.listdir(self.path):
+            match = _SEGMENT_RE.match(name) or _SNAPSHOT_RE.match(name)
+            if match and int(match.group(1)) < segment_no:
+                full = os.path.join(self.path, name)
+                if base is not None and full == base.path:
+                    # Still mapped until the new snapshot is swapped in
+                    continue
+                os.remove(full)
+        return final
+
+    def _tail_vectors(self, memory_ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Current embeddings of those memory_ids that still have one, read under _lock"""
+        if self._vectors is None:
+            return {}
+        with self._lock:
+            present = [memory_id for memory_id in memory_ids if memory_id in self._vectors]
+            return dict(zip(present, self._vectors.get_many(present)))
+
+    def _install_snapshot(self) -> None:
+        """
+        Serve a finished snapshot as the base and shrink the tail to what
+        changed while it was written (with _lock held, from a writer)
+        """
+        path, self._written = self._written, None
+        if path is None:
+            return
+        changed, self._changed = self._changed or set(), None
+        base = SnapshotStorage(path)
+        base.hide(changed)
+        kept = self._term_index.order(memory_id for memory_id in changed if memory_id in self._records)
+        kept = [(memory_id, self._records.record(memory_id), self._records.text(memory_id)) for memory_id in kept]
+
+        old, self._base = self._base, base
+        InMemoryStorage.__init__(self)
+        for memory_id, record, text in kept:
+            InMemoryStorage._put_record(self, memory_id, record, text)
+        if old is not None:
+            old.close()
+            if old.path != path:
+                os.remove(old.path)
+
+    def _take_snapshot(self) -> None:
+        # One snapshot at a time, so segments are only ever deleted by the newest one
+        with self._snapshot_lock:
+            try:
+                path = self._write_snapshot(*self._begin_snapshot())
+            except BaseException:
+                with self._lock:
+                    self._changed = None
+                raise
+            with self._lock:
+                self._written = path
+
+    def _background_snapshot(self) -> None:
+        try:
+            self._take_snapshot()
+        finally:
+            with self._lock:
+                self._snapshot_thread = None
+
+    def _wait_snapshot(self) -> None:
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    # Recovery
+
+    def _recover(self) -> int:
+        """Load the latest snapshot and replay later segments, returning the next segment number"""
+        segments, snapshots = {}, {}
+        for name in os.listdir(self.path):
+            full = os.path.join(self.path, name)
+            if _SEGMENT_RE.match(name):
+                segments[int(_SEGMENT_RE.match(name).group(1))] = full
+            elif _SNAPSHOT_RE.match(name):
+                snapshots[int(_SNAPSHOT_RE.match(name).group(1))] = full
+            elif name.endswith(".tmp"):
+                # Left over from a snapshot interrupted by a crash
+                os.remove(full)
+
+        start = 0
+        if snapshots:
+            start = max(snapshots)
+            for no in snapshots:
+                if no < start:
+                    # Superseded while it was still being served
+                    os.remove(snapshots[no])
+            self._load_snapshot(snapshots[start])
+
+        replay = sorted(no for no in segments if no >= start)
+        for no in replay:
+            self._replay(segments[no], 0, tail=no == replay[-1])
+            self._log_bytes += os.path.getsize(segments[no])
+
+        return max([start] + [no + 1 for no in segments])
+
+    def _load_snapshot(self, path: str) -> None:
+        """Map a columnar snapshot to serve in place under the replayed log"""
+        self._base = SnapshotStorage(path)
+
+    def _replay(self, path: str, offset: int, tail: bool) -> None:
+        """Apply every record in a file; a torn record ends the log only in the last segment"""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    end = self._apply_records(view, offset)
+                finally:
+                    view.release()
+        if end < size:
+            if not tail:
+                raise ValueError(f"Corrupt record at byte {end} of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def _apply_records(self, view: memoryview, offset: int) -> int:
+        """Apply records from offset, returning where the last intact record ends"""
+        size = len(view)
+        while offset + _HEADER.size <= size:
+            length, crc, kind = _HEADER.unpack_from(view, offset)
+            start = offset + _HEADER.size
+            end = start + length
+            if end > size or zlib.crc32(view[start:end], zlib.crc32(bytes((kind,)))) != crc:
+                break
+            if kind == _PUT:
+                memory_id, record, text, vector = _decode_put(view, start)
+                self._put_record(memory_id, record, text)
+                if vector is not None:
+                    self._loaded_vectors[memory_id] = vector
+                else:
+                    self._loaded_vectors.pop(memory_id, None)
+            elif kind == _DELETE:
+                memory_ids = _decode_delete(view, start)
+                self._drop(memory_ids)
+                for memory_id in memory_ids:
+                    self._loaded_vectors.pop(memory_id, None)
+            elif kind == _CONFIDENCE:
+                confidence = _unpack_float(_F64.unpack_from(view, start)[0])
+                memory_id, _ = _unpack_str(view, start + _F64.size)
+                if memory_id in self:
+                    if self._in_base(memory_id):
+                        vector = self._base.vector(memory_id)
+                        if vector is not None:
+                            self._loaded_vectors[memory_id] = vector
+                    self._copy_up(memory_id)
+                    InMemoryStorage.set_confidence(self, memory_id, confidence)
+            offset = end
+        return offset
+
+    def _segment_path(self, segment_no: int) -> str:
+        return os.path.join(self.path, f"wal-{segment_no:010d}.log")
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(payload, zlib.crc32(bytes((kind,))))
+    return _HEADER.pack(len(payload), crc, kind) + payload
+
+
+def _encode_put(memory_id: str, record: Record, text: str, vector: Optional[np.ndarray]) -> bytes:
+    flags = 0 if isinstance(record.content, str) else _FLAG_JSON
+    if record.ttl is not None:
+        flags |= _FLAG_TTL
+    if vector is not None:
+        flags |= _FLAG_VECTOR
+    parts = [
+        _PUT_FIXED.pack(
+            record.timestamp_ns,
+            _pack_float(record.importance),
+            _pack_float(record.confidence),
+            flags,
+            record.ttl or 0
+        ),
+        _pack_str(memory_id),
+        _pack_str(record.user_id),
+        _pack_str(record.session_id),
+        _pack_str(record.category),
+        _pack_str(record.source),
+        _pack_str(text),
+        _pack_str(json.dumps(record.tags) if record.tags else None),
+        _pack_str(json.dumps(record.custom) if record.custom else None)
+    ]
+    if vector is not None:
+        vector = np.asarray(vector, dtype=np.float32)
+        parts.append(_U32.pack(len(vector)))
+        parts.append(vector.tobytes())
+    return _frame(_PUT, b"".join(parts))
+
+
+def _decode_put(view: memoryview, offset: int) -> Tuple[str, Record, str, Optional[np.ndarray]]:
+    timestamp_ns, importance, confidence, flags, ttl = _PUT_FIXED.unpack_from(view, offset)
+    offset += _PUT_FIXED.size
+    fields = []
+    for _ in range(8):
+        value, offset = _unpack_str(view, offset)
+        fields.append(value)
+    memory_id, user_id, session_id, category, source, text, tags, custom = fields
+
+    vector = None
+    if flags & _FLAG_VECTOR:
+        (dimension,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        vector = np.frombuffer(view[offset:offset + dimension * 4], dtype=np.float32).copy()
+
+    record = Record(
+        json.loads(text) if flags & _FLAG_JSON else text,
+        timestamp_ns,
+        user_id,
+        session_id,
+        category,
+        _unpack_float(importance),
+        _unpack_float(confidence),
+        source,
+        tuple(json.loads(tags)) if tags else (),
+        json.loads(custom) if custom else {},
+        ttl if flags & _FLAG_TTL else None
+    )
+    return memory_id, record, text, vector
+
+
+def _encode_delete(memory_ids: Sequence[str]) -> bytes:
+    return _frame(_DELETE, _U32.pack(len(memory_ids)) + b"".join(_pack_str(m) for m in memory_ids))
+
+
+def _decode_delete(view: memoryview, offset: int) -> List[str]:
+    (count,) = _U32.unpack_from(view, offset)
+    offset += _U32.size
+    memory_ids = []
+    for _ in range(count):
+        memory_id, offset = _unpack_str(view, offset)
+        memory_ids.append(memory_id)
+    return memory_ids
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    if value is None:
+        return _U32.pack(_NONE)
+    data = value.encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+def _unpack_str(view: memoryview, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = _U32.unpack_from(view, offset)
+    offset += _U32.size
+    if length == _NONE:
+        return None, offset
+    return str(view[offset:offset + length], "utf-8"), offset + length
+
+
+def _fsync_dir(path: str) -> None:
+    """Make file creations and renames in a directory durable (where supported)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
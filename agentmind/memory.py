@@ -3,20 +3,82 @@ Core Memory implementation for AgentMind
 """
 import os
 import json
+import base64
 import hashlib
-from typing import Optional, List, Dict, Any, Union
+import itertools
+import time
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, Union
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import requests
 from .types import (
     MemoryConfig, RecallStrategy, MemoryEntry, 
     RecallResult, MemoryMetadata, MemoryStats
 )
+from .index import from_epoch_ns, fuse_rankings, to_epoch_ns, tokenize
+from .vectors import EmbeddingStore, MappedEmbeddingStore, QuantizedEmbeddingStore
+from .ann import IVFIndex
+from .embedders import CachedEmbedder, Embedder, HashingEmbedder
+from .quantization import create_quantizer
+from .storage import InMemoryStorage, StorageBackend, _UNSET
+from .logstore import LogStorage
+from .bounded_storage import BoundedStorage
+from .snapshot import write_snapshot
+from .expiry import ExpiryQueue
+from .locks import RWLock, reads, writes
+from .ratelimit import TokenBucket
+from .retry import CircuitBreaker, RetryPolicy
+from .coalesce import RequestCoalescer
+from .client import NotFoundError
+from .response_cache import ResponseCache
+from .spool import WriteSpool
+from .recall_cache import RecallCache, recall_key
+
+
+# Expired memories purged per write, so no single call pays for a backlog
+_PURGE_BATCH = 256
+
+# Returned by Memory._get_queued when the spool holds nothing for an ID
+_NOT_QUEUED = object()
+
+
+def encode_cursor(timestamp_ns: int, memory_id: str) -> str:
+    """Opaque pagination cursor for the (timestamp, id) key of a memory"""
+    return base64.urlsafe_b64encode(f"{timestamp_ns}:{memory_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Inverse of encode_cursor"""
+    try:
+        timestamp, memory_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split(":", 1)
+        return int(timestamp), memory_id
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+
+
+def describe_memory(entry: MemoryEntry, content: Any) -> Dict[str, Any]:
+    """What get(include_metadata=True) returns for a memory"""
+    return {
+        "content": content,
+        "id": entry.id,
+        "timestamp": entry.timestamp.isoformat(),
+        "session_id": entry.session_id,
+        "user_id": entry.user_id,
+        "metadata": entry.metadata.model_dump(),
+        "ttl": entry.ttl
+    }
 
 
 class Memory:
     """
     The core Memory class for AgentMind.
     
+    A Memory can be shared between threads: reads (recall, get, list, ...)
+    run in parallel under a reader-writer lock, while writes (remember,
+    delete, forget_before, ...) run one at a time and exclude readers.
+    Requests to the hosted service and embedding happen outside the lock;
+    only the local update holds it.
+    
     Example:
         memory = Memory(api_key="am_live_xxx")
         memory.remember("User likes Python")
@@ -28,7 +90,11 @@ class Memory:
         api_key: Optional[str] = None,
         config: Optional[MemoryConfig] = None,
         base_url: str = "https://api.agentmind.ai/v1",
-        local_mode: bool = False
+        local_mode: bool = False,
+        embedder: Optional[Embedder] = None,
+        storage: Optional[StorageBackend] = None,
+        path: Optional[str] = None,
+        rate_limiter: Optional[TokenBucket] = None
     ):
         """
         Initialize Memory instance.
@@ -38,9 +104,30 @@ class Memory:
             config: Memory configuration
             base_url: API base URL for hosted service
             local_mode: If True, use local storage only (no API calls)
+            embedder: Embedder for semantic recall (local mode defaults to an
+                offline HashingEmbedder)
+            storage: Storage backend for memory records (defaults to
+                InMemoryStorage, or BoundedStorage when config sets a cache
+                limit; use SQLiteStorage to persist across restarts,
+                or SnapshotStorage to open a saved snapshot read-only)
+            path: Directory for a durable write-ahead log store (LogStorage);
+                cannot be combined with storage (nor either of them with
+                config.cache_max_resident_entries or cache_max_resident_bytes)
+            rate_limiter: TokenBucket for hosted-service requests (defaults to
+                one built from config.rate_limit); share one between Memory
+                instances to give them a common budget
         """
         self.local_mode = local_mode
         self.config = config or MemoryConfig()
+        self._lock = RWLock()
+        if embedder is None and local_mode:
+            embedder = HashingEmbedder()
+        self.embedder = embedder
+        
+        # Repeated content and repeated queries are embedded only once
+        self._embedder = None
+        if embedder is not None:
+            self._embedder = CachedEmbedder(embedder, max_size=self.config.embedding_cache_size)
         
         if not local_mode:
             # Hosted mode - requires API key
@@ -53,15 +140,105 @@ class Memory:
             
             # Import here to avoid circular dependency
             from .client import APIClient
-            self.client = APIClient(self.api_key, base_url)
+            if rate_limiter is None:
+                rate_limiter = TokenBucket(rate=self.config.rate_limit, burst=self.config.rate_limit_burst)
+            self.client = APIClient(
+                self.api_key,
+                base_url,
+                rate_limiter=rate_limiter,
+                retry_policy=RetryPolicy(
+                    max_attempts=self.config.retry_attempts,
+                    base_delay=self.config.retry_base_delay,
+                    max_delay=self.config.retry_max_delay
+                ),
+                circuit_breaker=CircuitBreaker(
+                    failure_threshold=self.config.breaker_failure_threshold,
+                    reset_timeout=self.config.breaker_reset_timeout
+                ),
+                # Reads fall back to the local copy while the service is down
+                fallback=self._serve_locally,
+                pool_maxsize=self.config.http_pool_size,
+                connect_timeout=self.config.http_connect_timeout,
+                read_timeout=self.config.http_read_timeout,
+                compress_min_bytes=self.config.http_compress_min_bytes,
+                cache=ResponseCache(
+                    ttl=self.config.api_cache_ttl,
+                    negative_ttl=self.config.api_negative_cache_ttl,
+                    max_entries=self.config.api_cache_size
+                )
+            )
+            if self.config.coalesce_window is not None:
+                self.client = RequestCoalescer(self.client, window=self.config.coalesce_window)
         else:
             # Local mode - no API needed
             self.api_key = None
             self.client = None
+        # Reads and writes go to the service, with local copies as a cache
+        self._hosted_sync = self.client is not None and (self.config.hosted_sync or self.config.write_behind)
+        # Writes are queued and sent in the background
+        self._spool = None
+        if self.client is not None and self.config.write_behind:
+            self._spool = WriteSpool(
+                self.client, path=self.config.spool_path, max_pending=self.config.spool_max_pending
+            )
+        
+        # Local storage (used in both modes)
+        bounded = self.config.cache_max_resident_entries or self.config.cache_max_resident_bytes
+        if bounded and (storage is not None or path is not None):
+            raise ValueError(
+                "config.cache_max_resident_entries and cache_max_resident_bytes only bound the default storage; "
+                "pass a BoundedStorage as storage instead"
+            )
+        if path is not None:
+            if storage is not None:
+                raise ValueError("Pass either storage or path, not both")
+            storage = LogStorage(path)
+        elif bounded:
+            storage = BoundedStorage(
+                max_resident_entries=self.config.cache_max_resident_entries,
+                max_resident_bytes=self.config.cache_max_resident_bytes,
+                policy=self.config.cache_policy,
+                spill_path=self.config.cache_spill_path
+            )
+        self._storage = storage if storage is not None else InMemoryStorage()
+        
+        # Embeddings of every memory in this namespace
+        ann = None
+        if self.config.ann_index == "ivf":
+            ann = IVFIndex(nlist=self.config.ann_nlist, nprobe=self.config.ann_nprobe)
+        shared = self._storage.shared_vectors() if self.config.embedding_storage == "float32" else None
+        if shared is not None:
+            # Search a memory-mapped snapshot's embeddings where they are
+            self._vectors = EmbeddingStore.from_matrix(*shared, ann=ann, exact_threshold=self.config.ann_min_size)
+        elif self.config.embedding_storage == "float32" and isinstance(self._storage, BoundedStorage):
+            # Vectors would dwarf the bounded content; keep them on disk too
+            self._vectors = MappedEmbeddingStore(
+                path=self.config.embedding_path, ann=ann, exact_threshold=self.config.ann_min_size
+            )
+        elif self.config.embedding_storage == "float32":
+            self._vectors = EmbeddingStore(ann=ann, exact_threshold=self.config.ann_min_size)
+        else:
+            self._vectors = QuantizedEmbeddingStore(
+                create_quantizer(self.config.embedding_storage, self.config.pq_subvectors),
+                path=self.config.embedding_path,
+                rerank=self.config.embedding_rerank,
+                ann=ann,
+                exact_threshold=self.config.ann_min_size
+            )
+        
+        # Reload embeddings saved by a persistent backend
+        self._storage.attach_vectors(self._vectors)
+        if self._embedder is not None and shared is None:
+            for memory_ids, vectors in self._storage.embeddings():
+                self._vectors.add_many(memory_ids, vectors)
+        
+        # Deadlines of memories stored with a ttl
+        self._expiry = ExpiryQueue(self._storage.expiring())
         
-        # Local cache (used in both modes)
-        self._cache = {}
-        self._cache_ttl = 300  # 5 minutes
+        # Local recall results, valid until a write bumps their generation;
+        # None counts writes to the whole namespace, other keys per user
+        self.recall_cache = RecallCache(max_entries=self.config.recall_cache_size)
+        self._generations: Dict[Optional[str], int] = {None: 0}
     
     def remember(
         self,
@@ -86,6 +263,54 @@ class Memory:
         Returns:
             str: The memory ID for later retrieval
         """
+        entry, original = self._build_entry(content, metadata, user_id, session_id, ttl, id)
+        self._store([(entry, original)])
+        return entry.id
+    
+    def remember_batch(
+        self,
+        memories: List[Union[str, Dict[str, Any]]],
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> List[str]:
+        """Store multiple memories at once, returns list of memory IDs"""
+        items = self._batch_entries(memories, user_id, session_id)
+        # One embedding call and one index pass for the whole batch
+        self._store(items)
+        return [entry.id for entry, _ in items]
+    
+    def _batch_entries(
+        self,
+        memories: List[Union[str, Dict[str, Any]]],
+        user_id: Optional[str],
+        session_id: Optional[str]
+    ) -> List[Tuple[MemoryEntry, Any]]:
+        """Create the MemoryEntries for remember_batch()"""
+        items = []
+        for memory in memories:
+            if isinstance(memory, str):
+                items.append(self._build_entry(memory, None, user_id, session_id, None, None))
+            else:
+                items.append(self._build_entry(
+                    memory.get("content"),
+                    memory.get("metadata"),
+                    user_id or memory.get("user_id"),
+                    session_id or memory.get("session_id"),
+                    memory.get("ttl"),
+                    memory.get("id")
+                ))
+        return items
+    
+    def _build_entry(
+        self,
+        content: Any,
+        metadata: Optional[Dict[str, Any]],
+        user_id: Optional[str],
+        session_id: Optional[str],
+        ttl: Optional[int],
+        id: Optional[str]
+    ) -> Tuple[MemoryEntry, Any]:
+        """Create the MemoryEntry for remember(), returned with the original content"""
         # Create memory metadata
         if metadata:
             # Separate known fields from custom fields
@@ -126,41 +351,75 @@ class Memory:
             timestamp=datetime.now(timezone.utc),
             ttl=ttl
         )
+        return entry, content
+    
+    def _store(self, items: List[Tuple[MemoryEntry, Any]]) -> None:
+        """
+        Write entries to the service (with hosted sync), then to the cache
+        and every index.
         
-        # Store via API (in production)
-        # response = self._session.post(f"{self.base_url}/memories", json=entry.dict())
-        # response.raise_for_status()
-        
-        # For MVP, store in local cache
-        # Store both the entry and the original content
-        self._cache[memory_id] = entry
-        self._original_content = getattr(self, '_original_content', {})
-        self._original_content[memory_id] = content
+        Only the local update holds the write lock: requests to the service
+        and embedding run unlocked, so reads and other writes proceed
+        meanwhile and concurrent writes can share pooled connections or a
+        coalesced batch.
+        """
+        items = self._latest(items)
+        if self._spool is not None:
+            # Unlocked, so while a full spool holds this writer back
+            # readers carry on
+            for payload in self._payloads(items):
+                self._spool.put_store(payload["id"], payload)
+        elif self._hosted_sync:
+            # Write through to the service first, so a failed store leaves
+            # no local copy; one request for the whole batch
+            payloads = self._payloads(items)
+            if len(payloads) == 1:
+                self.client.store_memory(payloads[0])
+            else:
+                self.client.store_memories(payloads)
+        self._store_embedded(items)
+    
+    @staticmethod
+    def _latest(items: List[Tuple[MemoryEntry, Any]]) -> List[Tuple[MemoryEntry, Any]]:
+        """Entries to store, keeping only the last version of an ID repeated within one batch"""
+        return list({entry.id: (entry, content) for entry, content in items}.values())
+    
+    def _store_embedded(self, items: List[Tuple[MemoryEntry, Any]]) -> None:
+        """Embed entries unlocked, then write them locally under the write lock"""
+        # The local store keeps the original content
+        vectors = None
+        if self._embedder is not None:
+            vectors = self._embed([entry.content for entry, _ in items])
         
-        return memory_id
+        with self._lock.write():
+            self._store_local(items, vectors)
     
-    def remember_batch(
-        self,
-        memories: List[Union[str, Dict[str, Any]]],
-        user_id: Optional[str] = None,
-        session_id: Optional[str] = None
-    ) -> List[str]:
-        """Store multiple memories at once, returns list of memory IDs"""
-        ids = []
-        for memory in memories:
-            if isinstance(memory, str):
-                memory_id = self.remember(memory, user_id=user_id, session_id=session_id)
+    def _payloads(self, items: List[Tuple[MemoryEntry, Any]]) -> List[Dict[str, Any]]:
+        """Request bodies for storing entries on the service"""
+        return [
+            {**entry.model_dump(mode="json", exclude={"embedding"}), "content": content}
+            for entry, content in items
+        ]
+    
+    def _store_local(self, items: List[Tuple[MemoryEntry, Any]], vectors: Optional[np.ndarray]) -> None:
+        """Write embedded entries to the cache and every index; needs the write lock"""
+        latest = [entry.id for entry, _ in items]
+        # An overwritten ID may have belonged to another user, whose cached
+        # recalls would otherwise keep serving it
+        owners = {entry.user_id for entry, _ in items}
+        owners.update(self._storage.user_id(memory_id) for memory_id in latest if memory_id in self._storage)
+        self._storage.put_many(items, vectors)
+        self._bump_generations(owners)
+        
+        if vectors is not None:
+            self._vectors.add_many(latest, vectors)
+        
+        for entry, _ in items:
+            if entry.ttl is None:
+                self._expiry.discard(entry.id)
             else:
-                memory_id = self.remember(
-                    content=memory.get("content"),
-                    metadata=memory.get("metadata"),
-                    user_id=user_id or memory.get("user_id"),
-                    session_id=session_id or memory.get("session_id"),
-                    ttl=memory.get("ttl"),
-                    id=memory.get("id")
-                )
-            ids.append(memory_id)
-        return ids
+                self._expiry.add(entry.id, to_epoch_ns(entry.timestamp) + entry.ttl * 1_000_000_000)
+        self.purge_expired(limit=_PURGE_BATCH)
     
     def recall(
         self,
@@ -183,109 +442,264 @@ class Memory:
         Returns:
             List of relevant memory contents
         """
-        # In production, this would call the API
-        # response = self._session.post(
-        #     f"{self.base_url}/recall",
-        #     json={
-        #         "query": query,
-        #         "strategy": strategy.value,
-        #         "limit": limit,
-        #         "user_id": user_id or self.config.namespace,
-        #         "filters": filters
-        #     }
-        # )
-        
-        # For MVP, simple local search with improved matching
-        results = []
-        query_words = query.lower().split()
-        
-        for memory_id, entry in self._cache.items():
-            if user_id and entry.user_id != user_id:
-                continue
-            
-            # Check if any query word appears in the content
-            content_lower = entry.content.lower()
-            if any(word in content_lower for word in query_words):
-                results.append(entry.content)
-            
-            # Also check metadata category if it exists
-            if filters and 'category' in filters:
-                if entry.metadata.category == filters['category']:
-                    if entry.content not in results:
-                        results.append(entry.content)
+        if self._hosted_sync:
+            return self._recall_remote(query, strategy, limit, user_id, filters)
+        with self._lock.read():
+            return self._recall_local(query, strategy, limit, user_id, filters)
+    
+    def recall_many(
+        self,
+        queries: List[str],
+        strategy: RecallStrategy = RecallStrategy.HYBRID,
+        limit: int = 5,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[str]]:
+        """
+        Recall memories for several queries at once.
+        
+        Gives the same answers as calling recall() for each query (memories
+        whose similarity differs only by float rounding may swap places),
+        but locally the queries are embedded in one batch, scored against
+        every stored embedding with a single matrix multiply and share the
+        keyword index work, which makes large batches (sub-questions,
+        evaluation runs) much cheaper than one recall() each.
+        
+        Args:
+            queries: The queries to search for
+            strategy: Recall strategy (semantic, recency, importance, hybrid)
+            limit: Maximum number of memories per query
+            user_id: Optional user filter
+            filters: Optional metadata filters
             
-            if len(results) >= limit:
-                break
+        Returns:
+            One list of memory contents per query, in query order
+        """
+        if self._hosted_sync:
+            return [self._recall_remote(query, strategy, limit, user_id, filters) for query in queries]
+        with self._lock.read():
+            return self._recall_local_many(list(queries), strategy, limit, user_id, filters)
+    
+    def _recall_remote(
+        self,
+        query: str,
+        strategy: RecallStrategy,
+        limit: int,
+        user_id: Optional[str],
+        filters: Optional[Dict[str, Any]]
+    ) -> List[str]:
+        """recall() answered by the hosted service"""
+        response = self.client.recall_memories(self._recall_params(query, strategy, limit, user_id, filters))
+        if self._spool is not None:
+            return self._with_queued(query, limit, user_id, response["memories"])
+        return response["memories"]
+    
+    def _recall_params(
+        self,
+        query: str,
+        strategy: RecallStrategy,
+        limit: int,
+        user_id: Optional[str],
+        filters: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Request body for a recall on the hosted service"""
+        return {
+            "query": query,
+            "strategy": RecallStrategy(strategy).value,
+            "limit": limit,
+            "user_id": user_id or self.config.namespace,
+            "filters": filters
+        }
+    
+    def _with_queued(self, query: str, limit: int, user_id: Optional[str], memories: List[str]) -> List[str]:
+        """
+        Merge writes still waiting in the spool into a recall answer.
         
-        return results
+        Queued stores that share a term with the query come first, newest
+        first; memories with a queued delete are left out.
+        """
+        queued = self._spool.queued()
+        if not queued:
+            return memories
+        query_terms = set(tokenize(query))
+        owner = user_id or self.config.namespace
+        fresh = []
+        hidden = set()
+        for op, payload in reversed(queued):
+            if payload is None:
+                continue
+            text = payload["content"] if isinstance(payload["content"], str) else json.dumps(payload["content"])
+            if op == "delete":
+                hidden.add(text)
+            elif payload["user_id"] == owner and query_terms & set(tokenize(text)):
+                fresh.append(text)
+        merged = [text for text in dict.fromkeys(fresh + memories) if text not in hidden]
+        return merged[:limit]
+    
+    def _recall_local(
+        self,
+        query: str,
+        strategy: RecallStrategy,
+        limit: int,
+        user_id: Optional[str],
+        filters: Optional[Dict[str, Any]]
+    ) -> List[str]:
+        """recall() answered by keyword and embedding search in the local store"""
+        return self._recall_local_many([query], strategy, limit, user_id, filters)[0]
+    
+    def _recall_local_many(
+        self,
+        queries: List[str],
+        strategy: RecallStrategy,
+        limit: int,
+        user_id: Optional[str],
+        filters: Optional[Dict[str, Any]]
+    ) -> List[List[str]]:
+        """
+        Local recall of each query.
+        
+        Results are cached until a write to the namespace (or, for a
+        per-user recall, to that user) bumps the generation they were
+        computed at. A cached answer is only reused while all of its
+        memories are still live. Queries missing from the cache are
+        searched together, each distinct one once.
+        """
+        now = time.time_ns()
+        strategy = RecallStrategy(strategy)
+        generation = self._generations.get(user_id or None, 0)
+        
+        def live(memory_id: str) -> bool:
+            return memory_id in self._storage and not self._is_expired(memory_id, now)
+        
+        matched: List[Optional[List[str]]] = [None] * len(queries)
+        # Cache key -> positions of the queries it answers
+        missing: Dict[Tuple, List[int]] = {}
+        for i, query in enumerate(queries):
+            key = recall_key(query, strategy.value, limit, user_id, filters)
+            if key in missing:
+                missing[key].append(i)
+                continue
+            matched[i] = self.recall_cache.get(key, generation, live)
+            if matched[i] is None:
+                missing[key] = [i]
+        
+        if missing:
+            found = self._match_many(
+                [queries[positions[0]] for positions in missing.values()], strategy, limit, user_id, filters, now
+            )
+            for (key, positions), memory_ids in zip(missing.items(), found):
+                self.recall_cache.put(key, generation, memory_ids)
+                for i in positions:
+                    matched[i] = memory_ids
+        
+        return [[self._storage.text(memory_id) for memory_id in memory_ids] for memory_ids in matched]
     
+    def _match_many(
+        self,
+        queries: List[str],
+        strategy: RecallStrategy,
+        limit: int,
+        user_id: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        now: int
+    ) -> List[List[str]]:
+        """IDs of the memories a local recall returns for each query, best first"""
+        query_terms = [tokenize(query) for query in queries]
+        
+        def accept(memory_id: str) -> bool:
+            if user_id and self._storage.user_id(memory_id) != user_id:
+                return False
+            return not self._is_expired(memory_id, now)
+        
+        if strategy in (RecallStrategy.SEMANTIC, RecallStrategy.HYBRID):
+            rankings: List[List[List[str]]] = [[] for _ in queries]
+            if strategy == RecallStrategy.HYBRID or not len(self._vectors):
+                # Rank by BM25 relevance
+                keyword = self._fetch_live_many(
+                    lambda pending, n: [
+                        [memory_id for memory_id, _ in hits]
+                        for hits in self._storage.search_many([query_terms[i] for i in pending], n, user_id)
+                    ],
+                    len(queries), limit, now
+                )
+                for ranking, memory_ids in zip(rankings, keyword):
+                    ranking.append(memory_ids)
+            if self._embedder is not None and len(self._vectors):
+                # Rank by embedding similarity, every query in one pass
+                hits = self._vectors.search(self._embed(queries), limit, accept)
+                for ranking, scored in zip(rankings, hits):
+                    ranking.append([
+                        memory_id for memory_id, score in scored
+                        if score > self.config.min_similarity
+                    ])
+            matched = [fuse_rankings(ranking, limit) for ranking in rankings]
+        else:
+            matched = [
+                self._fetch_live(lambda n, terms=terms: self._storage.match(terms, n, user_id), limit, now)
+                for terms in query_terms
+            ]
+        
+        # Fill up with entries whose metadata category matches the filter
+        if filters and 'category' in filters and any(len(memory_ids) < limit for memory_ids in matched):
+            category_ids = self._fetch_live(
+                lambda n: self._storage.ids(user_id=user_id or None, category=filters['category'], limit=n),
+                limit, now
+            )
+            for memory_ids in matched:
+                seen = set(memory_ids)
+                memory_ids.extend(
+                    [memory_id for memory_id in category_ids if memory_id not in seen][:limit - len(memory_ids)]
+                )
+        
+        return matched
+    
+    @reads
     def get_facts(self, category: Optional[str] = None, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get structured facts from memory"""
         facts = []
-        for memory_id, entry in self._cache.items():
-            if user_id and entry.user_id != user_id:
-                continue
-            if category and entry.metadata.category != category:
-                continue
-            
+        for memory_id in self._live(self._storage.ids(user_id=user_id or None, category=category or None)):
             facts.append({
-                "content": entry.content,
-                "confidence": entry.metadata.confidence,
-                "timestamp": entry.timestamp.isoformat()
+                "content": self._storage.text(memory_id),
+                "confidence": self._storage.confidence(memory_id),
+                "timestamp": from_epoch_ns(self._storage.timestamp_ns(memory_id)).isoformat()
             })
         
         return facts
     
+    @reads
     def get_recent(self, hours: int = 24, user_id: Optional[str] = None) -> List[str]:
-        """Get recent memories"""
+        """Get recent memories, newest first"""
         cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        recent = []
-        
-        for memory_id, entry in self._cache.items():
-            if user_id and entry.user_id != user_id:
-                continue
-            if entry.timestamp >= cutoff:
-                recent.append(entry.content)
-        
-        return sorted(recent, key=lambda x: x, reverse=True)
+        recent = self._storage.time_range(start_ns=to_epoch_ns(cutoff), user_id=user_id, newest_first=True)
+        return [self._storage.text(memory_id) for memory_id in self._live(recent)]
     
     def forget(self, memory_id: str) -> bool:
         """Delete a specific memory"""
-        if memory_id in self._cache:
-            del self._cache[memory_id]
-            return True
-        return False
+        return self.delete(memory_id)
     
     def forget_before(self, date: Union[str, datetime], user_id: Optional[str] = None) -> int:
         """Delete memories before a certain date"""
         if isinstance(date, str):
             date = datetime.fromisoformat(date)
         
-        to_delete = []
-        for memory_id, entry in self._cache.items():
-            if user_id and entry.user_id != user_id:
-                continue
-            if entry.timestamp < date:
-                to_delete.append(memory_id)
-        
-        for memory_id in to_delete:
-            del self._cache[memory_id]
-        
-        return len(to_delete)
+        return self._delete_where(lambda: self._storage.time_range(end_ns=to_epoch_ns(date), user_id=user_id))
     
+    @writes
     def update_confidence(self, memory_id: str, confidence: float) -> bool:
         """Update memory confidence score"""
-        if memory_id in self._cache:
-            self._cache[memory_id].metadata.confidence = confidence
+        if self.exists(memory_id):
+            self._storage.set_confidence(memory_id, confidence)
+            self._bump_generations([self._storage.user_id(memory_id)])
             return True
         return False
     
+    @reads
     def summarize_session(self, session_id: str) -> str:
         """Summarize a session's memories"""
-        session_memories = []
-        for memory_id, entry in self._cache.items():
-            if entry.session_id == session_id:
-                session_memories.append(entry.content)
+        session_memories = [
+            self._storage.text(memory_id)
+            for memory_id in self._live(self._storage.ids(session_id=session_id))
+        ]
         
         if not session_memories:
             return "No memories found for session"
@@ -300,22 +714,18 @@ class Memory:
     
     def clear_session(self, session_id: str) -> int:
         """Clear all memories from a session"""
-        to_delete = []
-        for memory_id, entry in self._cache.items():
-            if entry.session_id == session_id:
-                to_delete.append(memory_id)
-        
-        for memory_id in to_delete:
-            del self._cache[memory_id]
-        
-        return len(to_delete)
+        return self._delete_where(lambda: self._storage.ids(session_id=session_id))
     
+    @reads
     def export_user_data(self, user_id: str) -> Dict[str, Any]:
         """Export all user data (GDPR compliance)"""
         user_memories = []
-        for memory_id, entry in self._cache.items():
-            if entry.user_id == user_id:
-                user_memories.append(entry.model_dump())
+        for memory_id in self._live(self._storage.ids(user_id=user_id)):
+            data = self._storage.entry(memory_id).model_dump()
+            embedding = self._vectors.get(memory_id)
+            if embedding is not None:
+                data["embedding"] = embedding.tolist()
+            user_memories.append(data)
         
         return {
             "user_id": user_id,
@@ -326,42 +736,22 @@ class Memory:
     
     def delete_user_data(self, user_id: str) -> int:
         """Delete all user data (GDPR right to erasure)"""
-        to_delete = []
-        for memory_id, entry in self._cache.items():
-            if entry.user_id == user_id:
-                to_delete.append(memory_id)
-        
-        for memory_id in to_delete:
-            del self._cache[memory_id]
-        
-        return len(to_delete)
+        return self._delete_where(lambda: self._storage.ids(user_id=user_id))
     
+    @reads
     def get_stats(self) -> MemoryStats:
         """Get memory usage statistics"""
-        users = set()
-        categories = {}
-        
-        for entry in self._cache.values():
-            users.add(entry.user_id)
-            if entry.metadata.category:
-                categories[entry.metadata.category] = categories.get(entry.metadata.category, 0) + 1
+        categories = {
+            category: count for category, count in self._storage.category_counts().items()
+            if category
+        }
         
         # Calculate approximate storage size
-        try:
-            # Convert entries to JSON-serializable format
-            entries_data = []
-            for e in self._cache.values():
-                entry_dict = e.model_dump()
-                # Convert datetime to string
-                entry_dict['timestamp'] = entry_dict['timestamp'].isoformat()
-                entries_data.append(entry_dict)
-            storage_size = len(json.dumps(entries_data)) / 1024 / 1024
-        except:
-            storage_size = len(str(self._cache)) / 1024 / 1024
+        storage_size = self._storage.storage_bytes() / 1024 / 1024
         
         return MemoryStats(
-            total_memories=len(self._cache),
-            total_users=len(users),
+            total_memories=len(self._storage),
+            total_users=self._storage.user_count(),
             storage_used_mb=storage_size,
             recall_count_30d=0,  # Would track in production
             popular_categories=[{"name": k, "count": v} for k, v in sorted(categories.items(), key=lambda x: x[1], reverse=True)[:5]],
@@ -387,40 +777,52 @@ class Memory:
         Raises:
             KeyError: If memory_id not found
         """
-        if memory_id not in self._cache:
+        queued = self._get_queued(memory_id, include_metadata)
+        if queued is not _NOT_QUEUED:
+            return queued
+        if self._hosted_sync:
+            try:
+                memory = self.client.get_memory(memory_id)
+            except NotFoundError:
+                raise KeyError(f"Memory ID '{memory_id}' not found.")
+            return memory if include_metadata else memory["content"]
+        with self._lock.read():
+            return self._get_local(memory_id, include_metadata)
+    
+    def _get_queued(self, memory_id: str, include_metadata: bool) -> Any:
+        """get() answered from a write still in the spool, or _NOT_QUEUED"""
+        queued = self._spool.pending(memory_id) if self._spool is not None else None
+        if queued is None:
+            return _NOT_QUEUED
+        # Read our own write before it reaches the service
+        op, payload = queued
+        if op == "delete":
+            raise KeyError(f"Memory ID '{memory_id}' not found.")
+        if not include_metadata:
+            return payload["content"]
+        # The same shape as a stored memory, not the request body
+        content = payload["content"]
+        text = content if isinstance(content, str) else json.dumps(content)
+        return describe_memory(MemoryEntry.model_validate({**payload, "content": text}), content)
+    
+    def _get_local(self, memory_id: str, include_metadata: bool) -> Any:
+        """get() answered from the local store"""
+        if not self.exists(memory_id):
             # Suggest similar IDs if possible
-            similar_ids = [id for id in self._cache.keys() if memory_id.lower() in id.lower()][:3]
+            similar_ids = [id for id in self._storage if memory_id.lower() in id.lower()][:3]
             error_msg = f"Memory ID '{memory_id}' not found."
             if similar_ids:
                 error_msg += f" Did you mean one of: {', '.join(similar_ids)}?"
             raise KeyError(error_msg)
         
-        # Get original content if available
-        original_content = getattr(self, '_original_content', {})
-        if memory_id in original_content:
-            content = original_content[memory_id]
-        else:
-            # Fall back to string content from entry
-            entry = self._cache[memory_id]
-            try:
-                content = json.loads(entry.content)
-            except:
-                content = entry.content
+        content = self._storage.content(memory_id)
         
         if include_metadata:
-            entry = self._cache[memory_id]
-            return {
-                "content": content,
-                "id": memory_id,
-                "timestamp": entry.timestamp.isoformat(),
-                "session_id": entry.session_id,
-                "user_id": entry.user_id,
-                "metadata": entry.metadata.model_dump(),
-                "ttl": entry.ttl
-            }
+            return describe_memory(self._storage.entry(memory_id), content)
         
         return content
     
+    @reads
     def list(
         self,
         include_data: bool = False,
@@ -440,107 +842,170 @@ class Memory:
         Returns:
             List of memory summaries (or full data if requested)
         """
-        memories = []
+        ordered = self._iter_newest(filters, skip=offset)
+        return [
+            self._summarize(memory_id, include_data)
+            for memory_id in itertools.islice(ordered, limit)
+        ]
+    
+    @reads
+    def list_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_data: bool = False,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        List one page of memories, newest first, using a keyset cursor.
         
-        # Apply filters
-        filtered_entries = []
-        for memory_id, entry in self._cache.items():
-            # User filter
-            if 'user_id' in filters and entry.user_id != filters['user_id']:
-                continue
-            
-            # Session filter
-            if 'session_id' in filters and entry.session_id != filters['session_id']:
-                continue
-            
-            # Date filter
-            if 'created_after' in filters:
-                filter_date = datetime.fromisoformat(filters['created_after']) if isinstance(filters['created_after'], str) else filters['created_after']
-                if entry.timestamp < filter_date:
-                    continue
-            
-            # Category filter
-            if 'category' in filters and entry.metadata.category != filters['category']:
-                continue
-            
-            # Tags filter
-            if 'tags' in filters:
-                filter_tags = filters['tags'] if isinstance(filters['tags'], list) else [filters['tags']]
-                if not any(tag in entry.metadata.tags for tag in filter_tags):
-                    continue
+        Unlike offset pagination, fetching a deep page costs the same as the
+        first one and pages stay consistent while memories are added.
+        
+        Args:
+            limit: Maximum number of items in the page
+            cursor: next_cursor from the previous page (None for the first page)
+            include_data: Include full content (not just preview)
+            **filters: Same filters as list()
             
-            # Type filter (based on original content)
-            if 'type' in filters:
-                original_content = getattr(self, '_original_content', {})
-                if memory_id in original_content:
-                    content_type = type(original_content[memory_id]).__name__
-                else:
-                    content_type = 'str'
-                
-                if content_type != filters['type']:
-                    continue
+        Returns:
+            Dict with "memories" (as in list()) and "next_cursor" (None on the last page)
             
-            filtered_entries.append((memory_id, entry))
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        before = decode_cursor(cursor) if cursor else None
+        ordered = self._iter_newest(filters, before=before)
+        page = list(itertools.islice(ordered, limit + 1))
         
-        # Sort by timestamp (newest first)
-        filtered_entries.sort(key=lambda x: x[1].timestamp, reverse=True)
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = encode_cursor(self._storage.timestamp_ns(last), last)
         
-        # Apply pagination
-        paginated_entries = filtered_entries[offset:offset + limit]
+        return {
+            "memories": [self._summarize(memory_id, include_data) for memory_id in page],
+            "next_cursor": next_cursor
+        }
+    
+    def scan(
+        self,
+        batch_size: int = 1000,
+        include_data: bool = False,
+        **filters
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily iterate over every matching memory, newest first.
         
-        # Build response
-        for memory_id, entry in paginated_entries:
-            # Get content preview
-            original_content = getattr(self, '_original_content', {})
-            if memory_id in original_content:
-                content = original_content[memory_id]
-                content_type = type(content).__name__
-            else:
-                try:
-                    content = json.loads(entry.content)
-                    content_type = type(content).__name__
-                except:
-                    content = entry.content
-                    content_type = 'str'
-            
-            # Create preview
-            if isinstance(content, str):
-                preview = content[:100] + "..." if len(content) > 100 else content
-            elif isinstance(content, dict):
-                preview = f"Dict with {len(content)} keys"
-            elif isinstance(content, list):
-                preview = f"List with {len(content)} items"
-            else:
-                preview = str(content)[:100] + "..." if len(str(content)) > 100 else str(content)
-            
-            # Calculate size
-            size_str = json.dumps(content) if not isinstance(content, str) else content
-            size_bytes = len(size_str.encode('utf-8'))
-            if size_bytes < 1024:
-                size = f"{size_bytes} bytes"
-            elif size_bytes < 1024 * 1024:
-                size = f"{size_bytes / 1024:.1f} KB"
-            else:
-                size = f"{size_bytes / 1024 / 1024:.1f} MB"
-            
-            memory_info = {
-                "id": memory_id,
-                "preview": preview,
-                "type": content_type,
-                "size": size,
-                "created": entry.timestamp.isoformat(),
-                "user_id": entry.user_id,
-                "session_id": entry.session_id,
-                "metadata": entry.metadata.model_dump()
-            }
-            
-            if include_data:
-                memory_info["content"] = content
+        Memories are fetched in cursor-paginated batches, so only one batch
+        is held at a time and writes between batches are safe.
+        
+        Args:
+            batch_size: Memories fetched per batch
+            include_data: Include full content (not just preview)
+            **filters: Same filters as list()
             
-            memories.append(memory_info)
+        Yields:
+            Memory summaries as returned by list()
+        """
+        cursor = None
+        while True:
+            page = self.list_page(limit=batch_size, cursor=cursor, include_data=include_data, **filters)
+            yield from page["memories"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+    
+    def _iter_newest(
+        self,
+        filters: Dict[str, Any],
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0
+    ) -> Iterator[str]:
+        """
+        IDs matching list() filters, newest first.
+        
+        Args:
+            filters: list() filters
+            before: Only yield memories strictly older than this (timestamp_ns, id) key
+            skip: Number of matches to skip
+        """
+        # Date filter and retention bound the time range
+        now = time.time_ns()
+        start_ns = self._retention_cutoff(now)
+        if 'created_after' in filters:
+            filter_date = datetime.fromisoformat(filters['created_after']) if isinstance(filters['created_after'], str) else filters['created_after']
+            start_ns = max(to_epoch_ns(filter_date), start_ns or 0)
+        # Indexed filters and the skip are applied by the backend, unless
+        # some matches are filtered out afterwards
+        post_filter = 'type' in filters or self._expiry.has_due(now)
+        ordered = self._storage.iter_newest(
+            start_ns=start_ns,
+            before=before,
+            skip=0 if post_filter else skip,
+            user_id=filters.get('user_id', _UNSET),
+            session_id=filters.get('session_id', _UNSET),
+            category=filters.get('category', _UNSET),
+            tags=filters.get('tags', _UNSET)
+        )
+        
+        # Type filter (based on original content)
+        if 'type' in filters:
+            ordered = (
+                m for m in ordered
+                if type(self._storage.content(m)).__name__ == filters['type']
+            )
+        if self._expiry.has_due(now):
+            ordered = (m for m in ordered if not self._expiry.is_expired(m, now))
+        if post_filter:
+            ordered = itertools.islice(ordered, skip, None)
+        
+        return ordered
+    
+    def _summarize(self, memory_id: str, include_data: bool = False) -> Dict[str, Any]:
+        """Build the list() summary of a memory"""
+        # Get content preview
+        content = self._storage.content(memory_id)
+        content_type = type(content).__name__
+        
+        # Create preview
+        if isinstance(content, str):
+            preview = content[:100] + "..." if len(content) > 100 else content
+        elif isinstance(content, dict):
+            preview = f"Dict with {len(content)} keys"
+        elif isinstance(content, list):
+            preview = f"List with {len(content)} items"
+        else:
+            preview = str(content)[:100] + "..." if len(str(content)) > 100 else str(content)
+        
+        # Calculate size
+        size_str = json.dumps(content) if not isinstance(content, str) else content
+        size_bytes = len(size_str.encode('utf-8'))
+        if size_bytes < 1024:
+            size = f"{size_bytes} bytes"
+        elif size_bytes < 1024 * 1024:
+            size = f"{size_bytes / 1024:.1f} KB"
+        else:
+            size = f"{size_bytes / 1024 / 1024:.1f} MB"
         
-        return memories
+        memory_info = {
+            "id": memory_id,
+            "preview": preview,
+            "type": content_type,
+            "size": size,
+            "created": from_epoch_ns(self._storage.timestamp_ns(memory_id)).isoformat(),
+            "user_id": self._storage.user_id(memory_id),
+            "session_id": self._storage.session_id(memory_id),
+            "metadata": self._storage.metadata(memory_id).model_dump()
+        }
+        
+        if include_data:
+            memory_info["content"] = content
+        
+        return memory_info
     
+    @reads
     def inspect(self, memory_id: str) -> Dict[str, Any]:
         """
         Get detailed information about a specific memory.
@@ -554,23 +1019,14 @@ class Memory:
         Raises:
             KeyError: If memory_id not found
         """
-        if memory_id not in self._cache:
+        if not self.exists(memory_id):
             raise KeyError(f"Memory ID '{memory_id}' not found")
         
-        entry = self._cache[memory_id]
+        entry = self._storage.entry(memory_id)
         
         # Get original content
-        original_content = getattr(self, '_original_content', {})
-        if memory_id in original_content:
-            content = original_content[memory_id]
-            content_type = type(content).__name__
-        else:
-            try:
-                content = json.loads(entry.content)
-                content_type = type(content).__name__
-            except:
-                content = entry.content
-                content_type = 'str'
+        content = self._storage.content(memory_id)
+        content_type = type(content).__name__
         
         # Calculate size
         size_str = json.dumps(content) if not isinstance(content, str) else content
@@ -603,6 +1059,7 @@ class Memory:
             }
         }
     
+    @reads
     def exists(self, memory_id: str) -> bool:
         """
         Check if a memory ID exists.
@@ -613,7 +1070,7 @@ class Memory:
         Returns:
             True if exists, False otherwise
         """
-        return memory_id in self._cache
+        return memory_id in self._storage and not self._is_expired(memory_id, time.time_ns())
     
     def delete(self, memory_id: str) -> bool:
         """
@@ -623,15 +1080,233 @@ class Memory:
             memory_id: The memory ID to delete
             
         Returns:
-            True if deleted, False if not found
+            True if deleted, False if not found (with config.write_behind,
+            True once the delete is queued)
         """
-        if memory_id in self._cache:
-            del self._cache[memory_id]
-            
-            # Also remove from original content cache
-            original_content = getattr(self, '_original_content', {})
-            if memory_id in original_content:
-                del original_content[memory_id]
+        if self._spool is not None:
+            self._delete_where(lambda: [memory_id])
+            return True
+        if self._hosted_sync:
+            try:
+                self.client.delete_memory(memory_id)
+            except NotFoundError:
+                return self._remove_locked(memory_id)
+            self._remove_locked(memory_id)
+            return True
+        return self._remove_locked(memory_id)
+    
+    def _remove_locked(self, memory_id: str) -> bool:
+        """_remove() under the write lock"""
+        with self._lock.write():
+            return self._remove(memory_id)
+    
+    def _remove(self, memory_id: str) -> bool:
+        """Remove a memory from storage and the vector index"""
+        return self._remove_many([memory_id]) == 1
+    
+    def _delete_where(self, select: Callable[[], List[str]]) -> int:
+        """
+        Delete the memories select() picks, returning how many existed locally
+        
+        With hosted sync they are deleted from the service too. The IDs are
+        picked under the read lock and the service is called unlocked, so
+        only the local removal holds the write lock.
+        """
+        if not self._hosted_sync:
+            with self._lock.write():
+                return self._remove_many(select())
+        with self._lock.read():
+            memory_ids = select()
+            if self._spool is not None:
+                contents = [
+                    self._storage.content(memory_id) if memory_id in self._storage else None
+                    for memory_id in memory_ids
+                ]
+        if self._spool is not None:
+            # Queued without the lock, as a full spool makes this wait
+            for memory_id, content in zip(memory_ids, contents):
+                self._spool.put_delete(memory_id, content)
+        elif memory_ids:
+            self.client.delete_memories(memory_ids)
+        with self._lock.write():
+            return self._remove_many(memory_ids)
+    
+    def _remove_many(self, memory_ids: List[str]) -> int:
+        """Remove memories from this process in one storage call, returning how many existed"""
+        owners = {self._storage.user_id(memory_id) for memory_id in memory_ids if memory_id in self._storage}
+        removed = self._storage.remove_many(memory_ids)
+        self._bump_generations(owners)
+        for memory_id in memory_ids:
+            self._vectors.remove(memory_id)
+            self._expiry.discard(memory_id)
+        return removed
+    
+    @writes
+    def purge_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Delete memories whose ttl has passed or that are older than
+        config.retention_days.
+        
+        Expired memories are already hidden from reads; purging frees them.
+        Writes purge up to a small batch each, so this only needs calling to
+        reclaim a backlog at once. The cost grows with the number of expired
+        memories, not the size of the store.
+        
+        Args:
+            limit: Maximum number of memories to delete (None for all)
             
+        Returns:
+            Number of memories deleted
+        """
+        if self._storage.read_only:
+            return 0
+        now = time.time_ns()
+        expired = self._expiry.pop_due(now, limit)
+        cutoff = self._retention_cutoff(now)
+        if cutoff is not None and (limit is None or len(expired) < limit):
+            old = self._storage.time_range(end_ns=cutoff)
+            expired.extend(old if limit is None else old[:limit - len(expired)])
+        if not expired:
+            return 0
+        # The service expires its own copies
+        return self._remove_many(list(dict.fromkeys(expired)))
+    
+    def _bump_generations(self, user_ids: Iterable[Optional[str]]) -> None:
+        """Mark cached recalls of the namespace and of these users stale"""
+        self._generations[None] += 1
+        for user_id in set(user_ids):
+            if user_id:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+    
+    def _retention_cutoff(self, now_ns: int) -> Optional[int]:
+        """Timestamp before which memories are past config.retention_days"""
+        if self.config.retention_days is None:
+            return None
+        return now_ns - self.config.retention_days * 86400 * 1_000_000_000
+    
+    def _is_expired(self, memory_id: str, now_ns: int) -> bool:
+        if self._expiry.is_expired(memory_id, now_ns):
             return True
-        return False
\ No newline at end of file
+        cutoff = self._retention_cutoff(now_ns)
+        return cutoff is not None and self._storage.timestamp_ns(memory_id) < cutoff
+    
+    def _live(self, memory_ids: List[str]) -> List[str]:
+        """Drop expired IDs that have not been purged yet"""
+        now = time.time_ns()
+        return [memory_id for memory_id in memory_ids if not self._is_expired(memory_id, now)]
+    
+    def _fetch_live(self, fetch: Callable[[int], List[str]], limit: int, now_ns: int) -> List[str]:
+        """
+        First limit unexpired IDs of a ranked lookup.
+        
+        fetch(n) returns up to n IDs; it is called again with a larger n
+        while expired IDs leave the result short.
+        """
+        return self._fetch_live_many(lambda pending, n: [fetch(n)], 1, limit, now_ns)[0]
+    
+    def _fetch_live_many(
+        self,
+        fetch: Callable[[List[int], int], List[List[str]]],
+        count: int,
+        limit: int,
+        now_ns: int
+    ) -> List[List[str]]:
+        """
+        _fetch_live() for count lookups at once.
+        
+        fetch(pending, n) returns up to n IDs for each lookup position in
+        pending; only lookups left short by expired IDs are fetched again.
+        """
+        results: List[List[str]] = [[] for _ in range(count)]
+        pending = list(range(count))
+        size = max(limit, 1)
+        while pending:
+            short = []
+            for i, found in zip(pending, fetch(pending, size)):
+                live = [memory_id for memory_id in found if not self._is_expired(memory_id, now_ns)]
+                if len(live) >= limit or len(found) < size:
+                    results[i] = live[:limit]
+                else:
+                    short.append(i)
+            pending = short
+            size *= 4
+        return results
+    
+    @reads
+    def save_snapshot(self, path: str) -> int:
+        """
+        Write every memory and embedding to a columnar snapshot file.
+
+        The file can be opened read-only with SnapshotStorage, which maps it
+        instead of loading it, so even large snapshots open instantly.
+
+        Args:
+            path: Destination file (replaced atomically)
+
+        Returns:
+            Number of memories written
+        """
+        records = ((memory_id, self._storage.record(memory_id)) for memory_id in self._storage)
+        return write_snapshot(path, records, self._vectors.get)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until writes queued by config.write_behind reach the service.
+        
+        Args:
+            timeout: Seconds to wait at most (None waits indefinitely)
+            
+        Returns:
+            True if nothing is left queued
+            
+        Raises:
+            AuthenticationError, PaymentRequiredError: If the service
+                refused the queued writes and sending has stopped
+        """
+        return self._spool.flush(timeout) if self._spool is not None else True
+    
+    def close(self) -> None:
+        """Release the storage backend, any embedding files and the write spool"""
+        if self._spool is not None:
+            # Drains without the lock; unsent writes stay in a durable
+            # spool file for the next run
+            self._spool.close()
+        with self._lock.write():
+            self._storage.close()
+            if isinstance(self._vectors, MappedEmbeddingStore):
+                self._vectors.close()
+    
+    @reads
+    def _serve_locally(self, method: str, endpoint: str, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Answer a hosted-service read from local storage.
+        
+        Installed as the API client's fallback, so gets and recalls keep
+        working while the service is unreachable or its circuit breaker is
+        open. Returns None for anything that cannot be answered locally.
+        """
+        if method == "GET" and endpoint.startswith("/memories/"):
+            memory_id = endpoint[len("/memories/"):]
+            if not self.exists(memory_id):
+                return None
+            return self._get_local(memory_id, include_metadata=True)
+        if endpoint == "/memories/batch/get" and data:
+            results = [
+                self._get_local(memory_id, include_metadata=True) if self.exists(memory_id) else None
+                for memory_id in data["ids"]
+            ]
+            return {"results": results, "source": "local"}
+        if endpoint == "/recall" and data and "query" in data:
+            memories = self._recall_local(
+                data["query"],
+                strategy=RecallStrategy(data.get("strategy", RecallStrategy.HYBRID.value)),
+                limit=data.get("limit", 5),
+                user_id=data.get("user_id"),
+                filters=data.get("filters")
+            )
+            return {"memories": memories, "source": "local"}
+        return None
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with the configured embedder as a float32 matrix"""
+        return np.asarray(self._embedder.embed(texts), dtype=np.float32)
\ No newline at end of file
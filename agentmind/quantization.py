@@ -0,0 +1,169 @@
+"""
+Compressed embedding codes for memory-efficient similarity search
+"""
+from typing import Optional
+
+import numpy as np
+
+
+# Rows decoded or scored per block to bound temporary memory
+_BLOCK = 65536
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension 8-bit scalar quantization (4x smaller than float32).
+
+    Each dimension is mapped linearly from its trained [min, max] range onto
+    256 levels. Inner products are computed against the codes directly:
+    q . (lo + scale * code) == q . lo + (q * scale) . code
+    """
+
+    min_train = 1000
+
+    def __init__(self):
+        self._lo: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+
+    @property
+    def trained(self) -> bool:
+        return self._lo is not None
+
+    def code_size(self, dimension: int) -> int:
+        """Bytes per encoded vector"""
+        return dimension
+
+    def train(self, vectors: np.ndarray) -> None:
+        lo = vectors.min(axis=0)
+        hi = vectors.max(axis=0)
+        scale = (hi - lo) / 255.0
+        scale[scale == 0] = 1.0
+        self._lo = lo.astype(np.float32)
+        self._scale = scale.astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self._lo) / self._scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self._lo + codes.astype(np.float32) * self._scale
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate inner products, shape (len(codes), len(queries))"""
+        scaled = (queries * self._scale).T
+        offset = queries @ self._lo
+        scores = np.empty((len(codes), len(queries)), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK):
+            block = codes[start:start + _BLOCK].astype(np.float32)
+            scores[start:start + _BLOCK] = block @ scaled
+        return scores + offset
+
+
+class ProductQuantizer:
+    """
+    Product quantization: one byte per subvector.
+
+    Vectors are split into m subvectors, each replaced by the index of its
+    nearest of 256 trained sub-centroids. Queries are scored with
+    asymmetric distance computation: a (m, 256) table of partial inner
+    products is built per query and summed over the codes.
+
+    Args:
+        m: Number of subvectors (must divide the dimension; defaults to dimension / 8)
+        iterations: k-means iterations per subspace
+        seed: Random seed for training
+    """
+
+    min_train = 10000
+    ksub = 256
+
+    def __init__(self, m: Optional[int] = None, iterations: int = 15, seed: int = 0):
+        self.m = m
+        self.iterations = iterations
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[np.ndarray] = None  # (m, ksub, dsub)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def code_size(self, dimension: int) -> int:
+        """Bytes per encoded vector"""
+        return self._subvectors(dimension)
+
+    def train(self, vectors: np.ndarray) -> None:
+        n, dimension = vectors.shape
+        m = self._subvectors(dimension)
+        ksub = min(self.ksub, n)
+        subspaces = vectors.reshape(n, m, dimension // m)
+
+        centroids = np.zeros((m, self.ksub, dimension // m), dtype=np.float32)
+        for j in range(m):
+            centroids[j, :ksub] = self._kmeans(subspaces[:, j, :], ksub)
+            # Unused slots keep copies of real centroids so encode stays in range
+            centroids[j, ksub:] = centroids[j, 0]
+        self.m = m
+        self._centroids = centroids
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        n = len(vectors)
+        subspaces = vectors.reshape(n, self.m, -1)
+        codes = np.empty((n, self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _nearest_l2(subspaces[:, j, :], self._centroids[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self._centroids[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate inner products, shape (len(codes), len(queries))"""
+        subqueries = queries.reshape(len(queries), self.m, -1)
+        # tables[j] has shape (ksub, n_queries)
+        tables = np.einsum("qmd,mkd->mkq", subqueries, self._centroids)
+        scores = np.zeros((len(codes), len(queries)), dtype=np.float32)
+        for j in range(self.m):
+            scores += tables[j][codes[:, j]]
+        return scores
+
+    def _subvectors(self, dimension: int) -> int:
+        if self.m is not None:
+            if dimension % self.m:
+                raise ValueError(f"Dimension {dimension} is not divisible by m={self.m}")
+            return self.m
+        target = max(1, dimension // 8)
+        return max(d for d in range(1, target + 1) if dimension % d == 0)
+
+    def _kmeans(self, data: np.ndarray, k: int) -> np.ndarray:
+        centroids = data[self._rng.choice(len(data), k, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = _nearest_l2(data, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            counts = np.bincount(assign, minlength=k)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            empty = np.flatnonzero(~filled)
+            if len(empty):
+                centroids[empty] = data[self._rng.choice(len(data), len(empty))]
+        return centroids
+
+
+def create_quantizer(kind: str, subvectors: Optional[int] = None):
+    """Build a quantizer from a MemoryConfig.embedding_storage value"""
+    if kind == "int8":
+        return ScalarQuantizer()
+    if kind == "pq":
+        return ProductQuantizer(m=subvectors)
+    raise ValueError(f"Unknown embedding storage '{kind}'")
+
+
+def _nearest_l2(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid by Euclidean distance"""
+    assign = np.empty(len(data), dtype=np.int64)
+    c_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(data), _BLOCK):
+        block = data[start:start + _BLOCK]
+        assign[start:start + _BLOCK] = np.argmin(c_norms - 2.0 * block @ centroids.T, axis=1)
+    return assign
@@ -0,0 +1,172 @@
+"""
+Client-side rate limiting for the hosted service
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter that allows bursts and adapts to the server.
+
+    The bucket holds up to burst tokens and refills at rate tokens per
+    second; each request takes one. Idle time therefore buys a burst of up
+    to burst back-to-back requests, while the long-run rate never exceeds
+    rate. burst=1 gives a leaky bucket that spaces requests evenly.
+
+    When the server answers 429, on_rate_limited() halves the refill rate
+    (down to min_rate) and, given a Retry-After delay, holds every caller
+    until it has passed. Each success then adds back a twentieth of the
+    configured rate, so throughput recovers once the server stops pushing
+    back.
+
+    A bucket is thread-safe and can be shared by any number of clients,
+    sync or async, so that they draw on one budget, e.g. all clients using
+    the same API key.
+
+    Example:
+        limiter = TokenBucket(rate=50, burst=100)
+        client_a = APIClient(key, rate_limiter=limiter)
+        client_b = AsyncAPIClient(key, rate_limiter=limiter)
+
+    Args:
+        rate: Sustained requests per second
+        burst: Bucket capacity, i.e. requests allowed back to back (defaults to rate)
+        min_rate: Lowest rate that 429 responses can push the bucket down to
+            (defaults to rate / 16)
+        clock: Monotonic clock in seconds, replaceable for testing
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else max(1.0, self.max_rate)
+        if self.burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.min_rate = min(float(min_rate), self.max_rate) if min_rate is not None else self.max_rate / 16
+        self.rate_limited = 0
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _take(self, tokens: float) -> float:
+        """Take tokens if available, otherwise return how long to wait before trying again"""
+        if tokens > self.burst:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.burst}")
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting, returns whether they were available"""
+        return self._take(tokens) == 0.0
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available and take them.
+
+        Args:
+            tokens: Tokens to take
+            timeout: Give up after this many seconds (None waits indefinitely)
+
+        Returns:
+            True once taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Like acquire(), but waits with asyncio.sleep so the event loop keeps running"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            await asyncio.sleep(wait)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """
+        Back off after a 429 response.
+
+        Args:
+            retry_after: Seconds the server asked callers to wait, if any
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Whatever was saved up evidently was not accepted
+            self._tokens = min(self._tokens, 1.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+                # One request may probe the server as soon as the hold is
+                # over; tokens only accumulate again from then on
+                self._tokens = 1.0
+                self._updated = max(self._updated, self._blocked_until)
+            self.rate_limited += 1
+
+    def on_success(self) -> None:
+        """Recover towards the configured rate after an accepted request"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self._refill(self._clock())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header.
+
+    Accepts both forms the header allows, a delay in seconds or an HTTP
+    date. Returns None when the header is missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,107 @@
+"""
+Cache of local recall results, invalidated by store generations
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .index import tokenize
+
+
+def recall_key(
+    query: str,
+    strategy: str,
+    limit: int,
+    user_id: Optional[str],
+    filters: Optional[Dict[str, Any]]
+) -> Tuple:
+    """
+    Cache key of a recall.
+
+    The query is reduced to its lowercase word tokens, the same terms
+    keyword search sees, so "Dark mode?" and "dark  mode" share an entry.
+    """
+    frozen = json.dumps(filters, sort_keys=True, default=str) if filters else None
+    return (" ".join(tokenize(query)), strategy, limit, user_id or None, frozen)
+
+
+class RecallCache:
+    """
+    LRU cache of recall results (memory IDs), each stamped with the store
+    generation it was computed at.
+
+    The store keeps a generation counter per user and one for the whole
+    namespace, and every write bumps the counters it touches. A lookup
+    passes the current generation for its scope; an entry computed at an
+    older one is stale and dropped. Invalidation is therefore O(1) per
+    write, no matter how many results are cached.
+
+    Args:
+        max_entries: Results kept (0 disables the cache)
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(
+        self,
+        key: Hashable,
+        generation: int,
+        is_live: Optional[Callable[[str], bool]] = None
+    ) -> Optional[List[str]]:
+        """
+        IDs cached for key at generation, or None.
+
+        With is_live, an entry holding any ID it rejects (e.g. one that has
+        expired since) is dropped as well.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation or (is_live and not all(map(is_live, entry[1]))):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, generation: int, memory_ids: List[str]) -> None:
+        """Cache the IDs recalled for key at generation"""
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (generation, list(memory_ids))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counts, hit rate, evictions and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self._entries)
+        }
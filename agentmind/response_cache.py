@@ -0,0 +1,118 @@
+"""
+Read-through cache for hosted-service responses
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# No fresh entry: the caller has to ask the service
+MISS = object()
+# Fresh negative entry: the service recently said this does not exist
+NOT_FOUND = object()
+
+
+class _Entry:
+    __slots__ = ("value", "etag", "expires")
+
+    def __init__(self, value: Any, etag: Optional[str], expires: float):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    TTL cache of API responses, keyed by (kind, identifier) tuples.
+
+    Fresh entries answer reads without a request. Expired entries are kept
+    (up to max_entries, least recently used first out) so that their ETag
+    can revalidate them: a 304 Not Modified makes them fresh again without
+    transferring the body. Missing IDs are cached as well, for the shorter
+    negative_ttl, so repeatedly looking up an unknown ID does not reach the
+    service each time.
+
+    Writes through the client invalidate what they may have changed.
+
+    Args:
+        ttl: Seconds a response stays fresh
+        negative_ttl: Seconds a "not found" stays fresh
+        max_entries: Entries kept, fresh or stale
+        clock: Monotonic clock in seconds, replaceable for testing
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """The fresh value for key, NOT_FOUND for a fresh negative entry, or MISS"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= self._clock():
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def etag(self, key: Hashable) -> Optional[str]:
+        """ETag of the cached value for key, fresh or not"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.etag if entry is not None else None
+
+    def put(self, key: Hashable, value: Any, etag: Optional[str] = None) -> None:
+        """Cache a response"""
+        self._put(key, _Entry(value, etag, self._clock() + self.ttl))
+
+    def put_missing(self, key: Hashable) -> None:
+        """Cache a "not found" answer"""
+        self._put(key, _Entry(NOT_FOUND, None, self._clock() + self.negative_ttl))
+
+    def revalidate(self, key: Hashable) -> Any:
+        """Make the entry for key fresh again after a 304, returns its value (MISS if evicted)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            entry.expires = self._clock() + self.ttl
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry for key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_kind(self, kind: str) -> None:
+        """Drop every entry whose key starts with kind"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == kind]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _put(self, key: Hashable, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,139 @@
+"""
+Retry policy and circuit breaker for the hosted service
+"""
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class RetryPolicy:
+    """
+    How often and how long to wait before retrying a failed request.
+
+    Delays grow exponentially from base_delay up to max_delay. With jitter,
+    each delay is drawn uniformly between zero and that bound ("full
+    jitter"), so clients that failed together do not retry together. A
+    Retry-After delay from the server is always waited out in full.
+
+    Only transient failures (timeouts, connection errors, 5xx and 429) are
+    retried, and only for requests that are safe to repeat: GET and DELETE,
+    recall, and stores that carry an idempotency key.
+
+    Args:
+        max_attempts: Attempts per request, including the first (1 disables retries)
+        base_delay: Upper bound of the first delay in seconds
+        max_delay: Cap on any single delay in seconds
+        jitter: Randomize delays (full jitter) instead of waiting the bound
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.25,
+        max_delay: float = 8.0,
+        jitter: bool = True
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether a request that just failed its attempt-th try gets another"""
+        return attempt < self.max_attempts
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait after the attempt-th failure"""
+        bound = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, bound) if self.jitter else bound
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while the hosted service is down.
+
+    The breaker starts closed. failure_threshold consecutive failures open
+    it, and while open, allow() refuses every request so that callers fail
+    immediately (or fall back to local data) instead of piling timeouts and
+    retries onto a struggling backend. After reset_timeout seconds it turns
+    half-open and lets a single probe through: success closes it again,
+    failure re-opens it for another reset_timeout.
+
+    Breakers are thread-safe and may be shared by several clients.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker
+        reset_timeout: Seconds to stay open before probing
+        clock: Monotonic clock in seconds, replaceable for testing
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: CLOSED, OPEN or HALF_OPEN"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            # Half-open: exactly one probe at a time
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        """The backend answered"""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probing = False
+
+    def release(self) -> None:
+        """A request allow() let through ended without a verdict on the backend (e.g. a local error)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """The backend timed out, was unreachable or answered 5xx"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probing = False
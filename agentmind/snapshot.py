@@ -0,0 +1,833 @@
+"""
+Columnar snapshot files that are memory-mapped instead of deserialized
+"""
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .index import from_epoch_ns, tokenize
+from .storage import StorageBackend, _UNSET
+from .store import Record, _pack_float, _unpack_float
+from .types import MemoryEntry, MemoryMetadata
+
+
+MAGIC = b"AMCOL001"
+
+# Sections start on cache-line boundaries
+_ALIGN = 64
+
+_FLAG_JSON = 1
+_FLAG_TTL = 2
+_FLAG_VECTOR = 4
+
+# BM25 parameters, matching TermIndex
+_K1 = 1.5
+_B = 0.75
+
+# Rows walked per step by lazy time-ordered scans
+_CHUNK = 1024
+
+# Bytes copied per step when streaming embeddings
+_COPY_BYTES = 1 << 20
+
+
+def write_snapshot(
+    path: str,
+    items: Iterable[Tuple[str, Record]],
+    vector_of: Optional[Callable[[str], Optional[np.ndarray]]] = None
+) -> int:
+    """
+    Write memories to a columnar snapshot file, atomically replacing path.
+
+    Layout: an 8-byte magic, the offset of a JSON footer, then aligned
+    sections. Fixed-width fields (timestamps, importance, confidence, flags,
+    ttl, interned user/session/category codes) are one little-endian column
+    each. Strings (IDs, content, interned values, vocabulary) are an offset
+    table plus a UTF-8 blob; interned tables and the vocabulary are sorted so
+    they can be searched in place. The file also holds the ID sort order,
+    the (timestamp, id) order, a BM25 inverted index and one contiguous
+    float32 embedding block. Rows keep the order of items.
+
+    Args:
+        path: Destination file
+        items: (memory_id, record) pairs
+        vector_of: Returns the (unit-length) embedding of an ID, or None
+
+    Returns:
+        Number of rows written
+    """
+    ids, texts, extras = _StringsBuilder(), _StringsBuilder(), _StringsBuilder()
+    timestamp, ttl = array("q"), array("q")
+    importance, confidence = array("d"), array("d")
+    flags = bytearray()
+    users, sessions, categories, tag_values = {}, {}, {}, {}
+    user_col, session_col, category_col = array("I"), array("I"), array("I")
+    tag_offsets, tag_codes = array("Q", [0]), array("I")
+    vocab: Dict[str, int] = {}
+    post_term, post_row, post_tf, doc_len = array("I"), array("I"), array("H"), array("I")
+    # Embeddings go to a scratch file as they arrive, so they are never all in RAM
+    vectors = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+    dimension = 0
+
+    for row, (memory_id, record) in enumerate(items):
+        text = record.text
+        ids.add(memory_id)
+        texts.add(text)
+        extra = {}
+        if record.source is not None:
+            extra["source"] = record.source
+        if record.custom:
+            extra["custom"] = record.custom
+        extras.add(json.dumps(extra) if extra else "")
+
+        timestamp.append(record.timestamp_ns)
+        importance.append(_pack_float(record.importance))
+        confidence.append(_pack_float(record.confidence))
+        ttl.append(record.ttl or 0)
+        user_col.append(_code(users, record.user_id))
+        session_col.append(_code(sessions, record.session_id))
+        category_col.append(_code(categories, record.category))
+        for tag in dict.fromkeys(record.tags):
+            tag_codes.append(tag_values.setdefault(tag, len(tag_values)))
+        tag_offsets.append(len(tag_codes))
+
+        tokens = tokenize(text)
+        doc_len.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            post_term.append(vocab.setdefault(term, len(vocab)))
+            post_row.append(row)
+            post_tf.append(min(tf, 65535))
+
+        vector = vector_of(memory_id) if vector_of is not None else None
+        if vector is not None:
+            vector = np.asarray(vector, dtype="<f4")
+            if not dimension:
+                # Rows before the first embedding get zero rows
+                dimension = len(vector)
+                _write_zeros(vectors, row * dimension * 4)
+            vectors.write(vector.tobytes())
+        elif dimension:
+            _write_zeros(vectors, dimension * 4)
+        flags.append(
+            (0 if isinstance(record.content, str) else _FLAG_JSON)
+            | (0 if record.ttl is None else _FLAG_TTL)
+            | (0 if vector is None else _FLAG_VECTOR)
+        )
+
+    n = len(timestamp)
+    if n >= 2 ** 32:
+        raise ValueError("Snapshots hold at most 2**32 - 1 memories")
+
+    sections: Dict[str, np.ndarray] = {
+        "timestamp": np.frombuffer(timestamp, dtype="<i8"),
+        "importance": np.frombuffer(importance, dtype="<f8"),
+        "confidence": np.frombuffer(confidence, dtype="<f8"),
+        "flags": np.frombuffer(bytes(flags), dtype=np.uint8),
+        "ttl": np.frombuffer(ttl, dtype="<i8"),
+        "doc_len": np.frombuffer(doc_len, dtype="<u4"),
+        "tag_offsets": np.frombuffer(tag_offsets, dtype="<u8"),
+    }
+    sections.update(ids.sections("id"))
+    sections.update(texts.sections("text"))
+    sections.update(extras.sections("extra"))
+
+    # Interned columns are recoded so their value tables are sorted
+    for name, codes, column in (
+        ("user", users, user_col),
+        ("session", sessions, session_col),
+        ("category", categories, category_col),
+    ):
+        table, remap = _sorted_table(codes, reserved=1)
+        sections[name] = remap[np.frombuffer(column, dtype=np.uint32)].astype("<u4")
+        sections.update(table.sections(name + "_values"))
+    table, remap = _sorted_table(tag_values, reserved=0)
+    sections["tag_codes"] = remap[np.frombuffer(tag_codes, dtype=np.uint32)].astype("<u4")
+    sections.update(table.sections("tag_values"))
+
+    # Lookup by ID bisects rows in ID order; time scans walk (timestamp, id) order
+    id_order = np.array(sorted(range(n), key=ids.raw), dtype="<u4")
+    id_rank = np.empty(n, dtype=np.int64)
+    id_rank[id_order] = np.arange(n)
+    time_order = np.lexsort((id_rank, sections["timestamp"])).astype("<u4")
+    sections["id_order"] = id_order
+    sections["time_order"] = time_order
+    sections["time_sorted"] = sections["timestamp"][time_order]
+
+    # Inverted index: postings grouped by (sorted) term, rows ascending
+    table, remap = _sorted_table(vocab, reserved=0)
+    terms = remap[np.frombuffer(post_term, dtype=np.uint32)]
+    rows = np.frombuffer(post_row, dtype=np.uint32)
+    order = np.lexsort((rows, terms))
+    sections["posting_rows"] = rows[order].astype("<u4")
+    sections["posting_tf"] = np.frombuffer(post_tf, dtype=np.uint16)[order].astype("<u2")
+    sections["term_offsets"] = np.concatenate(
+        [[0], np.cumsum(np.bincount(terms, minlength=len(vocab)))]
+    ).astype("<u8")
+    sections.update(table.sections("vocab"))
+
+    footer = {
+        "version": 1,
+        "rows": n,
+        "dimension": dimension,
+        "total_len": int(sections["doc_len"].sum()),
+        "sections": {},
+    }
+    temp = path + ".tmp"
+    with vectors, open(temp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", 0))
+        for name, data in sections.items():
+            offset = _pad(f)
+            f.write(np.ascontiguousarray(data).tobytes())
+            footer["sections"][name] = [offset, data.dtype.str, len(data)]
+
+        # Embeddings are copied over from the scratch file; rows without one are zero
+        offset = _pad(f)
+        vectors.seek(0)
+        shutil.copyfileobj(vectors, f, _COPY_BYTES)
+        footer["sections"]["vectors"] = [offset, "<f4", n * dimension]
+
+        footer_offset = f.tell()
+        f.write(json.dumps(footer).encode("utf-8"))
+        f.seek(len(MAGIC))
+        f.write(struct.pack("<Q", footer_offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    return n
+
+
+def _write_zeros(f, nbytes: int) -> None:
+    for start in range(0, nbytes, _COPY_BYTES):
+        f.write(bytes(min(_COPY_BYTES, nbytes - start)))
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file.
+
+    The file is mapped with mmap and every section is exposed as a NumPy
+    array over the mapping, so opening costs the same for any size and
+    processes opening the same file share one copy in the page cache.
+
+    Args:
+        path: Snapshot file written by write_snapshot()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an AgentMind snapshot")
+        (footer_offset,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        footer = json.loads(self._mmap[footer_offset:])
+
+        self.rows: int = footer["rows"]
+        self.dimension: int = footer["dimension"]
+        self.total_len: int = footer["total_len"]
+        self._columns: Dict[str, np.ndarray] = {}
+        for name, (offset, dtype, count) in footer["sections"].items():
+            if count:
+                self._columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            else:
+                self._columns[name] = np.empty(0, dtype=dtype)
+
+        c = self._columns
+        self.timestamp = c["timestamp"]
+        self.importance = c["importance"]
+        self.confidence = c["confidence"]
+        self.flags = c["flags"]
+        self.ttl = c["ttl"]
+        self.user = c["user"]
+        self.session = c["session"]
+        self.category = c["category"]
+        self.tag_offsets = c["tag_offsets"]
+        self.tag_codes = c["tag_codes"]
+        self.id_order = c["id_order"]
+        self.time_order = c["time_order"]
+        self.time_sorted = c["time_sorted"]
+        self.doc_len = c["doc_len"]
+        self.term_offsets = c["term_offsets"]
+        self.posting_rows = c["posting_rows"]
+        self.posting_tf = c["posting_tf"]
+        self.vectors = c["vectors"].reshape(self.rows, self.dimension)
+        self.ids = _Strings(c["id_offsets"], c["id_blob"])
+        self.texts = _Strings(c["text_offsets"], c["text_blob"])
+        self.extras = _Strings(c["extra_offsets"], c["extra_blob"])
+        self.user_values = _Strings(c["user_values_offsets"], c["user_values_blob"])
+        self.session_values = _Strings(c["session_values_offsets"], c["session_values_blob"])
+        self.category_values = _Strings(c["category_values_offsets"], c["category_values_blob"])
+        self.tag_values = _Strings(c["tag_values_offsets"], c["tag_values_blob"])
+        self.vocab = _Strings(c["vocab_offsets"], c["vocab_blob"])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def row_of(self, memory_id: str) -> Optional[int]:
+        """Row holding memory_id, found by bisecting the ID order"""
+        key = memory_id.encode("utf-8")
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ids.raw(int(self.id_order[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.rows:
+            row = int(self.id_order[lo])
+            if self.ids.raw(row) == key:
+                return row
+        return None
+
+    def has_vector(self, row: int) -> bool:
+        return bool(self.flags[row] & _FLAG_VECTOR)
+
+    def text(self, row: int) -> str:
+        return self.texts.get(row)
+
+    def content(self, row: int) -> Any:
+        text = self.texts.get(row)
+        return json.loads(text) if self.flags[row] & _FLAG_JSON else text
+
+    def record(self, row: int) -> Record:
+        extra = self.extras.get(row)
+        extra = json.loads(extra) if extra else {}
+        start, end = self.tag_offsets[row], self.tag_offsets[row + 1]
+        return Record(
+            self.content(row),
+            int(self.timestamp[row]),
+            _value(self.user_values, self.user[row]),
+            _value(self.session_values, self.session[row]),
+            _value(self.category_values, self.category[row]),
+            _unpack_float(float(self.importance[row])),
+            _unpack_float(float(self.confidence[row])),
+            extra.get("source"),
+            tuple(self.tag_values.get(int(code)) for code in self.tag_codes[start:end]),
+            extra.get("custom", {}),
+            int(self.ttl[row]) if self.flags[row] & _FLAG_TTL else None
+        )
+
+    def close(self) -> None:
+        """Unmap the file once no arrays taken from it are still referenced"""
+        self._columns.clear()
+        for name in list(vars(self)):
+            if name != "_mmap" and isinstance(getattr(self, name), (np.ndarray, _Strings)):
+                delattr(self, name)
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Arrays handed out earlier still point into the mapping
+            pass
+
+
+class SnapshotStorage(StorageBackend):
+    """
+    Read-only storage backend over a snapshot file.
+
+    Nothing is deserialized on open: lookups bisect the sorted ID order,
+    field filters are vectorized comparisons over the mapped code columns,
+    time queries bisect the (timestamp, id) order and keyword search scores
+    the mapped postings with BM25. Memory uses the embedding block in place
+    (no copy) when its embedding_storage is float32. Writes raise ValueError.
+
+    A store layered on top (LogStorage) can hide() rows it has replaced or
+    deleted; hidden rows are left out of every answer, including the BM25
+    statistics.
+
+    Example:
+        memory.save_snapshot("corpus.snap")
+        reader = Memory(local_mode=True, storage=SnapshotStorage("corpus.snap"))
+
+    Args:
+        path: Snapshot file written by Memory.save_snapshot() or write_snapshot()
+    """
+
+    read_only = True
+
+    def __init__(self, path: str):
+        self._snap = Snapshot(path)
+        # Rows hidden by hide(), allocated on first use
+        self._hidden: Optional[np.ndarray] = None
+        self._hidden_count = 0
+        self._hidden_len = 0
+
+    def __len__(self) -> int:
+        return self._snap.rows - self._hidden_count
+
+    def __contains__(self, memory_id: str) -> bool:
+        return self._visible_row(memory_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        hidden = self._hidden
+        return (
+            self._snap.ids.get(row) for row in range(self._snap.rows)
+            if hidden is None or not hidden[row]
+        )
+
+    @property
+    def path(self) -> str:
+        return self._snap.path
+
+    def hide(self, memory_ids: Iterable[str]) -> List[str]:
+        """Leave memories out of every answer from now on, returning the IDs that were visible"""
+        hidden = []
+        for memory_id in memory_ids:
+            row = self._visible_row(memory_id)
+            if row is None:
+                continue
+            if self._hidden is None:
+                self._hidden = np.zeros(self._snap.rows, dtype=bool)
+            self._hidden[row] = True
+            self._hidden_count += 1
+            self._hidden_len += int(self._snap.doc_len[row])
+            hidden.append(memory_id)
+        return hidden
+
+    def hidden_rows(self) -> Optional[np.ndarray]:
+        """A copy of the hidden-row mask (None if nothing is hidden)"""
+        return None if self._hidden is None else self._hidden.copy()
+
+    def items(self, hidden: Optional[np.ndarray] = None) -> Iterator[Tuple[str, Record]]:
+        """(memory_id, record) of every row not marked in hidden, in row order"""
+        snap = self._snap
+        for row in range(snap.rows):
+            if hidden is None or not hidden[row]:
+                yield snap.ids.get(row), snap.record(row)
+
+    def vector(self, memory_id: str) -> Optional[np.ndarray]:
+        """The stored embedding of a row, hidden or not, or None"""
+        row = self._snap.row_of(memory_id)
+        if row is None or not self._snap.has_vector(row):
+            return None
+        return self._snap.vectors[row]
+
+    def put_many(
+        self,
+        items: Sequence[Tuple[MemoryEntry, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ) -> None:
+        raise ValueError("Snapshot storage is read-only")
+
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        raise ValueError("Snapshot storage is read-only")
+
+    def set_confidence(self, memory_id: str, confidence: float) -> None:
+        raise ValueError("Snapshot storage is read-only")
+
+    def content(self, memory_id: str) -> Any:
+        return self._snap.content(self._row(memory_id))
+
+    def text(self, memory_id: str) -> str:
+        return self._snap.text(self._row(memory_id))
+
+    def timestamp_ns(self, memory_id: str) -> int:
+        return int(self._snap.timestamp[self._row(memory_id)])
+
+    def user_id(self, memory_id: str) -> str:
+        return _value(self._snap.user_values, self._snap.user[self._row(memory_id)])
+
+    def session_id(self, memory_id: str) -> Optional[str]:
+        return _value(self._snap.session_values, self._snap.session[self._row(memory_id)])
+
+    def confidence(self, memory_id: str) -> Optional[float]:
+        return _unpack_float(float(self._snap.confidence[self._row(memory_id)]))
+
+    def record(self, memory_id: str) -> Record:
+        return self._snap.record(self._row(memory_id))
+
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        record = self.record(memory_id)
+        return MemoryMetadata.model_construct(
+            importance=record.importance,
+            confidence=record.confidence,
+            category=record.category,
+            source=record.source,
+            tags=list(record.tags),
+            custom=dict(record.custom)
+        )
+
+    def entry(self, memory_id: str) -> MemoryEntry:
+        record = self.record(memory_id)
+        return MemoryEntry.model_construct(
+            id=memory_id,
+            content=record.text,
+            embedding=None,
+            metadata=self.metadata(memory_id),
+            user_id=record.user_id,
+            session_id=record.session_id,
+            timestamp=from_epoch_ns(record.timestamp_ns),
+            ttl=record.ttl,
+            relations=[]
+        )
+
+    def search(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        return self.search_corpus(terms, limit, user_id, len(self), self.total_len)
+
+    def search_corpus(
+        self,
+        terms: List[str],
+        limit: int,
+        user_id: Optional[str],
+        count: int,
+        total_len: int,
+        extra_df: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25 over this snapshot's rows, with the statistics of a larger corpus
+
+        A store layered over the snapshot passes its own document count and
+        token total, and extra_df[term] documents it holds containing each
+        term, so scores match those of a single index over both.
+        """
+        snap = self._snap
+        rows, scores = [], []
+        avg_len = total_len / count if count else 1.0
+        avg_len = avg_len or 1.0
+        for term in dict.fromkeys(terms):
+            rows_t, tf = self.postings(term)
+            if not len(rows_t):
+                continue
+            df = len(rows_t) + (extra_df or {}).get(term, 0)
+            idf = math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+            tf = tf.astype(np.float64)
+            norm = _K1 * (1.0 - _B + _B * snap.doc_len[rows_t] / avg_len)
+            rows.append(rows_t)
+            scores.append(idf * tf * (_K1 + 1) / (tf + norm))
+        if not rows or limit <= 0:
+            return []
+
+        matched, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        if user_id:
+            keep = snap.user[matched] == self._code(snap.user_values, user_id)
+            matched, totals = matched[keep], totals[keep]
+        # Best score first, ties broken by insertion order
+        best = np.lexsort((matched, -totals))[:limit]
+        return [(snap.ids.get(int(matched[i])), float(totals[i])) for i in best]
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, term frequencies) of the visible rows containing term"""
+        snap = self._snap
+        index = snap.vocab.find(term)
+        if index is None:
+            return snap.posting_rows[:0], snap.posting_tf[:0]
+        start, end = int(snap.term_offsets[index]), int(snap.term_offsets[index + 1])
+        rows, tf = snap.posting_rows[start:end], snap.posting_tf[start:end]
+        if self._hidden is not None:
+            shown = ~self._hidden[rows]
+            rows, tf = rows[shown], tf[shown]
+        return rows, tf
+
+    def match(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[str]:
+        postings = [rows for rows, _ in self._postings(terms)]
+        if not postings or limit <= 0:
+            return []
+        matched = np.unique(np.concatenate(postings))
+        if user_id:
+            matched = matched[self._snap.user[matched] == self._code(self._snap.user_values, user_id)]
+        return [self._snap.ids.get(int(row)) for row in matched[:limit]]
+
+    def ids(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        mask = self._mask(user_id, session_id, category, tags)
+        rows = range(self._snap.rows) if mask is None else np.flatnonzero(mask)
+        return [self._snap.ids.get(int(row)) for row in rows[:limit]]
+
+    def time_range(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        user_id: Optional[str] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        snap = self._snap
+        lo = 0 if start_ns is None else int(np.searchsorted(snap.time_sorted, start_ns, "left"))
+        hi = snap.rows if end_ns is None else int(np.searchsorted(snap.time_sorted, end_ns, "left"))
+        rows = self._shown(snap.time_order[lo:hi])
+        if user_id:
+            rows = rows[snap.user[rows] == self._code(snap.user_values, user_id)]
+        if newest_first:
+            rows = rows[::-1]
+        return [snap.ids.get(int(row)) for row in rows]
+
+    def iter_newest(
+        self,
+        start_ns: Optional[int] = None,
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> Iterator[str]:
+        snap = self._snap
+        stop = 0 if start_ns is None else int(np.searchsorted(snap.time_sorted, start_ns, "left"))
+        position = snap.rows if before is None else self._position(*before)
+        mask = self._mask(user_id, session_id, category, tags)
+
+        while position > stop:
+            low = max(stop, position - _CHUNK)
+            rows = snap.time_order[low:position][::-1]
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if skip >= len(rows):
+                skip -= len(rows)
+            else:
+                for row in rows[skip:]:
+                    yield snap.ids.get(int(row))
+                skip = 0
+            position = low
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        snap = self._snap
+        for row in self._shown(np.flatnonzero(snap.flags & _FLAG_TTL)):
+            yield snap.ids.get(int(row)), int(snap.timestamp[row]) + int(snap.ttl[row]) * 1_000_000_000
+
+    def user_count(self) -> int:
+        if self._hidden is None:
+            return len(self._snap.user_values)
+        return len(self.user_ids())
+
+    def user_ids(self) -> List[str]:
+        """Distinct user IDs of the visible rows"""
+        snap = self._snap
+        codes = np.unique(snap.user if self._hidden is None else snap.user[~self._hidden])
+        return [_value(snap.user_values, code) for code in codes if code]
+
+    def category_counts(self) -> Dict[Optional[str], int]:
+        category = self._snap.category if self._hidden is None else self._snap.category[~self._hidden]
+        counts = np.bincount(category, minlength=len(self._snap.category_values) + 1)
+        return {
+            _value(self._snap.category_values, code): int(count)
+            for code, count in enumerate(counts) if count
+        }
+
+    def storage_bytes(self) -> int:
+        return os.path.getsize(self._snap.path)
+
+    def embeddings(self, batch_size: int = 10000) -> Iterator[Tuple[List[str], np.ndarray]]:
+        snap = self._snap
+        rows = self._shown(np.flatnonzero(snap.flags & _FLAG_VECTOR))
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            yield [snap.ids.get(int(row)) for row in batch], snap.vectors[batch]
+
+    def shared_vectors(self):
+        snap = self._snap
+        if not snap.dimension:
+            return None
+        alive = (snap.flags & _FLAG_VECTOR).astype(bool)
+        if self._hidden is not None:
+            alive &= ~self._hidden
+        return snap.vectors, _IdSequence(snap), _RowLookup(snap, alive), alive
+
+    def close(self) -> None:
+        self._snap.close()
+
+    @property
+    def total_len(self) -> int:
+        """Tokens in the visible rows, for BM25 length normalization"""
+        return self._snap.total_len - self._hidden_len
+
+    def _row(self, memory_id: str) -> int:
+        row = self._visible_row(memory_id)
+        if row is None:
+            raise KeyError(memory_id)
+        return row
+
+    def _visible_row(self, memory_id: str) -> Optional[int]:
+        row = self._snap.row_of(memory_id)
+        if row is None or (self._hidden is not None and self._hidden[row]):
+            return None
+        return row
+
+    def _shown(self, rows: np.ndarray) -> np.ndarray:
+        """rows without the hidden ones"""
+        return rows if self._hidden is None else rows[~self._hidden[rows]]
+
+    def _position(self, timestamp_ns: int, memory_id: str) -> int:
+        """Index in time order of the first key >= (timestamp_ns, memory_id)"""
+        snap = self._snap
+        lo = int(np.searchsorted(snap.time_sorted, timestamp_ns, "left"))
+        hi = int(np.searchsorted(snap.time_sorted, timestamp_ns, "right"))
+        key = memory_id.encode("utf-8")
+        while lo < hi and snap.ids.raw(int(snap.time_order[lo])) < key:
+            lo += 1
+        return lo
+
+    def _postings(self, terms: List[str]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(rows, term frequencies) of each distinct query term found in a visible row"""
+        for term in dict.fromkeys(terms):
+            rows, tf = self.postings(term)
+            if len(rows):
+                yield rows, tf
+
+    @staticmethod
+    def _code(values: "_Strings", value: Optional[str]) -> int:
+        """Interned code of value (0 for None, -1 if absent)"""
+        if value is None:
+            return 0
+        index = values.find(value)
+        return -1 if index is None else index + 1
+
+    def _mask(self, user_id: Any, session_id: Any, category: Any, tags: Any) -> Optional[np.ndarray]:
+        """Boolean row mask for the StorageBackend filter rules, or None when unfiltered"""
+        snap = self._snap
+        mask = None
+
+        def narrow(condition: np.ndarray) -> None:
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if user_id is not _UNSET and user_id is not None:
+            narrow(snap.user == self._code(snap.user_values, user_id))
+        if session_id is not _UNSET:
+            narrow(snap.session == self._code(snap.session_values, session_id))
+        if category is not _UNSET and category is not None:
+            narrow(snap.category == self._code(snap.category_values, category))
+        if tags is not _UNSET:
+            tags = tags if isinstance(tags, list) else [tags]
+            codes = [snap.tag_values.find(tag) for tag in tags]
+            hits = np.flatnonzero(np.isin(snap.tag_codes, [c for c in codes if c is not None]))
+            tagged = np.zeros(snap.rows, dtype=bool)
+            tagged[np.searchsorted(snap.tag_offsets, hits, "right") - 1] = True
+            narrow(tagged)
+        if self._hidden is not None:
+            narrow(~self._hidden)
+        return mask
+
+
+class _Strings:
+    """Strings stored as an offset table plus a UTF-8 blob"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    def raw(self, index: int) -> bytes:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+    def get(self, index: int) -> str:
+        return self.raw(index).decode("utf-8")
+
+    def find(self, value: str) -> Optional[int]:
+        """Index of value in a sorted table, or None"""
+        key = value.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.raw(lo) == key:
+            return lo
+        return None
+
+
+class _StringsBuilder:
+    def __init__(self):
+        self._offsets = array("Q", [0])
+        self._blob = bytearray()
+
+    def add(self, value: str) -> None:
+        self._blob += value.encode("utf-8")
+        self._offsets.append(len(self._blob))
+
+    def raw(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def sections(self, name: str) -> Dict[str, np.ndarray]:
+        return {
+            name + "_offsets": np.frombuffer(self._offsets, dtype="<u8"),
+            name + "_blob": np.frombuffer(bytes(self._blob), dtype=np.uint8),
+        }
+
+
+class _IdSequence:
+    """Row -> memory ID, decoded on access"""
+
+    def __init__(self, snap: Snapshot):
+        self._snap = snap
+
+    def __len__(self) -> int:
+        return self._snap.rows
+
+    def __getitem__(self, row: int) -> str:
+        return self._snap.ids.get(row)
+
+
+class _RowLookup:
+    """Memory ID -> row for rows that have an embedding"""
+
+    def __init__(self, snap: Snapshot, alive: np.ndarray):
+        self._snap = snap
+        self._alive = alive
+        self._count = int(alive.sum())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, memory_id: str) -> bool:
+        return self.get(memory_id) is not None
+
+    def __getitem__(self, memory_id: str) -> int:
+        row = self.get(memory_id)
+        if row is None:
+            raise KeyError(memory_id)
+        return row
+
+    def get(self, memory_id: str, default: Optional[int] = None) -> Optional[int]:
+        row = self._snap.row_of(memory_id)
+        if row is None or not self._alive[row]:
+            return default
+        return row
+
+
+def _code(codes: Dict[Any, int], value: Any) -> int:
+    """Provisional interned code (0 for None)"""
+    if value is None:
+        return 0
+    return codes.setdefault(value, len(codes) + 1)
+
+
+def _sorted_table(codes: Dict[str, int], reserved: int) -> Tuple[_StringsBuilder, np.ndarray]:
+    """Sorted value table and the provisional-code -> final-code mapping"""
+    values = sorted(codes, key=lambda value: value.encode("utf-8"))
+    remap = np.zeros(len(codes) + reserved, dtype=np.int64)
+    table = _StringsBuilder()
+    for index, value in enumerate(values):
+        table.add(value)
+        remap[codes[value]] = index + reserved
+    return table, remap
+
+
+def _value(values: _Strings, code: int) -> Optional[str]:
+    return None if code == 0 else values.get(int(code) - 1)
+
+
+def _pad(f) -> int:
+    """Pad the file to the next section boundary, returning the new offset"""
+    offset = f.tell()
+    padding = -offset % _ALIGN
+    f.write(b"\0" * padding)
+    return offset + padding
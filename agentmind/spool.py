@@ -0,0 +1,256 @@
+"""
+Durable write-behind queue for hosted-mode writes
+"""
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .client import (
+    TRANSIENT_ERRORS, APIClient, AuthenticationError, PaymentRequiredError, SpoolFullError
+)
+
+# Errors no retry gets past until the key or plan changes; the flusher
+# stops and keeps the batch instead of dropping it
+_HALTING = (AuthenticationError, PaymentRequiredError)
+
+
+class WriteSpool:
+    """
+    Queue of stores and deletes waiting to reach the hosted service.
+
+    put_store() and put_delete() append to a SQLite file and return at once
+    (a WAL append, well under a millisecond), and a background thread drains
+    the queue in order, sending consecutive operations of the same kind as
+    one store_memories or delete_memories request. Operations are applied
+    strictly in the order they were queued, so the last write to a memory
+    ID always wins.
+
+    Operations survive a crash or restart when path is given: opening the
+    spool again resumes sending whatever was left. Without a path the spool
+    lives in a temporary file and is lost with the process.
+
+    At most max_pending operations wait at a time; beyond that, writers
+    block until the flusher catches up (or raise SpoolFullError after
+    put_timeout seconds), so an unreachable service cannot grow the queue
+    without bound. While the service is unreachable the flusher backs off
+    from retry_interval up to max_retry_interval seconds between attempts.
+    Batches the service rejects outright (e.g. invalid data) are dropped
+    and counted in dropped.
+
+    An invalid API key or a lapsed plan stops the flusher instead: the
+    operations stay in the file, and flush() and further writes raise the
+    error, until the spool is opened again with a working client.
+
+    pending() reports the newest queued operation for a memory ID, so
+    readers can see their own writes before they have been sent.
+
+    Args:
+        client: Client that sends the batches
+        path: Spool file (defaults to a temporary file)
+        max_pending: Queued operations before writers block
+        batch_size: Operations per request
+        put_timeout: Seconds a writer waits for room (None waits indefinitely)
+        retry_interval: First delay after a failed batch, in seconds
+        max_retry_interval: Longest delay between attempts, in seconds
+    """
+
+    def __init__(
+        self,
+        client: APIClient,
+        path: Optional[str] = None,
+        max_pending: int = 10000,
+        batch_size: int = 100,
+        put_timeout: Optional[float] = None,
+        retry_interval: float = 0.5,
+        max_retry_interval: float = 30.0
+    ):
+        self.client = client
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.sent = 0
+        self.dropped = 0
+        self.last_error: Optional[Exception] = None
+        # Error that stopped the flusher, raised to writers and flush()
+        self.halted: Optional[Exception] = None
+
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="agentmind-", suffix=".spool")
+            os.close(fd)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, memory_id TEXT NOT NULL, payload TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('id', ?)", (uuid.uuid4().hex,))
+        # Names this spool file in idempotency keys
+        self.id = self._conn.execute("SELECT value FROM meta WHERE key = 'id'").fetchone()[0]
+
+        # Newest queued (seq, op, payload) per memory ID, for read-your-writes
+        self._pending: Dict[str, Tuple[int, str, Optional[Dict[str, Any]]]] = {}
+        self._count = 0
+        rows = self._conn.execute("SELECT seq, op, memory_id, payload FROM spool ORDER BY seq")
+        for seq, op, memory_id, payload in rows:
+            self._pending[memory_id] = (seq, op, json.loads(payload) if payload else None)
+            self._count += 1
+
+        self._cond = threading.Condition()
+        self._closing = False
+        # Whether the last batch failed and is waiting to be retried
+        self._failing = False
+        self._thread = threading.Thread(target=self._run, name="agentmind-spool", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._count
+
+    def put_store(self, memory_id: str, payload: Dict[str, Any]) -> None:
+        """Queue a store of payload under memory_id"""
+        self._put("store", memory_id, payload)
+
+    def put_delete(self, memory_id: str, content: Optional[Any] = None) -> None:
+        """Queue a delete of memory_id; content, if known, lets readers hide the old memory meanwhile"""
+        self._put("delete", memory_id, None if content is None else {"content": content})
+
+    def pending(self, memory_id: str) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+        """(op, payload) of the newest queued write to memory_id, or None if nothing is queued"""
+        with self._cond:
+            entry = self._pending.get(memory_id)
+        return None if entry is None else entry[1:]
+
+    def queued(self) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """(op, payload) of the newest queued write to each memory ID, oldest first"""
+        with self._cond:
+            entries = sorted(self._pending.values(), key=lambda entry: entry[0])
+        return [(op, payload) for _, op, payload in entries]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued operation has been sent, returns False on
+        timeout. Raises the error that stopped the flusher, if one did.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._count and self.halted is None and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self.halted is not None:
+                raise self.halted
+            return not self._count
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stop the flusher, first draining the queue for up to timeout seconds
+        unless the service is currently failing. Unsent operations stay in
+        the file.
+        """
+        if not self._failing and self.halted is None:
+            self.flush(timeout)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._conn.close()
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def _put(self, op: str, memory_id: str, payload: Optional[Dict[str, Any]]) -> None:
+        deadline = None if self.put_timeout is None else time.monotonic() + self.put_timeout
+        with self._cond:
+            while True:
+                if self.halted is not None:
+                    # Nothing queued now would be sent
+                    raise self.halted
+                if self._count < self.max_pending:
+                    break
+                # Backpressure: wait for the flusher to make room
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise SpoolFullError(f"Write spool full ({self.max_pending} operations waiting)")
+                self._cond.wait(remaining)
+            seq = self._conn.execute(
+                "INSERT INTO spool (op, memory_id, payload) VALUES (?, ?, ?)",
+                (op, memory_id, json.dumps(payload) if payload is not None else None)
+            ).lastrowid
+            self._pending[memory_id] = (seq, op, payload)
+            self._count += 1
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        """Flusher thread: send the oldest run of same-kind operations until closed"""
+        delay = self.retry_interval
+        while True:
+            with self._cond:
+                while not self._count and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return
+                rows = self._conn.execute(
+                    "SELECT seq, op, memory_id, payload FROM spool ORDER BY seq LIMIT ?", (self.batch_size,)
+                ).fetchall()
+            # Only a run of one kind goes out together, keeping the order
+            kind = rows[0][1]
+            run = list(itertools.takewhile(lambda row: row[1] == kind, rows))
+            try:
+                self._send(run)
+            except _HALTING as e:
+                with self._cond:
+                    self.last_error = self.halted = e
+                    self._cond.notify_all()
+                return
+            except TRANSIENT_ERRORS as e:
+                self.last_error = e
+                self._failing = True
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closing, timeout=delay)
+                delay = min(delay * 2, self.max_retry_interval)
+                continue
+            except Exception as e:
+                self.last_error = e
+                self.dropped += len(run)
+            else:
+                self.sent += len(run)
+            delay = self.retry_interval
+            self._failing = False
+            self._done(run)
+
+    def _send(self, run: List[Tuple[int, str, str, Optional[str]]]) -> None:
+        if run[0][1] == "store":
+            # Keyed by position in this spool, so a resend after a crash is deduplicated
+            self.client.store_memories(
+                [json.loads(payload) for _, _, _, payload in run],
+                idempotency_key=f"spool-{self.id}-{run[0][0]}-{run[-1][0]}"
+            )
+        else:
+            self.client.delete_memories([memory_id for _, _, memory_id, _ in run])
+
+    def _done(self, run: List[Tuple[int, str, str, Optional[str]]]) -> None:
+        """Remove sent operations from the file and the pending index"""
+        with self._cond:
+            self._conn.execute("DELETE FROM spool WHERE seq <= ?", (run[-1][0],))
+            for seq, _, memory_id, _ in run:
+                entry = self._pending.get(memory_id)
+                # A newer write to the same ID stays pending
+                if entry is not None and entry[0] == seq:
+                    del self._pending[memory_id]
+            self._count -= len(run)
+            self._cond.notify_all()
@@ -0,0 +1,501 @@
+"""
+Persistent SQLite storage backend
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .index import from_epoch_ns, to_epoch_ns
+from .storage import StorageBackend, _UNSET
+from .store import Record
+from .types import MemoryEntry, MemoryMetadata
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    is_json INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT,
+    category TEXT,
+    timestamp INTEGER NOT NULL,
+    importance REAL,
+    confidence REAL,
+    source TEXT,
+    tags TEXT,
+    custom TEXT,
+    ttl INTEGER
+);
+CREATE INDEX IF NOT EXISTS memories_time ON memories (timestamp, id);
+CREATE INDEX IF NOT EXISTS memories_user ON memories (user_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS memories_session ON memories (session_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS memories_category ON memories (category, timestamp, id);
+CREATE INDEX IF NOT EXISTS memories_ttl ON memories (id, timestamp, ttl) WHERE ttl IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS memory_tags (
+    tag TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (tag, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS memory_tags_seq ON memory_tags (seq);
+
+CREATE TABLE IF NOT EXISTS memory_vectors (
+    seq INTEGER PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='seq'
+);
+
+CREATE TRIGGER IF NOT EXISTS memories_insert AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts (rowid, content) VALUES (new.seq, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_update AFTER UPDATE OF content ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.seq, old.content);
+    INSERT INTO memories_fts (rowid, content) VALUES (new.seq, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_delete AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.seq, old.content);
+    DELETE FROM memory_tags WHERE seq = old.seq;
+    DELETE FROM memory_vectors WHERE seq = old.seq;
+END;
+"""
+
+_UPSERT = """
+INSERT INTO memories (
+    id, content, is_json, user_id, session_id, category, timestamp,
+    importance, confidence, source, tags, custom, ttl
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    content = excluded.content,
+    is_json = excluded.is_json,
+    user_id = excluded.user_id,
+    session_id = excluded.session_id,
+    category = excluded.category,
+    timestamp = excluded.timestamp,
+    importance = excluded.importance,
+    confidence = excluded.confidence,
+    source = excluded.source,
+    tags = excluded.tags,
+    custom = excluded.custom,
+    ttl = excluded.ttl
+"""
+
+_SELECT_ROW = """
+SELECT content, is_json, user_id, session_id, category, timestamp,
+       importance, confidence, source, tags, custom, ttl
+FROM memories WHERE id = ?
+"""
+
+# Rows fetched per round trip by lazy scans
+_CHUNK = 500
+
+# Maximum bound parameters per statement on older SQLite builds
+_MAX_PARAMS = 900
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Storage backend persisting memories in a SQLite database file.
+
+    The database runs in WAL mode so readers never block on the writer.
+    Each put_many()/remove_many() call is a single transaction, field
+    filters and time scans are served by composite (field, timestamp, id)
+    indexes, and keyword search uses an FTS5 index ranked with bm25().
+    Decoded rows are kept in a bounded LRU cache. Embeddings are stored
+    alongside the rows so Memory can reload its vector index on startup.
+
+    Non-string content is stored as JSON, so it comes back as the equivalent
+    JSON value (tuples become lists, for example).
+
+    Args:
+        path: Database file (":memory:" for a throwaway database)
+        cache_size: Decoded rows kept in memory
+    """
+
+    def __init__(self, path: str, cache_size: int = 10000):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._count = self._conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, memory_id: str) -> bool:
+        if memory_id in self._cache:
+            return True
+        return bool(self._query("SELECT 1 FROM memories WHERE id = ?", (memory_id,)))
+
+    def __iter__(self) -> Iterator[str]:
+        last = 0
+        while True:
+            rows = self._query(
+                "SELECT seq, id FROM memories WHERE seq > ? ORDER BY seq LIMIT ?",
+                (last, _CHUNK)
+            )
+            for _, memory_id in rows:
+                yield memory_id
+            if len(rows) < _CHUNK:
+                return
+            last = rows[-1][0]
+
+    def put_many(
+        self,
+        items: Sequence[Tuple[MemoryEntry, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ) -> None:
+        if not items:
+            return
+        rows, tags = [], []
+        for entry, content in items:
+            meta = entry.metadata
+            rows.append((
+                entry.id,
+                entry.content,
+                not isinstance(content, str),
+                entry.user_id,
+                entry.session_id,
+                meta.category,
+                to_epoch_ns(entry.timestamp),
+                meta.importance,
+                meta.confidence,
+                meta.source,
+                json.dumps(meta.tags) if meta.tags else None,
+                json.dumps(meta.custom) if meta.custom else None,
+                entry.ttl
+            ))
+            tags.extend((tag, entry.id) for tag in dict.fromkeys(meta.tags))
+        memory_ids = [row[0] for row in rows]
+
+        with self._lock, self._conn:
+            existing = self._existing(memory_ids)
+            self._conn.executemany(_UPSERT, rows)
+            if existing:
+                self._conn.executemany(
+                    "DELETE FROM memory_tags WHERE seq = (SELECT seq FROM memories WHERE id = ?)",
+                    [(memory_id,) for memory_id in existing]
+                )
+                if embeddings is None:
+                    # The upsert keeps seq, so the old vector would be reloaded
+                    self._conn.executemany(
+                        "DELETE FROM memory_vectors WHERE seq = (SELECT seq FROM memories WHERE id = ?)",
+                        [(memory_id,) for memory_id in existing]
+                    )
+            self._conn.executemany(
+                "INSERT INTO memory_tags (tag, seq) SELECT ?, seq FROM memories WHERE id = ?",
+                tags
+            )
+            if embeddings is not None:
+                vectors = np.asarray(embeddings, dtype=np.float32)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO memory_vectors (seq, vector) "
+                    "SELECT seq, ? FROM memories WHERE id = ?",
+                    [(vector.tobytes(), memory_id) for memory_id, vector in zip(memory_ids, vectors)]
+                )
+            self._count += len(memory_ids) - len(existing)
+            for memory_id in memory_ids:
+                self._cache.pop(memory_id, None)
+
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        if not memory_ids:
+            return 0
+        with self._lock, self._conn:
+            removed = 0
+            for chunk in _chunks(list(memory_ids)):
+                cursor = self._conn.execute(
+                    f"DELETE FROM memories WHERE id IN ({_marks(chunk)})", chunk
+                )
+                removed += cursor.rowcount
+            self._count -= removed
+            for memory_id in memory_ids:
+                self._cache.pop(memory_id, None)
+        return removed
+
+    def content(self, memory_id: str) -> Any:
+        return self._row(memory_id)[0]
+
+    def text(self, memory_id: str) -> str:
+        return self._row(memory_id)[1]
+
+    def timestamp_ns(self, memory_id: str) -> int:
+        return self._row(memory_id)[6]
+
+    def user_id(self, memory_id: str) -> str:
+        return self._row(memory_id)[3]
+
+    def session_id(self, memory_id: str) -> Optional[str]:
+        return self._row(memory_id)[4]
+
+    def confidence(self, memory_id: str) -> Optional[float]:
+        return self._row(memory_id)[8]
+
+    def set_confidence(self, memory_id: str, confidence: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE memories SET confidence = ? WHERE id = ?", (confidence, memory_id))
+            self._cache.pop(memory_id, None)
+
+    def record(self, memory_id: str) -> Record:
+        row = self._row(memory_id)
+        return Record(row[0], row[6], row[3], row[4], row[5], row[7], row[8], row[9], row[10], row[11], row[12])
+
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        row = self._row(memory_id)
+        return MemoryMetadata.model_construct(
+            importance=row[7],
+            confidence=row[8],
+            category=row[5],
+            source=row[9],
+            tags=list(row[10]),
+            custom=dict(row[11])
+        )
+
+    def entry(self, memory_id: str) -> MemoryEntry:
+        row = self._row(memory_id)
+        return MemoryEntry.model_construct(
+            id=memory_id,
+            content=row[1],
+            embedding=None,
+            metadata=self.metadata(memory_id),
+            user_id=row[3],
+            session_id=row[4],
+            timestamp=from_epoch_ns(row[6]),
+            ttl=row[12],
+            relations=[]
+        )
+
+    def search(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        if not terms or limit <= 0:
+            return []
+        sql = (
+            "SELECT m.id, -bm25(memories_fts) FROM memories_fts "
+            "JOIN memories m ON m.seq = memories_fts.rowid WHERE memories_fts MATCH ?"
+        )
+        params: List[Any] = [_fts_query(terms)]
+        if user_id:
+            sql += " AND m.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY bm25(memories_fts) LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    def match(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[str]:
+        if not terms or limit <= 0:
+            return []
+        sql = (
+            "SELECT m.id FROM memories_fts "
+            "JOIN memories m ON m.seq = memories_fts.rowid WHERE memories_fts MATCH ?"
+        )
+        params: List[Any] = [_fts_query(terms)]
+        if user_id:
+            sql += " AND m.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY m.seq LIMIT ?"
+        params.append(limit)
+        return [row[0] for row in self._query(sql, params)]
+
+    def ids(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        clauses, params = _filters(user_id, session_id, category, tags)
+        sql = "SELECT id FROM memories" + _where(clauses) + " ORDER BY seq LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [row[0] for row in self._query(sql, params)]
+
+    def time_range(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        user_id: Optional[str] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        clauses, params = _filters(user_id=user_id)
+        if start_ns is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start_ns)
+        if end_ns is not None:
+            clauses.append("timestamp < ?")
+            params.append(end_ns)
+        direction = "DESC" if newest_first else "ASC"
+        sql = (
+            "SELECT id FROM memories" + _where(clauses)
+            + f" ORDER BY timestamp {direction}, id {direction}"
+        )
+        return [row[0] for row in self._query(sql, params)]
+
+    def iter_newest(
+        self,
+        start_ns: Optional[int] = None,
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> Iterator[str]:
+        base_clauses, base_params = _filters(user_id, session_id, category, tags)
+        if start_ns is not None:
+            base_clauses.append("timestamp >= ?")
+            base_params.append(start_ns)
+
+        # Keyset pagination: each chunk resumes strictly before the last key
+        while True:
+            clauses, params = list(base_clauses), list(base_params)
+            if before is not None:
+                clauses.append("(timestamp, id) < (?, ?)")
+                params.extend(before)
+            sql = (
+                "SELECT timestamp, id FROM memories" + _where(clauses)
+                + " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+            )
+            rows = self._query(sql, params + [_CHUNK, skip])
+            for _, memory_id in rows:
+                yield memory_id
+            if len(rows) < _CHUNK:
+                return
+            before = rows[-1]
+            skip = 0
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        # Covered by the partial memories_ttl index, so memories without a ttl are not read
+        rows = self._query("SELECT id, timestamp + ttl * 1000000000 FROM memories WHERE ttl IS NOT NULL")
+        return iter(rows)
+
+    def user_count(self) -> int:
+        return self._query("SELECT COUNT(DISTINCT user_id) FROM memories")[0][0]
+
+    def category_counts(self) -> Dict[Optional[str], int]:
+        return dict(self._query("SELECT category, COUNT(*) FROM memories GROUP BY category"))
+
+    def storage_bytes(self) -> int:
+        page_count = self._query("PRAGMA page_count")[0][0]
+        page_size = self._query("PRAGMA page_size")[0][0]
+        return page_count * page_size
+
+    def embeddings(self, batch_size: int = 10000) -> Iterator[Tuple[List[str], np.ndarray]]:
+        last = 0
+        while True:
+            rows = self._query(
+                "SELECT v.seq, m.id, v.vector FROM memory_vectors v "
+                "JOIN memories m ON m.seq = v.seq WHERE v.seq > ? ORDER BY v.seq LIMIT ?",
+                (last, batch_size)
+            )
+            if not rows:
+                return
+            vectors = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            yield [row[1] for row in rows], vectors
+            last = rows[-1][0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+            self._cache.clear()
+
+    def _row(self, memory_id: str) -> tuple:
+        """Decoded row for an ID, through the LRU cache"""
+        with self._lock:
+            row = self._cache.get(memory_id)
+            if row is not None:
+                self._cache.move_to_end(memory_id)
+                return row
+
+        found = self._query(_SELECT_ROW, (memory_id,))
+        if not found:
+            raise KeyError(memory_id)
+        text, is_json, user_id, session_id, category, ts, importance, confidence, source, tags, custom, ttl = found[0]
+        row = (
+            json.loads(text) if is_json else text,
+            text,
+            is_json,
+            user_id,
+            session_id,
+            category,
+            ts,
+            importance,
+            confidence,
+            source,
+            tuple(json.loads(tags)) if tags else (),
+            json.loads(custom) if custom else {},
+            ttl
+        )
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[memory_id] = row
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return row
+
+    def _existing(self, memory_ids: List[str]) -> List[str]:
+        existing = []
+        for chunk in _chunks(memory_ids):
+            existing.extend(
+                row[0] for row in self._conn.execute(
+                    f"SELECT id FROM memories WHERE id IN ({_marks(chunk)})", chunk
+                )
+            )
+        return existing
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+def _filters(
+    user_id: Any = _UNSET,
+    session_id: Any = _UNSET,
+    category: Any = _UNSET,
+    tags: Any = _UNSET
+) -> Tuple[List[str], List[Any]]:
+    """SQL conditions for the StorageBackend filter rules"""
+    clauses, params = [], []
+    if user_id is not _UNSET and user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(user_id)
+    if session_id is not _UNSET:
+        clauses.append("session_id IS ?")
+        params.append(session_id)
+    if category is not _UNSET and category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if tags is not _UNSET:
+        tags = tags if isinstance(tags, list) else [tags]
+        clauses.append(f"seq IN (SELECT seq FROM memory_tags WHERE tag IN ({_marks(tags)}))")
+        params.extend(tags)
+    return clauses, params
+
+
+def _where(clauses: List[str]) -> str:
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+def _marks(values: Sequence[Any]) -> str:
+    return ", ".join("?" * len(values))
+
+
+def _chunks(values: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(values), _MAX_PARAMS):
+        yield values[start:start + _MAX_PARAMS]
+
+
+def _fts_query(terms: List[str]) -> str:
+    """FTS5 query matching any of the terms, each quoted as a literal"""
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
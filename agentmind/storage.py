@@ -0,0 +1,456 @@
+"""
+Storage backends holding memory records and answering queries over them
+"""
+import itertools
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .index import FieldIndex, TermIndex, TimeIndex, intersect
+from .store import Record, RecordStore
+from .types import MemoryEntry, MemoryMetadata
+
+
+# Marks a filter argument that was not given
+_UNSET = object()
+
+
+class StorageBackend(ABC):
+    """
+    Where Memory keeps its records.
+
+    A backend stores one record per memory ID and answers the lookups Memory
+    needs: field access by ID, keyword search, field filters and time-ordered
+    scans. Filters follow the same rules everywhere: a filter left unset is
+    not applied, None for user_id or category is not applied either, and a
+    tags filter matches memories having any of the tags. Unless stated
+    otherwise, IDs are returned in insertion order; replacing a memory keeps
+    its position.
+    """
+
+    # Backends that reject writes set this so Memory never tries to purge them
+    read_only = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __contains__(self, memory_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[str]:
+        """Every stored ID"""
+
+    @abstractmethod
+    def put_many(
+        self,
+        items: Sequence[Tuple[MemoryEntry, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Store (entry, original content) pairs, replacing existing IDs.
+
+        Args:
+            items: Entries with unique IDs
+            embeddings: Optional vectors, one row per item, kept for reloading
+        """
+
+    @abstractmethod
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        """Delete memories, returning how many existed"""
+
+    def remove(self, memory_id: str) -> bool:
+        return self.remove_many([memory_id]) == 1
+
+    @abstractmethod
+    def content(self, memory_id: str) -> Any:
+        """The content as passed to remember()"""
+
+    @abstractmethod
+    def text(self, memory_id: str) -> str:
+        """The content as a string (JSON for non-string content)"""
+
+    @abstractmethod
+    def timestamp_ns(self, memory_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def user_id(self, memory_id: str) -> str:
+        ...
+
+    @abstractmethod
+    def session_id(self, memory_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def confidence(self, memory_id: str) -> Optional[float]:
+        ...
+
+    @abstractmethod
+    def set_confidence(self, memory_id: str, confidence: float) -> None:
+        ...
+
+    @abstractmethod
+    def record(self, memory_id: str) -> Record:
+        """All stored fields of the memory"""
+
+    @abstractmethod
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        ...
+
+    @abstractmethod
+    def entry(self, memory_id: str) -> MemoryEntry:
+        """The memory as a MemoryEntry model"""
+
+    @abstractmethod
+    def search(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Best keyword matches as (id, score), highest score first"""
+
+    def search_many(
+        self,
+        queries: List[List[str]],
+        limit: int,
+        user_id: Optional[str] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """search() for several term lists, one result list per query"""
+        return [self.search(terms, limit, user_id) for terms in queries]
+
+    @abstractmethod
+    def match(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[str]:
+        """IDs containing any of the terms, in insertion order"""
+
+    @abstractmethod
+    def ids(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """IDs matching every given field filter"""
+
+    @abstractmethod
+    def time_range(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        user_id: Optional[str] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        """IDs with start_ns <= timestamp < end_ns, ordered by (timestamp, id)"""
+
+    @abstractmethod
+    def iter_newest(
+        self,
+        start_ns: Optional[int] = None,
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> Iterator[str]:
+        """
+        Lazily yield matching IDs from newest to oldest (timestamp, id).
+
+        Args:
+            start_ns: Stop at memories older than this timestamp
+            before: Only yield memories strictly older than this (timestamp_ns, id) key
+            skip: Number of matches to skip
+        """
+
+    @abstractmethod
+    def user_count(self) -> int:
+        """Number of distinct user IDs"""
+
+    @abstractmethod
+    def category_counts(self) -> Dict[Optional[str], int]:
+        """Number of memories per category"""
+
+    @abstractmethod
+    def storage_bytes(self) -> int:
+        """Approximate size of the stored data"""
+
+    def attach_vectors(self, vectors) -> None:
+        """Called by Memory with its EmbeddingStore, for backends that persist embeddings"""
+
+    def embeddings(self, batch_size: int = 10000) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Batches of (ids, vectors) saved by put_many, for reloading"""
+        return iter(())
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        """(memory_id, expiry time in epoch ns) of every memory with a ttl"""
+        for memory_id in self:
+            record = self.record(memory_id)
+            if record.ttl is not None:
+                yield memory_id, record.timestamp_ns + record.ttl * 1_000_000_000
+
+    def shared_vectors(self):
+        """
+        Embeddings Memory can search in place instead of copying.
+
+        Returns None, or (matrix, ids, rows, alive): a float32 matrix of unit
+        vectors, the memory ID of each row, an ID -> row mapping and a mask
+        of the rows that hold an embedding.
+        """
+        return None
+
+    def close(self) -> None:
+        """Release files and connections"""
+
+
+class InMemoryStorage(StorageBackend):
+    """
+    Process-local storage: a RecordStore plus in-memory indexes.
+
+    Nothing survives the process. Keyword search uses BM25 over an inverted
+    index, field filters use hash indexes and time queries use a sorted
+    time index, so no query scans every record.
+    """
+
+    def __init__(self):
+        self._records = RecordStore()
+
+        # Inverted index over memory content, kept in sync with _records
+        self._term_index = TermIndex()
+
+        # Secondary indexes: field value -> memory IDs
+        self._by_user = FieldIndex()
+        self._by_session = FieldIndex()
+        self._by_category = FieldIndex()
+        self._by_tag = FieldIndex()
+
+        # Memory IDs ordered by timestamp
+        self._time_index = TimeIndex()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def put_many(
+        self,
+        items: Sequence[Tuple[MemoryEntry, Any]],
+        embeddings: Optional[np.ndarray] = None
+    ) -> None:
+        for entry, content in items:
+            self._put_record(entry.id, Record.from_entry(entry, content), entry.content)
+
+    def remove_many(self, memory_ids: Sequence[str]) -> int:
+        removed = 0
+        for memory_id in memory_ids:
+            if memory_id not in self._records:
+                continue
+            self._unindex_fields(memory_id)
+            self._records.remove(memory_id)
+            self._term_index.remove(memory_id)
+            removed += 1
+        return removed
+
+    def content(self, memory_id: str) -> Any:
+        return self._records.content(memory_id)
+
+    def text(self, memory_id: str) -> str:
+        return self._records.text(memory_id)
+
+    def timestamp_ns(self, memory_id: str) -> int:
+        return self._records.timestamp_ns(memory_id)
+
+    def user_id(self, memory_id: str) -> str:
+        return self._records.user_id(memory_id)
+
+    def session_id(self, memory_id: str) -> Optional[str]:
+        return self._records.session_id(memory_id)
+
+    def confidence(self, memory_id: str) -> Optional[float]:
+        return self._records.confidence(memory_id)
+
+    def set_confidence(self, memory_id: str, confidence: float) -> None:
+        self._records.set_confidence(memory_id, confidence)
+
+    def record(self, memory_id: str) -> Record:
+        return self._records.record(memory_id)
+
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        return self._records.metadata(memory_id)
+
+    def entry(self, memory_id: str) -> MemoryEntry:
+        return self._records.entry(memory_id)
+
+    def search(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        return self._term_index.top_k(terms, limit, self._user_filter(user_id))
+
+    def search_many(
+        self,
+        queries: List[List[str]],
+        limit: int,
+        user_id: Optional[str] = None
+    ) -> List[List[Tuple[str, float]]]:
+        return self._term_index.top_k_many(queries, limit, self._user_filter(user_id))
+
+    def match(self, terms: List[str], limit: int, user_id: Optional[str] = None) -> List[str]:
+        accept = self._user_filter(user_id)
+        matched = (m for m in self._term_index.lookup(terms) if accept is None or accept(m))
+        return list(itertools.islice(matched, limit))
+
+    def ids(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        id_sets = self._filter_sets(user_id, session_id, category, tags)
+        if not id_sets:
+            return list(itertools.islice(self._records, limit))
+        if len(id_sets) == 1:
+            return list(itertools.islice(id_sets[0], limit))
+        return self._term_index.order(intersect(id_sets))[:limit]
+
+    def time_range(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        user_id: Optional[str] = None,
+        newest_first: bool = False
+    ) -> List[str]:
+        user_ids = self._by_user.get(user_id) if user_id else None
+        if user_ids is not None and len(user_ids) < self._time_index.count_between(start_ns, end_ns):
+            # The user has fewer memories than the time range; filter those instead
+            ids = []
+            for memory_id in user_ids:
+                ts = self._records.timestamp_ns(memory_id)
+                if (start_ns is None or ts >= start_ns) and (end_ns is None or ts < end_ns):
+                    ids.append(memory_id)
+            return self._sort_by_time(ids, newest_first)
+
+        ids = self._time_index.ids_between(start_ns, end_ns, newest_first)
+        if user_ids is not None:
+            ids = [memory_id for memory_id in ids if memory_id in user_ids]
+        return ids
+
+    def iter_newest(
+        self,
+        start_ns: Optional[int] = None,
+        before: Optional[Tuple[int, str]] = None,
+        skip: int = 0,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> Iterator[str]:
+        stop = 0 if start_ns is None else self._time_index.position(start_ns)
+        start = len(self._time_index) if before is None else self._time_index.position(*before)
+        id_sets = self._filter_sets(user_id, session_id, category, tags)
+
+        # Sort a small candidate set, otherwise walk the time index
+        if id_sets and min(map(len, id_sets)) * 4 < max(0, start - stop):
+            ordered = []
+            for memory_id in intersect(id_sets):
+                key = (self._records.timestamp_ns(memory_id), memory_id)
+                if (start_ns is None or key[0] >= start_ns) and (before is None or key < before):
+                    ordered.append(memory_id)
+            ordered = iter(self._sort_by_time(ordered, newest_first=True))
+        elif not id_sets:
+            # Unfiltered pages are a direct slice of the time index
+            return self._time_index.iter_newest(start=max(stop, start - skip), stop=stop)
+        else:
+            ordered = (
+                memory_id for memory_id in self._time_index.iter_newest(start=start, stop=stop)
+                if all(memory_id in ids for ids in id_sets)
+            )
+        return itertools.islice(ordered, skip, None)
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        return self._records.expiring()
+
+    def user_count(self) -> int:
+        return len(self._by_user)
+
+    def category_counts(self) -> Dict[Optional[str], int]:
+        return self._by_category.counts()
+
+    def storage_bytes(self) -> int:
+        try:
+            # Convert entries to JSON-serializable format
+            entries_data = []
+            for memory_id in self._records:
+                entry_dict = self._records.entry(memory_id).model_dump()
+                # Convert datetime to string
+                entry_dict['timestamp'] = entry_dict['timestamp'].isoformat()
+                entries_data.append(entry_dict)
+            return len(json.dumps(entries_data))
+        except (TypeError, ValueError):
+            return sum(len(self._records.text(memory_id)) for memory_id in self._records)
+
+    def _put_record(self, memory_id: str, record: Record, text: str) -> None:
+        """Store and index one record; text is its content as a string"""
+        if memory_id in self._records:
+            self._unindex_fields(memory_id)
+        self._records.put_record(memory_id, record)
+        self._term_index.add(memory_id, text)
+        self._index_fields(memory_id)
+
+    def _user_filter(self, user_id: Optional[str]):
+        if not user_id:
+            return None
+        return self._by_user.get(user_id).__contains__
+
+    def _index_fields(self, memory_id: str) -> None:
+        """Add a stored record to the secondary and time indexes"""
+        records = self._records
+        self._time_index.add(memory_id, records.timestamp_ns(memory_id))
+        self._by_user.add(memory_id, (records.user_id(memory_id),))
+        self._by_session.add(memory_id, (records.session_id(memory_id),))
+        self._by_category.add(memory_id, (records.category(memory_id),))
+        self._by_tag.add(memory_id, records.tags(memory_id))
+
+    def _unindex_fields(self, memory_id: str) -> None:
+        """Remove a stored record from the secondary and time indexes"""
+        records = self._records
+        self._time_index.remove(memory_id, records.timestamp_ns(memory_id))
+        self._by_user.remove(memory_id, (records.user_id(memory_id),))
+        self._by_session.remove(memory_id, (records.session_id(memory_id),))
+        self._by_category.remove(memory_id, (records.category(memory_id),))
+        self._by_tag.remove(memory_id, records.tags(memory_id))
+
+    def _filter_sets(
+        self,
+        user_id: Any = _UNSET,
+        session_id: Any = _UNSET,
+        category: Any = _UNSET,
+        tags: Any = _UNSET
+    ) -> List[Dict[str, None]]:
+        """One ID set per given field filter"""
+        id_sets = []
+        if user_id is not _UNSET and user_id is not None:
+            id_sets.append(self._by_user.get(user_id))
+        if session_id is not _UNSET:
+            id_sets.append(self._by_session.get(session_id))
+        if category is not _UNSET and category is not None:
+            id_sets.append(self._by_category.get(category))
+        if tags is not _UNSET:
+            tags = tags if isinstance(tags, list) else [tags]
+            any_tag = {}
+            for tag in tags:
+                any_tag.update(self._by_tag.get(tag))
+            id_sets.append(any_tag)
+        return id_sets
+
+    def _sort_by_time(self, memory_ids: List[str], newest_first: bool = False) -> List[str]:
+        """Order IDs the same way the time index does"""
+        return sorted(
+            memory_ids,
+            key=lambda memory_id: (self._records.timestamp_ns(memory_id), memory_id),
+            reverse=newest_first
+        )
@@ -0,0 +1,310 @@
+"""
+Compact in-memory record storage for memories
+"""
+import copy
+import json
+import math
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .index import from_epoch_ns, to_epoch_ns
+from .types import MemoryEntry, MemoryMetadata
+
+
+class Record(NamedTuple):
+    """The stored fields of one memory, without building Pydantic models"""
+    content: Any
+    timestamp_ns: int
+    user_id: str
+    session_id: Optional[str] = None
+    category: Optional[str] = None
+    importance: Optional[float] = 0.5
+    confidence: Optional[float] = 1.0
+    source: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    custom: Dict[str, Any] = {}
+    ttl: Optional[int] = None
+
+    @classmethod
+    def from_entry(cls, entry: MemoryEntry, content: Any) -> "Record":
+        meta = entry.metadata
+        return cls(
+            content,
+            to_epoch_ns(entry.timestamp),
+            entry.user_id,
+            entry.session_id,
+            meta.category,
+            meta.importance,
+            meta.confidence,
+            meta.source,
+            tuple(meta.tags),
+            meta.custom,
+            entry.ttl
+        )
+
+    @property
+    def text(self) -> str:
+        """The content as a string (JSON for non-string content)"""
+        return self.content if isinstance(self.content, str) else json.dumps(self.content)
+
+
+class _Interner:
+    """
+    Map repeated values (user, session, category) to small integer codes.
+
+    Code 0 is reserved for None. Codes are reference counted and reused once
+    no record refers to them any more.
+    """
+
+    def __init__(self):
+        self._codes: Dict[Any, int] = {}
+        self._values: List[Any] = [None]
+        self._refs = array("I", [0])
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def acquire(self, value: Any) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            if self._free:
+                code = self._free.pop()
+                self._values[code] = value
+            else:
+                code = len(self._values)
+                self._values.append(value)
+                self._refs.append(0)
+            self._codes[value] = code
+        self._refs[code] += 1
+        return code
+
+    def release(self, code: int) -> None:
+        if code == 0:
+            return
+        self._refs[code] -= 1
+        if self._refs[code] == 0:
+            del self._codes[self._values[code]]
+            self._values[code] = None
+            self._free.append(code)
+
+    def value(self, code: int) -> Any:
+        return self._values[code]
+
+    def copy(self) -> "_Interner":
+        other = _Interner.__new__(_Interner)
+        other._codes = dict(self._codes)
+        other._values = list(self._values)
+        other._refs = array("I", self._refs)
+        other._free = list(self._free)
+        return other
+
+
+class RecordStore:
+    """
+    Slot-based columnar storage for memory records.
+
+    Each memory occupies one slot. Fixed-size fields live in packed arrays
+    (timestamps, importance, confidence, interned user/session/category
+    codes), content is held once in its original form, and rarely-set fields
+    (source, tags, custom metadata, ttl) are kept in sparse per-slot dicts.
+    Freed slots are reused. MemoryEntry models are only built on request via
+    entry().
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._content: List[Any] = []
+        self._timestamp = array("q")
+        self._importance = array("d")
+        self._confidence = array("d")
+        self._user = array("I")
+        self._session = array("I")
+        self._category = array("I")
+        self._tags: Dict[int, Tuple[str, ...]] = {}
+        self._source: Dict[int, str] = {}
+        self._custom: Dict[int, Dict[str, Any]] = {}
+        self._ttl: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._users = _Interner()
+        self._sessions = _Interner()
+        self._categories = _Interner()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        """IDs in insertion order"""
+        return iter(self._slots)
+
+    def put(self, entry: MemoryEntry, content: Any) -> None:
+        """Store an entry, replacing any record with the same ID"""
+        self.put_record(entry.id, Record.from_entry(entry, content))
+
+    def put_record(self, memory_id: str, record: Record) -> None:
+        """Store a record, replacing any record with the same ID"""
+        slot = self._slots.get(memory_id)
+        if slot is not None:
+            self._release(slot)
+        elif self._free:
+            slot = self._free.pop()
+            self._slots[memory_id] = slot
+        else:
+            slot = len(self._ids)
+            self._slots[memory_id] = slot
+            self._ids.append(None)
+            self._content.append(None)
+            for column in (self._timestamp, self._importance, self._confidence,
+                           self._user, self._session, self._category):
+                column.append(0)
+
+        self._ids[slot] = memory_id
+        self._content[slot] = record.content
+        self._timestamp[slot] = record.timestamp_ns
+        self._importance[slot] = _pack_float(record.importance)
+        self._confidence[slot] = _pack_float(record.confidence)
+        self._user[slot] = self._users.acquire(record.user_id)
+        self._session[slot] = self._sessions.acquire(record.session_id)
+        self._category[slot] = self._categories.acquire(record.category)
+        if record.tags:
+            self._tags[slot] = tuple(sys.intern(tag) for tag in record.tags)
+        if record.source is not None:
+            self._source[slot] = record.source
+        if record.custom:
+            self._custom[slot] = record.custom
+        if record.ttl is not None:
+            self._ttl[slot] = record.ttl
+
+    def record(self, memory_id: str) -> Record:
+        slot = self._slots[memory_id]
+        return Record(
+            self._content[slot],
+            self._timestamp[slot],
+            self._users.value(self._user[slot]),
+            self._sessions.value(self._session[slot]),
+            self._categories.value(self._category[slot]),
+            _unpack_float(self._importance[slot]),
+            _unpack_float(self._confidence[slot]),
+            self._source.get(slot),
+            self._tags.get(slot, ()),
+            self._custom.get(slot, {}),
+            self._ttl.get(slot)
+        )
+
+    def remove(self, memory_id: str) -> bool:
+        slot = self._slots.pop(memory_id, None)
+        if slot is None:
+            return False
+        self._release(slot)
+        self._ids[slot] = None
+        self._content[slot] = None
+        self._free.append(slot)
+        return True
+
+    def clear(self) -> None:
+        # Only the columns; subclasses reset their own state
+        RecordStore.__init__(self)
+
+    def copy(self) -> "RecordStore":
+        """
+        Point-in-time copy sharing content objects with this store.
+
+        Columns are copied wholesale, so this is much cheaper than reading
+        every record and the copy can be read while this store keeps changing.
+        """
+        other = RecordStore.__new__(RecordStore)
+        # RecordStore's own columns, so a subclass copies into a plain store
+        for name in vars(RecordStore()):
+            value = getattr(self, name)
+            setattr(other, name, copy.copy(value) if isinstance(value, array) else value.copy())
+        return other
+
+    def content(self, memory_id: str) -> Any:
+        """The content exactly as it was passed to remember()"""
+        return self._content[self._slots[memory_id]]
+
+    def text(self, memory_id: str) -> str:
+        """The content as a string (JSON for non-string content)"""
+        content = self._content[self._slots[memory_id]]
+        return content if isinstance(content, str) else json.dumps(content)
+
+    def timestamp_ns(self, memory_id: str) -> int:
+        return self._timestamp[self._slots[memory_id]]
+
+    def user_id(self, memory_id: str) -> str:
+        return self._users.value(self._user[self._slots[memory_id]])
+
+    def session_id(self, memory_id: str) -> Optional[str]:
+        return self._sessions.value(self._session[self._slots[memory_id]])
+
+    def category(self, memory_id: str) -> Optional[str]:
+        return self._categories.value(self._category[self._slots[memory_id]])
+
+    def tags(self, memory_id: str) -> Tuple[str, ...]:
+        return self._tags.get(self._slots[memory_id], ())
+
+    def confidence(self, memory_id: str) -> Optional[float]:
+        return _unpack_float(self._confidence[self._slots[memory_id]])
+
+    def set_confidence(self, memory_id: str, confidence: Optional[float]) -> None:
+        self._confidence[self._slots[memory_id]] = _pack_float(confidence)
+
+    def ttl(self, memory_id: str) -> Optional[int]:
+        return self._ttl.get(self._slots[memory_id])
+
+    def expiring(self) -> Iterator[Tuple[str, int]]:
+        """(memory_id, expiry time in epoch ns) of every record with a ttl"""
+        for slot, ttl in self._ttl.items():
+            yield self._ids[slot], self._timestamp[slot] + ttl * 1_000_000_000
+
+    def metadata(self, memory_id: str) -> MemoryMetadata:
+        slot = self._slots[memory_id]
+        return MemoryMetadata.model_construct(
+            importance=_unpack_float(self._importance[slot]),
+            confidence=_unpack_float(self._confidence[slot]),
+            category=self._categories.value(self._category[slot]),
+            source=self._source.get(slot),
+            tags=list(self._tags.get(slot, ())),
+            custom=dict(self._custom.get(slot, {}))
+        )
+
+    def entry(self, memory_id: str) -> MemoryEntry:
+        """Materialize the record as a MemoryEntry"""
+        slot = self._slots[memory_id]
+        return MemoryEntry.model_construct(
+            id=memory_id,
+            content=self.text(memory_id),
+            embedding=None,
+            metadata=self.metadata(memory_id),
+            user_id=self._users.value(self._user[slot]),
+            session_id=self._sessions.value(self._session[slot]),
+            timestamp=from_epoch_ns(self._timestamp[slot]),
+            ttl=self._ttl.get(slot),
+            relations=[]
+        )
+
+    def _release(self, slot: int) -> None:
+        """Drop the interned codes and sparse fields of a slot"""
+        self._users.release(self._user[slot])
+        self._sessions.release(self._session[slot])
+        self._categories.release(self._category[slot])
+        for sparse in (self._tags, self._source, self._custom, self._ttl):
+            sparse.pop(slot, None)
+
+
+def _pack_float(value: Optional[float]) -> float:
+    """Optional floats are stored with NaN standing in for None"""
+    return math.nan if value is None else value
+
+
+def _unpack_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
@@ -0,0 +1,164 @@
+"""
+Pooled HTTP transport shared by API clients in a process
+"""
+import gzip
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def encode_body(data: Any, compress_min_bytes: Optional[int]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    JSON-encode a request body, gzipped when it reaches compress_min_bytes.
+
+    Returns the body and the headers describing it. Small bodies are sent
+    as-is, since compressing them costs more time than it saves.
+    """
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if compress_min_bytes is not None and len(body) >= compress_min_bytes:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+class Transport:
+    """
+    A requests.Session with a tuned connection pool per host.
+
+    Each host gets a keep-alive pool of up to pool_maxsize connections, so
+    as many threads can have a request in flight without reconnecting.
+    With pool_block (the default), threads beyond that wait for a free
+    connection instead of opening one that gets discarded afterwards
+    ("connection pool is full"). Responses are requested with gzip and
+    decompressed transparently. Retries are left to APIClient.
+
+    Clients usually get a Transport from shared_transport(), so Memory
+    instances talking to the same host reuse warm connections (and their
+    TLS sessions) instead of each doing its own handshakes.
+
+    Args:
+        pool_maxsize: Connections kept alive per host
+        pool_connections: Hosts whose pools are kept
+        pool_block: Wait for a free connection rather than exceed pool_maxsize
+    """
+
+    def __init__(self, pool_maxsize: int = 32, pool_connections: int = 4, pool_block: bool = True):
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({
+            "User-Agent": "agentmind-python/0.1.0",
+            "Accept-Encoding": "gzip, deflate"
+        })
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._compressed = 0
+        self._bytes_sent = 0
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Any] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        compress_min_bytes: Optional[int] = None
+    ) -> requests.Response:
+        """
+        Send a request with a JSON body over a pooled connection.
+
+        Args:
+            method, url, params, headers: As for requests
+            data: JSON-serializable body, if any
+            timeout: (connect, read) timeouts in seconds
+            compress_min_bytes: Gzip bodies at least this large (None never compresses)
+        """
+        body = None
+        headers = dict(headers or {})
+        if data is not None:
+            body, body_headers = encode_body(data, compress_min_bytes)
+            headers.update(body_headers)
+        with self._lock:
+            self._requests += 1
+            if body is not None:
+                self._bytes_sent += len(body)
+                self._compressed += "Content-Encoding" in headers
+        return self.session.request(method, url, data=body, params=params, headers=headers, timeout=timeout)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool statistics.
+
+        Returns:
+            Totals for requests, gzipped requests and body bytes sent, and
+            per host ("scheme://host:port") the connections opened, requests
+            made, idle keep-alive connections and pool size
+        """
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": idle,
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+            }
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "compressed_requests": self._compressed,
+                "bytes_sent": self._bytes_sent,
+                "hosts": hosts,
+            }
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self.session.close()
+
+
+# Process-wide transports, one per origin and pool size
+_transports: Dict[Tuple[str, int], Transport] = {}
+_transports_lock = threading.Lock()
+
+
+def shared_transport(base_url: str, pool_maxsize: int = 32) -> Transport:
+    """
+    The process-wide Transport for base_url's origin.
+
+    Every client of the same scheme, host and port (and pool size) gets the
+    same Transport, whatever its API key, so connections stay warm across
+    Memory instances.
+    """
+    parts = urlsplit(base_url)
+    key = (f"{parts.scheme}://{parts.netloc}", pool_maxsize)
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = _transports[key] = Transport(pool_maxsize=pool_maxsize)
+        return transport
+
+
+def close_transports() -> None:
+    """Close and forget every shared transport"""
+    with _transports_lock:
+        transports = list(_transports.values())
+        _transports.clear()
+    for transport in transports:
+        transport.close()
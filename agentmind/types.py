@@ -22,6 +22,40 @@ class MemoryConfig(BaseModel):
     embedding_model: str = Field(default="text-embedding-ada-002", description="Embedding model")
     auto_summarize: bool = Field(default=True, description="Auto-summarize long sessions")
     encryption_key: Optional[str] = Field(default=None, description="Optional E2E encryption")
+    ann_index: Optional[Literal["ivf"]] = Field(default=None, description="Approximate index for semantic recall")
+    ann_nlist: Optional[int] = Field(default=None, ge=1, description="IVF clusters (default 4 * sqrt(n))")
+    ann_nprobe: int = Field(default=16, ge=1, description="IVF clusters scanned per query")
+    ann_min_size: int = Field(default=50000, ge=0, description="Use exact search below this many vectors")
+    embedding_storage: Literal["float32", "int8", "pq"] = Field(default="float32", description="In-memory embedding encoding")
+    embedding_path: Optional[str] = Field(default=None, description="File for full-precision vectors of quantized storage or alongside a resident content limit")
+    pq_subvectors: Optional[int] = Field(default=None, ge=1, description="Product quantization subvectors (default dimension / 8)")
+    embedding_rerank: int = Field(default=4, ge=1, description="Quantized candidates reranked per result")
+    embedding_cache_size: int = Field(default=10000, ge=0, description="Embeddings kept in the LRU cache")
+    recall_cache_size: int = Field(default=1024, ge=0, description="Recall results kept in the LRU cache (0 disables it)")
+    min_similarity: float = Field(default=0.2, description="Minimum cosine similarity for semantic matches")
+    cache_max_resident_entries: Optional[int] = Field(default=None, ge=1, description="Memories whose content stays in RAM before it spills to disk (indexes and fields always stay)")
+    cache_max_resident_bytes: Optional[int] = Field(default=None, ge=1, description="Bytes of resident content plus keyword index before content spills to disk (fields and other indexes always stay)")
+    cache_policy: Literal["lru", "lfu", "importance"] = Field(default="lru", description="Which memories spill first")
+    cache_spill_path: Optional[str] = Field(default=None, description="File for spilled content (default: a temporary file)")
+    rate_limit: float = Field(default=10.0, gt=0, description="Sustained hosted-service requests per second")
+    rate_limit_burst: Optional[float] = Field(default=None, ge=1, description="Hosted-service requests allowed back to back (default rate_limit)")
+    retry_attempts: int = Field(default=4, ge=1, description="Attempts per hosted-service request, including the first")
+    retry_base_delay: float = Field(default=0.25, ge=0, description="Upper bound of the first retry delay in seconds")
+    retry_max_delay: float = Field(default=8.0, ge=0, description="Cap on any retry delay in seconds")
+    breaker_failure_threshold: int = Field(default=5, ge=1, description="Consecutive failures that mark the hosted service down")
+    breaker_reset_timeout: float = Field(default=30.0, ge=0, description="Seconds before probing a service marked down")
+    http_pool_size: int = Field(default=32, ge=1, description="Keep-alive connections per hosted-service host")
+    http_connect_timeout: float = Field(default=3.05, gt=0, description="Seconds to wait for a hosted-service connection")
+    http_read_timeout: float = Field(default=30.0, gt=0, description="Seconds to wait for a hosted-service response")
+    http_compress_min_bytes: Optional[int] = Field(default=8192, ge=0, description="Gzip request bodies at least this large (None disables)")
+    hosted_sync: bool = Field(default=False, description="In hosted mode, send get/recall/remember/delete to the service instead of keeping them local")
+    write_behind: bool = Field(default=False, description="Queue hosted-mode writes in a spool sent in the background (implies hosted_sync)")
+    spool_path: Optional[str] = Field(default=None, description="Durable file for queued writes (default: a temporary file)")
+    spool_max_pending: int = Field(default=10000, ge=1, description="Queued writes before remember() blocks")
+    api_cache_ttl: float = Field(default=300.0, ge=0, description="Seconds hosted-service reads are served from the local cache")
+    api_negative_cache_ttl: float = Field(default=30.0, ge=0, description="Seconds a missing memory ID is remembered as missing")
+    api_cache_size: int = Field(default=10000, ge=1, description="Hosted-service responses kept in the local cache")
+    coalesce_window: Optional[float] = Field(default=None, ge=0, description="Merge concurrent single-item API calls made within this many seconds")
 
 
 class MemoryMetadata(BaseModel):
@@ -0,0 +1,659 @@
+"""
+Local embedding storage and vectorized similarity search
+"""
+import copy
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann import IVFIndex
+
+
+# Rows copied or encoded per block when working through on-disk vectors
+_BLOCK = 65536
+
+
+class EmbeddingStore:
+    """
+    All embeddings of a namespace in one contiguous float32 matrix.
+
+    Vectors are normalized on insert so cosine similarity is a plain dot
+    product. Rows are appended into a buffer that grows geometrically;
+    deleted rows are tombstoned and the matrix is compacted once enough of
+    it is dead.
+
+    With an ann index attached, searches over stores of at least
+    exact_threshold vectors only score the index's candidate rows; smaller
+    stores always use exact search. The index is (re)trained on a background
+    thread, on rows that stay put until it finishes (compaction waits for
+    it), and swapped in by the next add or search after that; until then
+    the previous index, or exact search, keeps serving.
+
+    Example:
+        store = EmbeddingStore()
+        store.add("mem_1", vector)
+        store.search(query_vector, k=5)  # [[("mem_1", 0.93), ...]]
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        initial_capacity: int = 1024,
+        compact_ratio: float = 0.25,
+        ann: Optional[IVFIndex] = None,
+        exact_threshold: int = 50000
+    ):
+        """
+        Args:
+            dimension: Vector size (inferred from the first insert if omitted)
+            initial_capacity: Rows to allocate up front
+            compact_ratio: Compact when this fraction of rows is tombstoned
+            ann: Optional approximate index used for large stores
+            exact_threshold: Minimum store size before the ann index is used
+        """
+        self.dimension = dimension
+        self.compact_ratio = compact_ratio
+        self.ann = ann
+        self.exact_threshold = exact_threshold
+        self._initial_capacity = max(1, initial_capacity)
+        self._capacity = 0
+        self._matrix = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._dead = 0
+        self._compact_listeners: List[Callable[[np.ndarray], None]] = []
+
+        # Background ann training: the thread, then (generation, rows covered, index)
+        self._training: Optional[threading.Thread] = None
+        self._trained: Optional[Tuple[int, int, IVFIndex]] = None
+        # Bumped whenever rows move, so an index trained on the old rows is dropped
+        self._generation = 0
+        self._swap_lock = threading.Lock()
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix: np.ndarray,
+        ids: Sequence[Optional[str]],
+        rows: Mapping[str, int],
+        alive: np.ndarray,
+        ann: Optional[IVFIndex] = None,
+        exact_threshold: int = 50000
+    ) -> "EmbeddingStore":
+        """
+        Search an existing matrix of unit vectors in place, without copying it.
+
+        Used for read-only embeddings such as a memory-mapped snapshot; rows
+        not marked alive are never returned.
+
+        Args:
+            matrix: float32 matrix of normalized vectors
+            ids: Memory ID of each row
+            rows: Memory ID -> row for the alive rows
+            alive: Boolean mask of the rows holding an embedding
+            ann: Optional approximate index, trained here on the alive rows
+            exact_threshold: Minimum store size before the ann index is used
+        """
+        store = cls(dimension=matrix.shape[1], ann=ann, exact_threshold=exact_threshold)
+        store._matrix = matrix
+        store._capacity = store._size = len(matrix)
+        store._alive = alive
+        store._ids = ids
+        store._rows = rows
+        store._dead = len(matrix) - int(np.count_nonzero(alive))
+        if ann is not None and len(rows) >= exact_threshold:
+            live = np.flatnonzero(alive)
+            ann.train(matrix[live] if store._dead else matrix, live)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        """RAM held by the vector buffer"""
+        return 0 if self._matrix is None else self._matrix.nbytes
+
+    def add(self, memory_id: str, vector: Sequence[float]) -> None:
+        """Store or replace the embedding for memory_id"""
+        self.add_many([memory_id], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_many(self, memory_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Append a batch of embeddings, one row per ID"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(memory_ids):
+            raise ValueError("vectors must be a 2D array with one row per memory ID")
+        if not len(memory_ids):
+            return
+
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dimension}"
+            )
+
+        for memory_id in memory_ids:
+            if memory_id in self._rows:
+                self.remove(memory_id)
+
+        self._reserve(self._size + len(memory_ids))
+        start, end = self._size, self._size + len(memory_ids)
+        unit = _normalize(vectors)
+        self._write(start, unit)
+        self._alive[start:end] = True
+        for offset, memory_id in enumerate(memory_ids):
+            self._rows[memory_id] = start + offset
+            self._ids.append(memory_id)
+        self._size = end
+
+        if self.ann is not None:
+            self._update_ann(np.arange(start, end), unit)
+
+    def get(self, memory_id: str) -> Optional[np.ndarray]:
+        """Return a copy of the (normalized) embedding, or None"""
+        row = self._rows.get(memory_id)
+        if row is None:
+            return None
+        return np.array(self._read(np.array([row]))[0])
+
+    def get_many(self, memory_ids: Sequence[str]) -> np.ndarray:
+        """Copies of the embeddings of stored IDs, one row per ID"""
+        rows = np.fromiter((self._rows[memory_id] for memory_id in memory_ids), dtype=np.int64)
+        if not len(rows):
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        return np.array(self._read(rows))
+
+    def remove(self, memory_id: str) -> bool:
+        """Tombstone the embedding for memory_id"""
+        row = self._rows.pop(memory_id, None)
+        if row is None:
+            return False
+
+        self._alive[row] = False
+        self._ids[row] = None
+        self._dead += 1
+        # Rows must not move while an index is being trained on them
+        if not self._rows_pinned() and self._dead >= 64 and self._dead > self.compact_ratio * self._size:
+            self.compact()
+        return True
+
+    def clear(self) -> None:
+        """Drop every embedding but keep the allocated buffer"""
+        self._alive[:] = False
+        self._ids = []
+        self._rows.clear()
+        self._size = 0
+        self._dead = 0
+        self._generation += 1
+
+    def compact(self) -> None:
+        """Squeeze out tombstoned rows, preserving insertion order"""
+        if not self._dead:
+            return
+
+        keep = np.flatnonzero(self._alive[:self._size])
+        remap = np.full(self._size, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        self._move(keep)
+        self._alive[:] = False
+        self._alive[:len(keep)] = True
+        self._ids = [self._ids[row] for row in keep]
+        self._rows = {memory_id: row for row, memory_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._dead = 0
+        self._generation += 1
+
+        if self.ann is not None and self.ann.trained:
+            self.ann.remap(remap)
+        for listener in self._compact_listeners:
+            listener(remap)
+
+    def wait_for_ann(self) -> None:
+        """Block until background ann training finishes, then start using the new index"""
+        thread = self._training
+        if thread is not None:
+            thread.join()
+        self._install_ann()
+
+    def on_compact(self, listener: Callable[[np.ndarray], None]) -> None:
+        """Register a callback receiving the old-row to new-row mapping after compaction"""
+        self._compact_listeners.append(listener)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Find the k most similar stored embeddings for each query.
+
+        All queries are scored with a single matrix multiply; the top rows of
+        each query are then selected with argpartition instead of a full sort.
+
+        Args:
+            queries: One query vector, or a 2D array of query vectors
+            k: Results per query
+            accept: Optional predicate; rejected IDs are never returned
+
+        Returns:
+            One list of (memory_id, cosine similarity) pairs per query, best first
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if k <= 0 or not self._rows:
+            return [[] for _ in range(len(queries))]
+
+        queries = _normalize(queries)
+        self._install_ann()
+        if self._use_ann():
+            return self._search_ann(queries, k, accept)
+
+        scores = self._score(queries)
+        if self._dead:
+            scores[~self._alive[:self._size]] = -np.inf
+        return [
+            self._rank(queries[col], scores[:, col], k, accept)
+            for col in range(len(queries))
+        ]
+
+    def _rows_pinned(self) -> bool:
+        """Whether a background job is reading the rows, so compaction must wait"""
+        return self._training is not None
+
+    def _use_ann(self) -> bool:
+        return self.ann is not None and self.ann.trained and len(self._rows) >= self.exact_threshold
+
+    def _search_ann(
+        self,
+        queries: np.ndarray,
+        k: int,
+        accept: Optional[Callable[[str], bool]]
+    ) -> List[List[Tuple[str, float]]]:
+        """Score only the ann candidates, falling back to exact search if they run short"""
+        results = []
+        for query, rows in zip(queries, self.ann.candidates(queries)):
+            rows = rows[self._alive[rows]]
+            scores = self._score(query[None, :], rows)[:, 0]
+            found = self._rank(query, scores, k, accept, rows)
+            if len(found) < min(k, len(self._rows)):
+                scores = self._score(query[None, :])[:, 0]
+                scores[~self._alive[:self._size]] = -np.inf
+                found = self._rank(query, scores, k, accept)
+            results.append(found)
+        return results
+
+    def _update_ann(self, new_rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Index new rows, starting to retrain in the background once the store has outgrown the clusters"""
+        self._install_ann()
+        if self.ann.trained:
+            self.ann.add(new_rows, vectors)
+        live = len(self._rows)
+        if live < self.exact_threshold or self._training is not None:
+            return
+        if not self.ann.trained or live > 4 * self.ann.trained_size:
+            self._start_training()
+
+    def _start_training(self) -> None:
+        """Train a new index on the current rows on a background thread"""
+        # A contiguous view, so disk-backed vectors are not copied; appends and
+        # buffer growth leave these rows alone, and compaction waits
+        size, generation, matrix = self._size, self._generation, self._view()
+        index = self.ann.untrained_copy()
+
+        def train() -> None:
+            index.train(matrix, np.arange(size))
+            self._trained = (generation, size, index)
+
+        self._trained = None
+        self._training = threading.Thread(target=train, name="agentmind-ann-train", daemon=True)
+        self._training.start()
+
+    def _install_ann(self) -> None:
+        """Swap in a finished background index, after indexing the rows appended since it started"""
+        thread = self._training
+        if thread is None or thread.is_alive():
+            return
+        with self._swap_lock:
+            if self._training is not thread:
+                return
+            trained, self._trained = self._trained, None
+            if trained is not None and trained[0] == self._generation:
+                _, size, index = trained
+                index.add(np.arange(size, self._size), self._view()[size:])
+                self.ann = index
+            # A failed or stale training leaves the old index; the next add retries
+            self._training = None
+
+    def _rank(
+        self,
+        query: np.ndarray,
+        scores: np.ndarray,
+        k: int,
+        accept: Optional[Callable[[str], bool]],
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, float]]:
+        """Turn one query's score vector into its (memory_id, score) results"""
+        top, top_scores = self._select(scores, k, accept, rows)
+        return [(self._ids[row], float(score)) for row, score in zip(top, top_scores)]
+
+    def _select(
+        self,
+        scores: np.ndarray,
+        k: int,
+        accept: Optional[Callable[[str], bool]],
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[List[int], List[float]]:
+        """
+        Pick the matrix rows of the k best scores, over-fetching when filtered.
+
+        rows maps score positions to matrix rows when only a subset was scored.
+        """
+        fetch = min(k, len(scores))
+        while True:
+            if fetch < len(scores):
+                top = np.argpartition(-scores, fetch - 1)[:fetch]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            found_rows, found_scores = [], []
+            for idx in top:
+                score = scores[idx]
+                if score == -np.inf:
+                    break
+                row = int(idx if rows is None else rows[idx])
+                if accept is not None and not accept(self._ids[row]):
+                    continue
+                found_rows.append(row)
+                found_scores.append(score)
+                if len(found_rows) >= k:
+                    return found_rows, found_scores
+
+            if fetch >= len(scores):
+                return found_rows, found_scores
+            fetch = min(len(scores), fetch * 4)
+
+    # Storage hooks, overridden by stores that keep vectors elsewhere
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the buffers geometrically so appends are amortized O(1)"""
+        if rows <= self._capacity:
+            return
+        capacity = max(self._initial_capacity, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+        self._grow(capacity)
+        self._capacity = capacity
+
+    def _grow(self, capacity: int) -> None:
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def _write(self, start: int, vectors: np.ndarray) -> None:
+        self._matrix[start:start + len(vectors)] = vectors
+
+    def _read(self, rows: np.ndarray) -> np.ndarray:
+        return self._matrix[rows]
+
+    def _view(self) -> np.ndarray:
+        return self._matrix[:self._size]
+
+    def _move(self, keep: np.ndarray) -> None:
+        self._matrix[:len(keep)] = self._matrix[keep]
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similarity of unit queries to all rows (or a subset), shape (rows, queries)"""
+        matrix = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        return matrix @ queries.T
+
+
+class MappedEmbeddingStore(EmbeddingStore):
+    """
+    Embedding store whose float32 matrix is a memory-mapped file.
+
+    Searches are exact, as in EmbeddingStore, but the operating system
+    decides which pages of the matrix stay in RAM, so the process heap
+    does not grow with the number of vectors. Used alongside
+    BoundedStorage.
+
+    Args:
+        path: File for the vectors (a temporary file if omitted). It is
+            scratch space and is truncated when the store is created.
+        **kwargs: Passed to EmbeddingStore
+    """
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._disk = _DiskMatrix(path)
+
+    @property
+    def nbytes(self) -> int:
+        """RAM held outside the page cache (none)"""
+        return 0
+
+    def close(self) -> None:
+        """Remove the on-disk vector file if it is temporary"""
+        self._disk.close()
+
+    def _grow(self, capacity: int) -> None:
+        self._disk.reserve(capacity, self.dimension)
+
+    def _write(self, start: int, vectors: np.ndarray) -> None:
+        self._disk.array[start:start + len(vectors)] = vectors
+
+    def _read(self, rows: np.ndarray) -> np.ndarray:
+        return self._disk.array[rows]
+
+    def _view(self) -> np.ndarray:
+        return self._disk.array[:self._size]
+
+    def _move(self, keep: np.ndarray) -> None:
+        self._disk.move(keep)
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        matrix = self._disk.array[:self._size] if rows is None else self._disk.array[rows]
+        return np.asarray(matrix @ queries.T)
+
+
+class QuantizedEmbeddingStore(MappedEmbeddingStore):
+    """
+    Embedding store that keeps only compressed codes in RAM.
+
+    Full-precision vectors live in a memory-mapped file on disk. Searches
+    score every candidate on the codes, then rerank the best k * rerank
+    candidates with their exact vectors read back from disk. Once enough
+    vectors exist, a copy of the quantizer is trained and the rows encoded
+    on a background thread, and the codes are swapped in by the next add or
+    search after that; until then the on-disk vectors are scored directly.
+
+    Args:
+        quantizer: A ScalarQuantizer or ProductQuantizer
+        path: File for the full-precision vectors (a temporary file if omitted).
+            It is scratch space and is truncated when the store is created.
+        rerank: Candidates reranked per requested result
+        **kwargs: Passed to EmbeddingStore
+    """
+
+    def __init__(self, quantizer, path: Optional[str] = None, rerank: int = 4, **kwargs):
+        super().__init__(path, **kwargs)
+        self.quantizer = quantizer
+        self.rerank = max(1, rerank)
+        self._codes = None
+        # Background training: the thread, then (generation, rows covered, quantizer, codes)
+        self._quantizing: Optional[threading.Thread] = None
+        self._quantized = None
+
+    @property
+    def nbytes(self) -> int:
+        """RAM held by the compressed codes"""
+        return 0 if self._codes is None else self._codes.nbytes
+
+    def add_many(self, memory_ids: Sequence[str], vectors: np.ndarray) -> None:
+        super().add_many(memory_ids, vectors)
+        self._install_codes()
+        if self._quantizing is None and not self.quantizer.trained and len(self._rows) >= self.quantizer.min_train:
+            self._start_quantizing()
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[List[Tuple[str, float]]]:
+        self._install_codes()
+        return super().search(queries, k, accept)
+
+    def wait_for_codes(self) -> None:
+        """Block until background quantizer training finishes, then start scoring on the codes"""
+        thread = self._quantizing
+        if thread is not None:
+            thread.join()
+        self._install_codes()
+
+    def _rows_pinned(self) -> bool:
+        return super()._rows_pinned() or self._quantizing is not None
+
+    def _start_quantizing(self) -> None:
+        """Train a copy of the quantizer on a sample of live vectors and encode every row, in the background"""
+        size, generation, matrix = self._size, self._generation, self._view()
+        live = np.flatnonzero(self._alive[:size])
+        if len(live) > _BLOCK:
+            live = np.sort(np.random.default_rng(0).choice(live, _BLOCK, replace=False))
+        quantizer = copy.deepcopy(self.quantizer)
+        dimension = self.dimension
+
+        def train() -> None:
+            quantizer.train(np.asarray(matrix[live]))
+            codes = np.zeros((size, quantizer.code_size(dimension)), dtype=np.uint8)
+            for start in range(0, size, _BLOCK):
+                end = min(size, start + _BLOCK)
+                codes[start:end] = quantizer.encode(np.asarray(matrix[start:end]))
+            self._quantized = (generation, size, quantizer, codes)
+
+        self._quantized = None
+        self._quantizing = threading.Thread(target=train, name="agentmind-quantize", daemon=True)
+        self._quantizing.start()
+
+    def _install_codes(self) -> None:
+        """Swap in finished background codes, after encoding the rows appended since they started"""
+        thread = self._quantizing
+        if thread is None or thread.is_alive():
+            return
+        with self._swap_lock:
+            if self._quantizing is not thread:
+                return
+            done, self._quantized = self._quantized, None
+            if done is not None and done[0] == self._generation:
+                _, size, quantizer, trained = done
+                codes = np.zeros((self._capacity, trained.shape[1]), dtype=np.uint8)
+                codes[:size] = trained
+                if self._size > size:
+                    codes[size:self._size] = quantizer.encode(np.asarray(self._disk.array[size:self._size]))
+                # The quantizer first: writes encode with it once codes exist
+                self.quantizer = quantizer
+                self._codes = codes
+            # A failed or stale training leaves the disk vectors in use; the next add retries
+            self._quantizing = None
+
+    def _rank(self, query, scores, k, accept, rows=None):
+        if self._codes is None:
+            return super()._rank(query, scores, k, accept, rows)
+
+        candidates, _ = self._select(scores, k * self.rerank, accept, rows)
+        if not candidates:
+            return []
+        candidates = np.asarray(candidates)
+        exact = self._disk.array[candidates] @ query
+        order = np.argsort(-exact, kind="stable")[:k]
+        return [(self._ids[candidates[i]], float(exact[i])) for i in order]
+
+    def _grow(self, capacity: int) -> None:
+        super()._grow(capacity)
+        if self._codes is not None:
+            codes = np.zeros((capacity, self._codes.shape[1]), dtype=np.uint8)
+            codes[:self._size] = self._codes[:self._size]
+            self._codes = codes
+
+    def _write(self, start: int, vectors: np.ndarray) -> None:
+        super()._write(start, vectors)
+        if self._codes is not None:
+            self._codes[start:start + len(vectors)] = self.quantizer.encode(vectors)
+
+    def _move(self, keep: np.ndarray) -> None:
+        super()._move(keep)
+        if self._codes is not None:
+            self._codes[:len(keep)] = self._codes[keep]
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if self._codes is None:
+            return super()._score(queries, rows)
+        codes = self._codes[:self._size] if rows is None else self._codes[rows]
+        return self.quantizer.score(codes, queries)
+
+
+class _DiskMatrix:
+    """Growable float32 matrix backed by a memory-mapped file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="agentmind-", suffix=".f32")
+            os.close(fd)
+        self.path = path
+        with open(path, "wb"):
+            pass
+        self.array = None
+
+    def reserve(self, rows: int, dimension: int) -> None:
+        """Extend the file to hold rows vectors and remap it"""
+        if self.array is not None:
+            self.array.flush()
+        self.array = None
+        os.truncate(self.path, rows * dimension * 4)
+        self.array = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, dimension))
+
+    def move(self, keep: np.ndarray) -> None:
+        """Copy row keep[i] to row i; keep must be ascending so blocks never overlap badly"""
+        for start in range(0, len(keep), _BLOCK):
+            block = keep[start:start + _BLOCK]
+            self.array[start:start + len(block)] = self.array[block]
+
+    def close(self) -> None:
+        self.array = None
+        if self._temporary and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows are left as zeros)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
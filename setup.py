@@ -49,5 +49,6 @@ setup(
         ],
         "langchain": ["langchain>=0.1.0"],
         "openai": ["openai>=1.0.0"],
+        "async": ["httpx>=0.24.0"],
     },
 )
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Shared fixtures
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agentmind import TokenBucket
+from agentmind.client import APIClient
+from agentmind.retry import RetryPolicy
+
+
+class FakeClock:
+    """Monotonic clock that only moves when a test advances it"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """A FakeClock to pass to rate limiters and circuit breakers"""
+    return FakeClock()
+
+
+class StubState:
+    """What the stub server has seen, and scripted responses for it to give"""
+
+    def __init__(self):
+        self.requests = []
+        # (status, headers) pairs answered in order, then 200s
+        self.responses = deque()
+        # Single memories stored with POST /memories, by ID
+        self.memories = {}
+        # Seconds to wait before answering, like a distant service
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def route(self, method, path, headers, body):
+        """Default answer: a tiny memory store on /memories/<id> and /recall, else an echo"""
+        if path.startswith("/memories/") and path.count("/") == 2 and path != "/memories/batch":
+            memory_id = path.rsplit("/", 1)[1]
+            if memory_id not in self.memories:
+                return 404, {}, {}
+            if method == "DELETE":
+                del self.memories[memory_id]
+                return 200, {}, {"deleted": memory_id}
+            memory = self.memories[memory_id]
+            etag = f'"{hash(json.dumps(memory, sort_keys=True)) & 0xffffffff:x}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, None
+            return 200, {"ETag": etag}, memory
+        if path == "/memories/batch/delete":
+            # Like DELETE /memories/<id>, None for IDs not stored
+            results = [{"deleted": memory_id} if self.memories.pop(memory_id, None) else None for memory_id in body["ids"]]
+            return 200, {}, {"results": results}
+        if path == "/memories" and isinstance(body, dict) and "id" in body:
+            self.memories[body["id"]] = body
+            return 200, {}, {"id": body["id"]}
+        if path == "/recall":
+            words = body["query"].lower().split()
+            contents = [m["content"] for m in self.memories.values() if any(w in m["content"].lower() for w in words)]
+            return 200, {}, {"memories": contents[:body.get("limit", 5)]}
+        answer = {"status": "healthy", "path": path}
+        if isinstance(body, dict):
+            # Other batch endpoints: echo one result per item
+            answer["results"] = body.get("memories") or body.get("ids")
+        return 200, {}, answer
+
+
+@pytest.fixture
+def stub_server():
+    """Local HTTP server standing in for the hosted API"""
+    state = StubState()
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive like the real service
+        protocol_version = "HTTP/1.1"
+
+        def _answer(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            body = json.loads(raw) if raw else None
+            time.sleep(state.latency)
+            with state.lock:
+                state.requests.append((self.command, self.path, dict(self.headers), body))
+                if state.responses:
+                    status, headers = state.responses.popleft()
+                    answer = {}
+                else:
+                    status, headers, answer = state.route(self.command, self.path, self.headers, body)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if answer is None:
+                # 304 Not Modified has no body
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            payload = json.dumps(answer).encode("utf-8")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_DELETE = _answer
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client():
+    """Factory for APIClients that never wait on the rate limit and never retry"""
+    def make(url):
+        return APIClient("am_test_key", url, rate_limiter=TokenBucket(rate=1000, burst=100),
+                         retry_policy=RetryPolicy(max_attempts=1))
+    return make
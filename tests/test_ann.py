@@ -0,0 +1,105 @@
+"""
+Tests for approximate nearest-neighbour search
+"""
+import threading
+
+import numpy as np
+
+from agentmind import Memory, MemoryConfig
+from agentmind.ann import IVFIndex
+from agentmind.vectors import EmbeddingStore
+
+
+def clustered(n, dim=16, centers=20, seed=0):
+    """Random vectors grouped around a few centers"""
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim))
+    return means[rng.integers(centers, size=n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def test_ivf_recall_close_to_exact():
+    """Test IVF top-k mostly agrees with exact search"""
+    vectors = clustered(3000)
+    ids = [f"m{i}" for i in range(len(vectors))]
+    exact = EmbeddingStore()
+    approx = EmbeddingStore(ann=IVFIndex(nprobe=16), exact_threshold=1000)
+    exact.add_many(ids, vectors)
+    approx.add_many(ids, vectors)
+    approx.wait_for_ann()
+    assert approx.ann.trained
+    
+    queries = clustered(20, seed=1)
+    hits = 0
+    for want, got in zip(exact.search(queries, 10), approx.search(queries, 10)):
+        hits += len({m for m, _ in want} & {m for m, _ in got})
+    assert hits / 200 >= 0.9
+
+
+def test_ivf_incremental_inserts_and_deletes():
+    """Test rows added after training are searchable and deletes are honoured"""
+    vectors = clustered(1500, seed=2)
+    store = EmbeddingStore(ann=IVFIndex(nlist=16, nprobe=4), exact_threshold=1000)
+    store.add_many([f"m{i}" for i in range(1000)], vectors[:1000])
+    store.wait_for_ann()
+    for i in range(1000, 1500):
+        store.add(f"m{i}", vectors[i])
+    
+    assert store.search(vectors[1400], 1)[0][0][0] == "m1400"
+    
+    for i in range(1000, 1400):
+        store.remove(f"m{i}")
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    assert all(m != "m1200" for m, _ in store.search(vectors[1200], 5)[0])
+
+
+def test_training_runs_off_the_write_path():
+    """Test adds return while the index trains, searches stay exact, and the index swaps in when done"""
+    vectors = clustered(1500, seed=3)
+    release = threading.Event()
+    
+    class SlowIndex(IVFIndex):
+        def untrained_copy(self):
+            return SlowIndex(nlist=16, nprobe=4)
+        
+        def train(self, vectors, rows):
+            release.wait()
+            super().train(vectors, rows)
+    
+    store = EmbeddingStore(ann=SlowIndex(nlist=16, nprobe=4), exact_threshold=1000)
+    store.add_many([f"m{i}" for i in range(1200)], vectors[:1200])
+    store.add_many([f"m{i}" for i in range(1200, 1500)], vectors[1200:])
+    # Enough deletes to compact, but the rows being trained on must stay put
+    for i in range(1000, 1400):
+        store.remove(f"m{i}")
+    assert not store.ann.trained and store._dead == 400
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    
+    release.set()
+    store.wait_for_ann()
+    assert store.ann.trained and store._use_ann()
+    # Rows appended during training were indexed at the swap
+    assert sum(len(store.ann._list(c)) for c in range(16)) == 1500
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    store.compact()
+    assert store._dead == 0
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    assert all(m != "m1200" for m, _ in store.search(vectors[1200], 5)[0])
+
+
+def test_small_store_uses_exact_search():
+    """Test the index is not trained below the threshold"""
+    store = EmbeddingStore(ann=IVFIndex(), exact_threshold=100)
+    store.add_many(["a", "b"], np.eye(2))
+    
+    assert not store.ann.trained
+    assert store.search(np.array([0.0, 1.0]), 1)[0][0][0] == "b"
+
+
+def test_memory_config_enables_ivf():
+    """Test MemoryConfig knobs reach the embedding store"""
+    config = MemoryConfig(ann_index="ivf", ann_nprobe=3, ann_min_size=10)
+    memory = Memory(local_mode=True, config=config)
+    
+    assert isinstance(memory._vectors.ann, IVFIndex)
+    assert memory._vectors.ann.nprobe == 3
+    assert memory._vectors.exact_threshold == 10
@@ -0,0 +1,103 @@
+"""
+Tests for the asyncio Memory interface
+"""
+import asyncio
+import time
+
+import pytest
+
+from agentmind import AsyncMemory, MemoryConfig, RecallStrategy, TokenBucket
+
+
+def test_async_methods_mirror_memory():
+    """Test the coroutine API returns what Memory returns"""
+    async def main():
+        async with AsyncMemory(local_mode=True) as memory:
+            memory_id = await memory.remember({"editor": "vim"}, user_id="u1", session_id="s1")
+            await memory.remember_batch(["Deploys happen on Fridays", "Standup is at 9am"], session_id="s1")
+            assert await memory.get(memory_id) == {"editor": "vim"}
+            assert await memory.recall("deploys", strategy=RecallStrategy.RECENCY) == ["Deploys happen on Fridays"]
+            assert [m["id"] async for m in memory.scan(batch_size=2)] == [m["id"] for m in await memory.list()]
+            assert await memory.delete(memory_id)
+            assert not await memory.exists(memory_id)
+            assert await memory.clear_session("s1") == 2
+            assert (await memory.get_stats()).total_memories == 0
+
+    asyncio.run(main())
+
+
+def test_event_loop_stays_responsive():
+    """Test a large batch write does not stall other coroutines"""
+    async def main():
+        memory = AsyncMemory(local_mode=True)
+        gaps = []
+
+        async def ticker(stop):
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        stop = asyncio.Event()
+        ticking = asyncio.create_task(ticker(stop))
+        started = time.perf_counter()
+        await memory.remember_batch([f"Note {i} about topic {i % 37}" for i in range(5000)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticking
+        await memory.aclose()
+        return elapsed, max(gaps)
+
+    elapsed, worst_gap = asyncio.run(main())
+    assert worst_gap < max(0.1, elapsed / 2)
+
+
+def test_hosted_client_requires_httpx():
+    """Test the hosted client is only needed once it is used"""
+    memory = AsyncMemory(api_key="am_test_key")
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            memory.client
+    else:
+        assert memory.client is memory.client
+    asyncio.run(memory.aclose())
+
+
+def test_hosted_calls_use_the_async_client(stub_server):
+    """Test hosted-sync reads and writes go through AsyncAPIClient, concurrently"""
+    pytest.importorskip("httpx")
+    url, state = stub_server
+    config = MemoryConfig(hosted_sync=True)
+
+    async def main():
+        async with AsyncMemory(api_key="am_test_key", base_url=url, config=config,
+                               rate_limiter=TokenBucket(rate=1000, burst=100)) as memory:
+            memory_id = await memory.remember("User prefers dark mode", user_id="u1")
+            await memory.remember_batch(["Deploys happen on Fridays", "Standup is at 9am"])
+            assert await memory.exists(memory_id)
+            assert await memory.get(memory_id) == "User prefers dark mode"
+            # Served from the response cache the sync client shares
+            assert (await memory.get(memory_id, include_metadata=True))["user_id"] == "u1"
+
+            state.latency = 0.2
+            started = time.perf_counter()
+            answers = await memory.recall_many([f"dark mode {i}" for i in range(8)], user_id="u1")
+            assert time.perf_counter() - started < 8 * 0.2
+            assert answers == [["User prefers dark mode"]] * 8
+            state.latency = 0.0
+
+            assert await memory.delete(memory_id)
+            assert not await memory.exists(memory_id)
+            with pytest.raises(KeyError):
+                await memory.get(memory_id)
+            assert not await memory.delete(memory_id)
+            return memory.client._request_count, memory.memory.client._request_count
+
+    async_requests, sync_requests = asyncio.run(main())
+    assert sync_requests == 0
+    # The repeated get was answered from the cache
+    assert async_requests == len(state.requests) == 14
@@ -0,0 +1,125 @@
+"""
+Tests for batch API calls and request coalescing
+"""
+import threading
+
+import pytest
+
+from agentmind import Memory, MemoryConfig
+from agentmind.client import NotFoundError, ServerError
+from agentmind.coalesce import RequestCoalescer
+
+
+def test_batch_methods_chunk_requests(stub_server, make_client):
+    """Test bulk store, get and delete send one request per max_batch_size items"""
+    url, state = stub_server
+    client = make_client(url)
+    client.max_batch_size = 4
+    memories = [{"content": f"Turn {i}"} for i in range(10)]
+    assert client.store_memories(memories, idempotency_key="import-1") == memories
+    assert [path for _, path, _, _ in state.requests] == ["/memories/batch"] * 3
+    assert [headers["Idempotency-Key"] for _, _, headers, _ in state.requests] == [
+        "import-1-0", "import-1-1", "import-1-2"
+    ]
+    assert [len(body["memories"]) for _, _, _, body in state.requests] == [4, 4, 2]
+
+    ids = [f"mem_{i}" for i in range(5)]
+    assert client.get_memories(ids) == ids
+    state.memories.update({memory_id: {"id": memory_id} for memory_id in ids[:3]})
+    assert client.delete_memories(ids) == [{"deleted": memory_id} for memory_id in ids[:3]] + [None, None]
+    assert [path for _, path, _, _ in state.requests[3:]] == ["/memories/batch/get"] * 2 + ["/memories/batch/delete"] * 2
+
+
+def test_coalescer_merges_concurrent_calls(stub_server, make_client):
+    """Test single-item calls from many threads share batch requests"""
+    url, state = stub_server
+    client = RequestCoalescer(make_client(url), window=0.05)
+    results = {}
+    barrier = threading.Barrier(20)
+
+    def call(i):
+        barrier.wait()
+        results[i] = client.get_memory(f"mem_{i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: f"mem_{i}" for i in range(20)}
+    assert len(state.requests) < 20
+    assert client.requests_saved == 20 - len(state.requests)
+    # Everything else goes straight to the wrapped client
+    assert client.health_check()
+
+
+def test_coalescer_shares_errors_and_fills_batches(stub_server, make_client):
+    """Test a failed batch fails every caller, and a full batch goes out at once"""
+    url, state = stub_server
+    client = RequestCoalescer(make_client(url), window=10, max_batch=1)
+    assert client.store_memory({"content": "sent without waiting"}) == {"content": "sent without waiting"}
+
+    state.responses.append((500, {}))
+    with pytest.raises(ServerError):
+        client.delete_memory("mem_1")
+
+
+def test_coalescer_matches_client_signatures(stub_server, make_client):
+    """Test missing IDs raise NotFoundError from gets and deletes, and explicit idempotency keys are kept"""
+    url, state = stub_server
+    client = RequestCoalescer(make_client(url), window=0.01)
+    echo = state.route
+    state.route = lambda method, path, headers, body: (
+        (200, {}, {"results": [None] * len(body["ids"])}) if path == "/memories/batch/get"
+        else echo(method, path, headers, body)
+    )
+    with pytest.raises(NotFoundError):
+        client.get_memory("mem_missing")
+    state.memories["mem_1"] = {"id": "mem_1", "content": "User likes tea"}
+    assert client.delete_memory("mem_1") == {"deleted": "mem_1"}
+    with pytest.raises(NotFoundError):
+        client.delete_memory("mem_1")
+
+    client.store_memory({"content": "User likes tea"}, idempotency_key="tea-1")
+    method, path, headers, _ = state.requests[-1]
+    assert (method, path, headers["Idempotency-Key"]) == ("POST", "/memories", "tea-1")
+
+
+def test_memory_coalesces_and_serves_batch_reads_locally():
+    """Test the config option wraps the client and batch gets fall back locally"""
+    config = MemoryConfig(coalesce_window=0.01, retry_attempts=1)
+    memory = Memory(api_key="am_test_key", base_url="http://127.0.0.1:9", config=config)
+    assert isinstance(memory.client, RequestCoalescer)
+    memory_id = memory.remember("User prefers dark mode")
+    result = memory.client.get_memory(memory_id)
+    assert result["content"] == "User prefers dark mode"
+    assert memory.client.get_memories([memory_id, "mem_missing"])[1] is None
+
+
+def test_memory_coalesces_concurrent_remembers(stub_server):
+    """Test remember calls from many threads reach the service in shared batch requests"""
+    url, state = stub_server
+    config = MemoryConfig(hosted_sync=True, coalesce_window=0.05)
+    memory = Memory(api_key="am_test_key", base_url=url, config=config)
+    barrier = threading.Barrier(10)
+
+    def remember(i):
+        barrier.wait()
+        memory.remember(f"Note {i} about deploys")
+
+    threads = [threading.Thread(target=remember, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(memory._storage) == 10
+    assert 0 < len(state.requests) < 10
+    assert {path for _, path, _, _ in state.requests} == {"/memories/batch"}
+    assert sum(len(body["memories"]) for _, _, _, body in state.requests) == 10
+
+    # A batch from one caller is one request
+    sent = len(state.requests)
+    memory.remember_batch(["First", "Second", "Third"])
+    assert [path for _, path, _, _ in state.requests[sent:]] == ["/memories/batch"]
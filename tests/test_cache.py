@@ -0,0 +1,120 @@
+"""
+Tests for bounded caches and spilling storage
+"""
+import os
+
+import pytest
+
+from agentmind import BoundedStorage, Memory, MemoryConfig
+from agentmind.cache import BoundedCache
+from agentmind.store import RecordStore
+from agentmind.vectors import MappedEmbeddingStore
+
+
+def test_eviction_policies():
+    """Test each policy picks its victim and limits hold by count and size"""
+    lru = BoundedCache(max_entries=2)
+    lru.add("a", 1)
+    lru.add("b", 1)
+    lru.touch("a")
+    assert lru.add("c", 1) == ["b"]
+
+    lfu = BoundedCache(max_entries=2, policy="lfu")
+    lfu.add("a", 1)
+    lfu.add("b", 1)
+    lfu.touch("b")
+    lfu.touch("a")
+    lfu.touch("a")
+    assert lfu.add("c", 1) == ["b"]
+
+    ranked = BoundedCache(max_entries=2, policy="importance")
+    ranked.add("a", 1, importance=0.9)
+    ranked.add("b", 1, importance=0.1)
+    assert ranked.add("c", 1, importance=0.5) == ["b"]
+
+    sized = BoundedCache(max_bytes=10)
+    sized.add("a", 4)
+    sized.add("b", 4)
+    assert sized.add("c", 4) == ["a"]
+    assert sized.nbytes == 8
+    # An entry larger than the limit evicts everything else but stays
+    assert sorted(sized.add("d", 50)) == ["b", "c"]
+    assert len(sized) == 1 and sized.evictions == 3
+
+
+def test_content_spills_and_faults_back(tmp_path):
+    """Test evicted content is read back transparently and the resident set stays bounded"""
+    spill_path = str(tmp_path / "memories.spill")
+    config = MemoryConfig(cache_max_resident_entries=3, cache_spill_path=spill_path)
+    memory = Memory(local_mode=True, config=config)
+    assert isinstance(memory._storage, BoundedStorage)
+
+    ids = [memory.remember(f"Fact number {i} about the deploy pipeline") for i in range(10)]
+    ids.append(memory.remember({"structured": True, "items": [1, 2]}))
+    stats = memory._storage.cache_stats()
+    assert stats["resident"] == 3 and stats["spilled"] == 8
+
+    assert memory.get(ids[0]) == "Fact number 0 about the deploy pipeline"
+    assert memory.get(ids[-1]) == {"structured": True, "items": [1, 2]}
+    assert "Fact number 7 about the deploy pipeline" in memory.recall("number 7", limit=1)
+    assert [m["id"] for m in memory.list()] == ids[::-1]
+    assert memory._storage.cache_stats()["faults"] >= 2
+    assert len(memory._storage._records.cache) == 3
+
+    memory.delete(ids[0])
+    memory.remember("Replaced", id=ids[1])
+    assert memory.get(ids[1]) == "Replaced"
+    assert len(memory.list()) == 10
+    memory.close()
+    assert os.path.exists(spill_path)
+
+
+def test_index_and_vectors_share_the_budget():
+    """Test the keyword index counts against max_resident_bytes, overhead past it warns, and embeddings stay off the heap"""
+    memory = Memory(local_mode=True, config=MemoryConfig(cache_max_resident_bytes=40_000))
+    assert isinstance(memory._vectors, MappedEmbeddingStore)
+    ids = [memory.remember(f"Fact number {i} about the deploy pipeline") for i in range(20)]
+    stats = memory._storage.cache_stats()
+    assert stats["index_bytes"] == memory._storage._term_index.nbytes > 0
+    assert stats["spilled"] == 0 and stats["overhead_bytes"] < 40_000
+    assert stats["resident_bytes"] + stats["index_bytes"] <= 40_000
+    assert memory._vectors.nbytes == 0
+
+    # Once the index alone is over budget no content stays resident, and
+    # the limit cannot hold
+    with pytest.warns(RuntimeWarning, match="max_resident_bytes"):
+        ids += [memory.remember(f"Note {i} on the release train") for i in range(130)]
+    stats = memory._storage.cache_stats()
+    assert stats["index_bytes"] > 40_000 and stats["overhead_bytes"] > stats["index_bytes"]
+    assert stats["resident"] == 0 and stats["spilled"] == 150
+    assert memory.recall("number 7", limit=1) == ["Fact number 7 about the deploy pipeline"]
+    assert memory.get(ids[-1]) == "Note 129 on the release train"
+
+    memory.delete_user_data(memory.config.namespace)
+    assert memory._storage.cache_stats()["index_bytes"] == 0
+    memory.close()
+
+
+def test_spilling_store_copy_and_clear(tmp_path):
+    """Test a copy holds spilled content too, clear resets everything and misplaced limits raise"""
+    storage = BoundedStorage(max_resident_entries=2)
+    memory = Memory(local_mode=True, storage=storage)
+    ids = [memory.remember(f"Fact {i}") for i in range(5)]
+    records = storage._records
+    snapshot = records.copy()
+    assert type(snapshot) is RecordStore
+    assert [snapshot.content(memory_id) for memory_id in ids] == [f"Fact {i}" for i in range(5)]
+    assert storage.cache_stats()["spilled"] == 3
+
+    records.clear()
+    assert len(records) == 0 and len(records.cache) == 0 and records.spilled_bytes == 0
+    assert snapshot.content(ids[0]) == "Fact 0"
+    records.put_record("mem_new", snapshot.record(ids[0]))
+    assert records.content("mem_new") == "Fact 0"
+    memory.close()
+
+    config = MemoryConfig(cache_max_resident_entries=10)
+    with pytest.raises(ValueError):
+        Memory(local_mode=True, config=config, storage=BoundedStorage(max_resident_entries=10))
+    with pytest.raises(ValueError):
+        Memory(local_mode=True, config=config, path=str(tmp_path / "log"))
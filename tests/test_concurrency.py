@@ -0,0 +1,126 @@
+"""
+Stress tests for sharing one Memory between threads
+"""
+import threading
+import time
+
+import pytest
+
+from agentmind import Memory, MemoryConfig
+from agentmind.locks import RWLock
+
+
+def test_rwlock_readers_share_and_writers_exclude():
+    """Test readers overlap, writers run alone and locks nest within a thread"""
+    lock = RWLock()
+    inside = []
+    peak = []
+    guard = threading.Lock()
+
+    def reader():
+        with lock.read():
+            with lock.read():
+                with guard:
+                    inside.append(1)
+                    peak.append(len(inside))
+                time.sleep(0.02)
+                with guard:
+                    inside.pop()
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    assert max(peak) > 1
+
+    with lock.write():
+        with lock.read():
+            with lock.write():
+                pass
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+
+@pytest.mark.parametrize("config", [MemoryConfig(), MemoryConfig(cache_max_resident_entries=50)])
+def test_concurrent_readers_and_writers(config):
+    """Test many threads reading and writing one Memory without errors or lost updates"""
+    memory = Memory(local_mode=True, config=config)
+    errors = []
+    written = {}
+
+    def writer(worker):
+        # Each writer tracks which of its own memories should survive
+        alive = {}
+        for i in range(100):
+            session = f"w{worker}-s{i % 5}"
+            alive[memory.remember(f"Worker {worker} note {i} about deploys", session_id=session)] = session
+            if i % 10 == 9:
+                oldest = next(iter(alive))
+                assert memory.delete(oldest)
+                del alive[oldest]
+            if i % 50 == 49:
+                cleared = [memory_id for memory_id, s in alive.items() if s == f"w{worker}-s0"]
+                assert memory.clear_session(f"w{worker}-s0") == len(cleared)
+                for memory_id in cleared:
+                    del alive[memory_id]
+        written[worker] = alive
+
+    def reader():
+        for i in range(50):
+            memory.recall("deploys note", limit=5)
+            for summary in memory.list(limit=10):
+                try:
+                    memory.get(summary["id"])
+                except KeyError:
+                    # Deleted between list() and get(), which is fine
+                    pass
+            memory.get_stats()
+            memory.summarize_session(f"w{i % 4}-s1")
+
+    def run(target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(writer, w)) for w in range(4)]
+    threads += [threading.Thread(target=run, args=(reader,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert set(memory._storage) == {memory_id for alive in written.values() for memory_id in alive}
+    assert len(memory._vectors) == len(memory._storage)
+    for memory_id in memory._storage:
+        assert memory.get(memory_id).startswith("Worker")
+    memory.close()
+
+
+def test_hosted_requests_run_outside_the_lock(stub_server):
+    """Test slow service calls neither block local reads nor serialize each other"""
+    url, state = stub_server
+    memory = Memory(api_key="am_test_key", base_url=url, config=MemoryConfig(hosted_sync=True))
+    known = memory.remember("User prefers dark mode")
+    state.latency = 0.3
+
+    writer = threading.Thread(target=memory.remember, args=("User likes tea",))
+    writer.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    assert memory.exists(known)
+    assert time.perf_counter() - started < 0.1
+    writer.join()
+
+    started = time.perf_counter()
+    writers = [threading.Thread(target=memory.remember, args=(f"Note {i}",)) for i in range(4)]
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    # One after another would take 1.2s
+    assert time.perf_counter() - started < 0.8
+    assert len(memory._storage) == 6
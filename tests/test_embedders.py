@@ -0,0 +1,87 @@
+"""
+Tests for embedders and embedding caching
+"""
+import numpy as np
+
+from agentmind import Memory, HashingEmbedder, Embedder
+from agentmind.embedders import CachedEmbedder
+
+
+class CountingEmbedder:
+    """Embedder that records every batch it is asked to embed"""
+    
+    def __init__(self):
+        self.batches = []
+        self.inner = HashingEmbedder(dimension=64)
+    
+    def embed(self, texts):
+        self.batches.append(list(texts))
+        return self.inner.embed(texts)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    """Test the default embedder output is stable and unit length"""
+    embedder = HashingEmbedder(dimension=128)
+    first = embedder.embed(["User likes Python", ""])
+    second = HashingEmbedder(dimension=128).embed(["User likes Python", ""])
+    
+    assert isinstance(embedder, Embedder)
+    assert first.shape == (2, 128)
+    assert np.array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+
+
+def test_hashing_embedder_similarity():
+    """Test texts sharing words are closer than unrelated texts"""
+    vectors = HashingEmbedder().embed([
+        "python programming",
+        "programming in python",
+        "my dog likes walks"
+    ])
+    assert vectors[0] @ vectors[1] > 0.8
+    assert vectors[0] @ vectors[2] < 0.2
+
+
+def test_cached_embedder_batches_and_reuses():
+    """Test only unseen texts reach the wrapped embedder, in one batch"""
+    inner = CountingEmbedder()
+    cached = CachedEmbedder(inner, max_size=2)
+    
+    cached.embed(["a", "b", "a"])
+    assert inner.batches == [["a", "b"]]
+    
+    vectors = cached.embed(["b", "c"])
+    assert inner.batches[-1] == ["c"]
+    assert vectors.shape == (2, 64)
+    assert cached.hits == 2 and cached.misses == 3
+    
+    # "a" was evicted by the size limit
+    cached.embed(["a"])
+    assert inner.batches[-1] == ["a"]
+
+
+def test_memory_embeds_batches_once():
+    """Test remember_batch embeds in a single call and recall reuses query vectors"""
+    inner = CountingEmbedder()
+    memory = Memory(local_mode=True, embedder=inner)
+    
+    memory.remember_batch(["Python tips", "Coffee notes", "Python tips"])
+    assert inner.batches == [["Python tips", "Coffee notes"]]
+    
+    memory.recall("python")
+    memory.recall("python")
+    assert inner.batches[1:] == [["python"]]
+
+
+def test_local_mode_defaults_to_hashing_embedder():
+    """Test local mode can do semantic recall without configuration"""
+    memory = Memory(local_mode=True)
+    assert isinstance(memory.embedder, HashingEmbedder)
+    
+    memory.remember("The user enjoys programming in Python")
+    memory.remember("Dinner reservation at eight")
+    
+    assert memory.recall("python programmer", strategy="semantic") == [
+        "The user enjoys programming in Python"
+    ]
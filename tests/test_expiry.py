@@ -0,0 +1,124 @@
+"""
+Tests for ttl and retention expiry
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from agentmind import Memory, MemoryConfig, RecallStrategy, expiry
+from agentmind.expiry import ExpiryQueue
+from agentmind.index import to_epoch_ns
+
+
+def store_at(memory, content, timestamp, ttl=None, id=None):
+    entry, original = memory._build_entry(content, None, None, None, ttl, id)
+    entry.timestamp = timestamp
+    memory._store([(entry, original)])
+    return entry.id
+
+
+def test_expiry_queue_pops_only_due_ids():
+    """Test due IDs pop earliest first and rescheduled or discarded IDs are skipped"""
+    queue = ExpiryQueue([("a", 30), ("b", 10)])
+    queue.add("c", 20)
+    queue.add("b", 50)
+    queue.discard("c")
+    assert queue.next_expiry() == 30
+    assert not queue.has_due(29)
+    assert queue.pop_due(40) == ["a"]
+    assert queue.pop_due(100) == ["b"]
+    assert len(queue) == 0 and queue.next_expiry() is None
+
+    # Looking for the next deadline leaves stale entries in place
+    queue = ExpiryQueue([("a", 10), ("b", 20), ("c", 30)])
+    queue.add("a", 40)
+    queue.discard("b")
+    heap = list(queue._heap)
+    assert queue.next_expiry() == 30 and queue.has_due(30)
+    assert queue._heap == heap
+
+
+def test_expired_memories_are_hidden_then_purged():
+    """Test writes purge expired memories and reads skip any not purged yet"""
+    memory = Memory(local_mode=True, config=MemoryConfig(retention_days=30))
+    now = datetime.now(timezone.utc)
+    stale = store_at(memory, "Old launch checklist", now - timedelta(days=40), id="stale")
+    expired = store_at(memory, "Temporary launch code", now - timedelta(hours=2), ttl=3600, id="expired")
+    kept = store_at(memory, "Current launch plan", now - timedelta(hours=2), ttl=86400, id="kept")
+    assert len(memory._storage) == 1
+
+    # Put expired memories straight into storage, as if no purge had run yet
+    for memory_id, age, ttl in ((stale, timedelta(days=40), None), (expired, timedelta(hours=2), 3600)):
+        entry, original = memory._build_entry(f"Old launch {memory_id}", None, None, None, ttl, memory_id)
+        entry.timestamp = now - age
+        memory._storage.put_many([(entry, original)])
+    memory._expiry.add(expired, to_epoch_ns(now - timedelta(hours=1)))
+
+    assert memory.recall("launch") == ["Current launch plan"]
+    assert memory.recall("launch", strategy=RecallStrategy.RECENCY) == ["Current launch plan"]
+    assert [m["id"] for m in memory.list()] == [kept]
+    assert memory.list(offset=1) == []
+    assert not memory.exists(expired)
+    with pytest.raises(KeyError):
+        memory.get(stale)
+
+    assert memory.purge_expired() == 2
+    assert list(memory._storage) == [kept]
+    assert len(memory._expiry) == 1
+
+
+def test_ttl_survives_restart(tmp_path):
+    """Test deadlines of persisted memories are restored on open"""
+    memory = Memory(local_mode=True, path=str(tmp_path))
+    memory.remember("Short-lived note", ttl=3600, id="short")
+    memory.close()
+
+    memory = Memory(local_mode=True, path=str(tmp_path))
+    assert memory._expiry.expires_at("short") == memory._storage.timestamp_ns("short") + 3600 * 1_000_000_000
+    memory.close()
+
+
+def test_concurrent_lists_leave_the_queue_intact(monkeypatch):
+    """Test list() from many threads alongside ttl writes never loses a deadline"""
+    def slow_heappop(heap):
+        # Widen the gap between looking at the top of the heap and popping it
+        time.sleep(0.001)
+        return heapq.heappop(heap)
+
+    monkeypatch.setattr(expiry, "heapq", SimpleNamespace(
+        heappop=slow_heappop, heappush=heapq.heappush, heapify=heapq.heapify
+    ))
+    memory = Memory(local_mode=True)
+    memory.remember_batch([{"content": f"Kept note {i}", "ttl": 3600, "id": f"kept{i}"} for i in range(100)])
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                memory.list(limit=20)
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    try:
+        for reader in readers:
+            reader.start()
+        for round in range(30):
+            # Deleting the earliest deadlines leaves stale entries at the top
+            # of the heap for readers to look past
+            memory.remember_batch([{"content": f"Short note {i}", "ttl": 60} for i in range(5)], session_id=f"s{round}")
+            memory.clear_session(f"s{round}")
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert not errors
+    queue = memory._expiry
+    scheduled = {memory_id for expires, memory_id in queue._heap if queue.expires_at(memory_id) == expires}
+    assert scheduled == set(queue._deadline) and len(queue) == 100
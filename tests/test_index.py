@@ -0,0 +1,136 @@
+"""
+Tests for local memory indexes
+"""
+from agentmind.index import TermIndex, tokenize
+
+
+def test_tokenize():
+    """Test tokenization lowercases and strips punctuation"""
+    assert tokenize("User's name is John!") == ["user", "s", "name", "is", "john"]
+    assert tokenize("") == []
+
+
+def test_term_index_lookup():
+    """Test lookup returns matching IDs in insertion order"""
+    index = TermIndex()
+    index.add("a", "Python is great")
+    index.add("b", "Rust is fast")
+    index.add("c", "Python and Rust")
+    
+    assert index.lookup(["python"]) == ["a", "c"]
+    assert index.lookup(["rust", "python"]) == ["a", "b", "c"]
+    assert index.lookup(["java"]) == []
+    assert index.document_frequency("is") == 2
+
+
+def test_term_index_remove_and_replace():
+    """Test removed and re-indexed documents update postings"""
+    index = TermIndex()
+    index.add("a", "Python is great")
+    index.add("b", "Python again")
+    
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.lookup(["python"]) == ["b"]
+    assert index.document_frequency("great") == 0
+    
+    index.add("b", "Now about Go")
+    assert index.lookup(["python"]) == []
+    assert index.lookup(["go"]) == ["b"]
+    assert len(index) == 1
+
+
+def test_top_k_ranks_by_bm25():
+    """Test rarer and more frequent terms rank higher"""
+    index = TermIndex()
+    index.add("common", "the user said hello")
+    index.add("rare", "the user likes python")
+    index.add("both", "python python user")
+    
+    ranked = [doc for doc, _ in index.top_k(["python", "user"], 3)]
+    assert ranked == ["both", "rare", "common"]
+    
+    scores = [score for _, score in index.top_k(["python", "user"], 3)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_accept_and_limit():
+    """Test rejected documents are skipped and k bounds the output"""
+    index = TermIndex()
+    for i in range(20):
+        index.add(f"doc{i}", f"memory number {i}")
+    
+    results = index.top_k(["memory"], 5, accept=lambda d: d != "doc0")
+    assert len(results) == 5
+    assert "doc0" not in [doc for doc, _ in results]
+    assert index.top_k(["missing"], 5) == []
+    assert index.top_k(["memory"], 0) == []
+
+
+def test_top_k_pruning_matches_exhaustive():
+    """Test pruned top-k agrees with scoring every matching document"""
+    import random
+    
+    rng = random.Random(7)
+    vocab = ["alpha", "beta", "gamma", "delta", "common", "rare"]
+    weights = [10, 10, 10, 10, 60, 1]
+    index = TermIndex()
+    for i in range(500):
+        words = rng.choices(vocab, weights=weights, k=rng.randint(1, 12))
+        index.add(f"d{i}", " ".join(words))
+    
+    query = ["rare", "alpha", "common"]
+    exhaustive = index.top_k(query, len(index))
+    pruned = index.top_k(query, 5)
+    
+    assert [round(s, 9) for _, s in pruned] == [round(s, 9) for _, s in exhaustive[:5]]
+
+
+def test_field_index_and_intersect():
+    """Test field index bookkeeping and set intersection"""
+    from agentmind.index import FieldIndex, intersect
+    
+    index = FieldIndex()
+    index.add("a", ["x", "y"])
+    index.add("b", ["x"])
+    index.add("c", ["y"])
+    
+    assert list(index.get("x")) == ["a", "b"]
+    assert intersect([index.get("x"), index.get("y")]) == ["a"]
+    
+    index.remove("a", ["x", "y"])
+    assert list(index.get("x")) == ["b"]
+    assert index.counts() == {"x": 1, "y": 1}
+    assert list(index.get("missing")) == []
+
+
+def test_time_index_ordering_and_ranges():
+    """Test out-of-order inserts, ties, ranges and removal"""
+    from agentmind.index import TimeIndex
+    
+    index = TimeIndex()
+    index.add("b", 20)
+    index.add("d", 40)
+    index.add("a", 10)
+    index.add("c", 20)
+    
+    assert index.ids_between() == ["a", "b", "c", "d"]
+    assert index.ids_between(20, 40) == ["b", "c"]
+    assert index.ids_between(start_ns=20, newest_first=True) == ["d", "c", "b"]
+    assert index.count_between(end_ns=20) == 1
+    assert list(index.iter_newest(start=3, stop=1)) == ["c", "b"]
+    
+    assert index.remove("b", 20)
+    assert not index.remove("b", 20)
+    assert not index.remove("c", 30)
+    assert index.ids_between() == ["a", "c", "d"]
+
+
+def test_to_epoch_ns():
+    """Test exact conversion for aware and naive datetimes"""
+    from datetime import datetime, timezone
+    from agentmind.index import to_epoch_ns
+    
+    aware = datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+    assert to_epoch_ns(aware) == 1704164645123456000
+    assert to_epoch_ns(aware.replace(tzinfo=None)) == to_epoch_ns(aware)
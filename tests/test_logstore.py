@@ -0,0 +1,185 @@
+"""
+Tests for the write-ahead log storage backend
+"""
+import os
+import threading
+
+import pytest
+
+from agentmind import InMemoryStorage, Memory
+from agentmind.logstore import LogStorage
+
+
+def test_log_replays_on_restart(tmp_path):
+    """Test puts, deletes, confidence updates and embeddings survive a reopen"""
+    path = str(tmp_path / "store")
+    memory = Memory(local_mode=True, path=path)
+    keep = memory.remember({"city": "Paris"}, metadata={"tags": ["travel"]}, user_id="u1", ttl=60)
+    gone = memory.remember("Temporary note", session_id="s1")
+    memory.update_confidence(keep, 0.25)
+    memory.delete(gone)
+    memory.close()
+
+    memory = Memory(local_mode=True, path=path)
+    assert memory.exists(keep) and not memory.exists(gone)
+    data = memory.get(keep, include_metadata=True)
+    assert data["content"] == {"city": "Paris"}
+    assert data["metadata"]["confidence"] == 0.25
+    assert data["metadata"]["tags"] == ["travel"]
+    assert data["ttl"] == 60
+    assert len(memory._vectors) == 1
+    assert memory.recall("Paris", user_id="u1") == ['{"city": "Paris"}']
+    memory.close()
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    """Test a partially written record at the end of the log is ignored and truncated"""
+    path = str(tmp_path / "store")
+    storage = LogStorage(path)
+    memory = Memory(local_mode=True, storage=storage)
+    memory.remember("First", id="a")
+    memory.remember("Second", id="b")
+    memory.close()
+
+    segment = os.path.join(path, sorted(os.listdir(path))[-1])
+    size = os.path.getsize(segment)
+    with open(segment, "r+b") as f:
+        f.truncate(size - 3)
+
+    memory = Memory(local_mode=True, path=path)
+    assert memory.exists("a") and not memory.exists("b")
+    memory.remember("Third", id="c")
+    memory.close()
+
+    memory = Memory(local_mode=True, path=path)
+    assert [m["id"] for m in memory.list()] == ["c", "a"]
+    memory.close()
+
+
+def test_snapshot_replaces_segments(tmp_path):
+    """Test snapshots compact the log and later writes replay on top of them"""
+    path = str(tmp_path / "store")
+    storage = LogStorage(path, segment_bytes=512)
+    memory = Memory(local_mode=True, storage=storage)
+    for i in range(20):
+        memory.remember(f"Memory number {i}", id=f"m{i}")
+    for i in range(10):
+        memory.forget(f"m{i}")
+    storage.snapshot()
+    memory.remember("After snapshot", id="late")
+    memory.close()
+
+    names = sorted(os.listdir(path))
+    assert len([n for n in names if n.endswith(".snap")]) == 1
+    assert len([n for n in names if n.endswith(".log")]) <= 2
+
+    memory = Memory(local_mode=True, path=path)
+    assert len(memory.list(limit=100)) == 11
+    assert memory.get("m15") == "Memory number 15"
+    assert memory.recall("snapshot") == ["After snapshot"]
+    memory.close()
+
+
+def test_concurrent_writers_group_commit(tmp_path):
+    """Test writes from many threads are all durable"""
+    path = str(tmp_path / "store")
+    storage = LogStorage(path, snapshot_bytes=4096)
+    builder = Memory(local_mode=True)
+
+    def write(worker):
+        for i in range(25):
+            storage.put_many([builder._build_entry(f"w{worker} {i}", None, None, None, None, f"{worker}-{i}")])
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    storage.close()
+
+    reopened = LogStorage(path)
+    assert len(reopened) == 100
+    reopened.close()
+
+
+def test_snapshot_is_served_in_place(tmp_path):
+    """Test a reopened store leaves snapshot rows on disk and merges them with the replayed log"""
+    path = str(tmp_path / "store")
+    storage = LogStorage(path)
+    memory = Memory(local_mode=True, storage=storage)
+    for i in range(30):
+        memory.remember(f"Note {i} about {'tea' if i % 3 else 'coffee'}", id=f"m{i}", user_id=f"u{i % 2}")
+    storage.snapshot()
+    memory.close()
+
+    storage = LogStorage(path)
+    memory = Memory(local_mode=True, storage=storage)
+    assert len(storage) == 30 and len(storage._records) == 0
+    assert len(memory._vectors) == 30
+    memory.remember("Fresh note about coffee", id="m4", user_id="u0")
+    memory.remember("Another coffee note", id="new", user_id="u1")
+    memory.update_confidence("m5", 0.5)
+    memory.forget("m6")
+    assert len(storage._records) == 3
+
+    # Scores match a single index holding the same memories in the same order
+    reference = InMemoryStorage()
+    reference.put_many([(storage.entry(m), storage.content(m)) for m in storage])
+    for user_id in (None, "u0"):
+        expected = reference.search(["coffee", "note"], 8, user_id)
+        found = storage.search(["coffee", "note"], 8, user_id)
+        assert [m for m, _ in found] == [m for m, _ in expected]
+        assert [s for _, s in found] == pytest.approx([s for _, s in expected])
+    assert storage.ids()[-3:] == ["m4", "new", "m5"] and "m6" not in storage.ids()
+    assert list(storage.iter_newest()) == reference.time_range(newest_first=True)
+    assert storage.category_counts() == {None: 30} and storage.user_count() == 2
+    memory.close()
+
+    # The log replays over the snapshot, and a new snapshot folds both in
+    storage = LogStorage(path)
+    memory = Memory(local_mode=True, storage=storage)
+    assert len(storage) == 30 and sorted(storage._records) == ["m4", "m5", "new"]
+    assert memory.get("m4") == "Fresh note about coffee" and not memory.exists("m6")
+    assert storage.confidence("m5") == 0.5 and len(memory._vectors) == 30
+    storage.snapshot()
+    memory.close()
+
+    storage = LogStorage(path)
+    assert len([n for n in os.listdir(path) if n.endswith(".snap")]) == 1
+    assert len(storage) == 30 and len(storage._records) == 0
+    assert storage.confidence("m5") == 0.5 and storage.text("m4") == "Fresh note about coffee"
+    storage.close()
+
+
+def test_snapshot_replaces_the_tail(tmp_path):
+    """Test a written snapshot becomes the base and only changes made while it was written stay in the tail"""
+    path = str(tmp_path / "store")
+    storage = LogStorage(path)
+    memory = Memory(local_mode=True, storage=storage)
+    for i in range(20):
+        memory.remember(f"Note {i} about tea", id=f"m{i}")
+    storage.snapshot()
+    assert len(storage._records) == 0 and len(storage) == 20
+    first = storage._base.path
+
+    # Changes made between the start of a snapshot and its swap stay in the tail
+    memory.remember("Note about coffee", id="before")
+    started = storage._begin_snapshot()
+    memory.remember("Later note about coffee", id="during")
+    memory.forget("m1")
+    memory.update_confidence("m2", 0.5)
+    storage._written = storage._write_snapshot(*started)
+    memory.remember("Last note", id="after")
+
+    assert sorted(storage._records) == ["after", "during", "m2"]
+    assert not os.path.exists(first)
+    assert len(storage) == 22 and "m1" not in storage and "before" in storage
+    assert storage.confidence("m2") == 0.5 and len(memory._vectors) == 22
+    assert [m for m, _ in storage.search(["coffee"], 5)] == ["before", "during"]
+    memory.close()
+
+    storage = LogStorage(path)
+    # Only the log written since the second snapshot is replayed
+    assert len(storage) == 22 and storage.text("during") == "Later note about coffee"
+    assert sorted(storage._records) == ["after", "during", "m2"] and "m1" not in storage
+    storage.close()
@@ -405,4 +405,114 @@ def test_delete_complex_type(memory):
     # Should not exist in either cache
     assert not memory.exists(memory_id)
     with pytest.raises(KeyError):
-        memory.get(memory_id)
\ No newline at end of file
+        memory.get(memory_id)
+
+def test_recall_index_tracks_deletions(memory):
+    """Test recall never returns memories removed by any delete path"""
+    forgotten = memory.remember("Python fact one")
+    deleted = memory.remember("Python fact two")
+    memory.remember("Python fact three", session_id="s1")
+    memory.remember("Python fact four", user_id="gone_user")
+    kept = memory.remember("Python fact five")
+    
+    memory.forget(forgotten)
+    memory.delete(deleted)
+    memory.clear_session("s1")
+    memory.delete_user_data("gone_user")
+    
+    assert memory.recall("python", limit=10) == ["Python fact five"]
+    assert memory.get(kept) == "Python fact five"
+
+
+def test_recall_reindexes_overwritten_id(memory):
+    """Test remembering with an existing ID replaces the indexed content"""
+    memory.remember("Old content about cats", id="pet")
+    memory.remember("New content about dogs", id="pet")
+    
+    assert memory.recall("cats") == []
+    assert memory.recall("dogs") == ["New content about dogs"]
+
+
+def test_recall_ranked_by_relevance(memory):
+    """Test hybrid recall ranks the most relevant memory first"""
+    memory.remember("The weather is nice today")
+    memory.remember("User enjoys Python and writes Python daily")
+    memory.remember("User mentioned Python once")
+    
+    results = memory.recall("python", strategy=RecallStrategy.SEMANTIC, limit=2)
+    assert results == [
+        "User enjoys Python and writes Python daily",
+        "User mentioned Python once"
+    ]
+
+
+def test_secondary_indexes_follow_mutations(memory):
+    """Test per-user, per-session and category lookups stay consistent"""
+    memory.remember("Alpha note", user_id="u1", session_id="s1", metadata={"category": "a", "tags": ["t1"]})
+    memory.remember("Beta note", user_id="u2", session_id="s1", metadata={"category": "b", "tags": ["t2"]})
+    memory.remember("Gamma note", user_id="u1", session_id="s2", metadata={"category": "a"}, id="gamma")
+    
+    assert [f["content"] for f in memory.get_facts(category="a", user_id="u1")] == ["Alpha note", "Gamma note"]
+    assert "2 memories" in memory.summarize_session("s1")
+    assert [m["preview"] for m in memory.list(user_id="u1", tags="t1")] == ["Alpha note"]
+    
+    # Overwriting an ID moves it between users and categories
+    memory.remember("Gamma moved", user_id="u2", metadata={"category": "b"}, id="gamma")
+    assert [f["content"] for f in memory.get_facts(category="a")] == ["Alpha note"]
+    assert memory.export_user_data("u2")["memory_count"] == 2
+    
+    assert memory.clear_session("s1") == 2
+    assert memory.delete_user_data("u1") == 0
+    assert memory.get_stats().total_users == 1
+    assert memory.recall("gamma", user_id="u2") == ["Gamma moved"]
+
+
+def test_time_ordered_queries(memory):
+    """Test newest-first listing, recent memories and retention purges"""
+    # The first two memories are backdated by three days
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    ids = []
+    for i in range(6):
+        entry, content = memory._build_entry(
+            f"Timed memory {i}", None, "u1" if i % 2 else "u2", None, None, None
+        )
+        if i < 2:
+            entry.timestamp = old + timedelta(seconds=i)
+        memory._store([(entry, content)])
+        ids.append(entry.id)
+    
+    assert [m["id"] for m in memory.list(limit=2)] == [ids[5], ids[4]]
+    assert [m["id"] for m in memory.list(limit=2, offset=4)] == [ids[1], ids[0]]
+    assert memory.get_recent(hours=1)[0] == "Timed memory 5"
+    assert len(memory.get_recent(hours=1, user_id="u1")) == 2
+    
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+    assert memory.forget_before(cutoff, user_id="u1") == 1
+    assert memory.forget_before(cutoff) == 1
+    assert len(memory.list()) == 4
+
+
+def test_cursor_pagination(memory):
+    """Test keyset pages and lazy scans over the newest-first ordering"""
+    for i in range(10):
+        memory.remember(f"Paged memory {i}", user_id="u1" if i % 3 else "u2")
+    
+    seen = []
+    cursor = None
+    while True:
+        page = memory.list_page(limit=4, cursor=cursor)
+        seen.extend(m["id"] for m in page["memories"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [m["id"] for m in memory.list()]
+    
+    # Writes between pages neither repeat nor skip older memories
+    first = memory.list_page(limit=3, user_id="u1")
+    memory.remember("Late memory", user_id="u1")
+    rest = [m["id"] for m in memory.scan(batch_size=2, user_id="u1")]
+    second = memory.list_page(limit=10, cursor=first["next_cursor"], user_id="u1")
+    assert [m["id"] for m in first["memories"]] + [m["id"] for m in second["memories"]] == rest[1:]
+    
+    with pytest.raises(ValueError):
+        memory.list_page(cursor="not-a-cursor")
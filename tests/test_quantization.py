@@ -0,0 +1,121 @@
+"""
+Tests for quantized embedding storage
+"""
+import threading
+
+import numpy as np
+import pytest
+
+from agentmind import Memory, MemoryConfig
+from agentmind.quantization import ProductQuantizer, ScalarQuantizer
+from agentmind.vectors import EmbeddingStore, QuantizedEmbeddingStore
+
+
+def unit_vectors(n, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(25, dim))
+    vectors = centers[rng.integers(25, size=n)] + 0.4 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_scalar_quantizer_round_trip():
+    """Test int8 codes decode close to the originals"""
+    vectors = unit_vectors(2000)
+    sq = ScalarQuantizer()
+    sq.train(vectors)
+    codes = sq.encode(vectors)
+    
+    assert codes.dtype == np.uint8
+    assert codes.shape == vectors.shape
+    assert np.abs(sq.decode(codes) - vectors).max() < 0.02
+    
+    query = vectors[:3]
+    assert np.allclose(sq.score(codes, query), vectors @ query.T, atol=0.05)
+
+
+def test_product_quantizer_codes_and_scores():
+    """Test PQ compresses to m bytes and approximates inner products"""
+    vectors = unit_vectors(3000)
+    pq = ProductQuantizer(m=8)
+    pq.train(vectors)
+    codes = pq.encode(vectors)
+    
+    assert codes.shape == (3000, 8)
+    approx = pq.score(codes, vectors[:5])
+    exact = vectors @ vectors[:5].T
+    assert np.corrcoef(approx.ravel(), exact.ravel())[0, 1] > 0.9
+    
+    with pytest.raises(ValueError):
+        ProductQuantizer(m=5).code_size(32)
+
+
+@pytest.mark.parametrize("quantizer", [ScalarQuantizer, lambda: ProductQuantizer(m=8)])
+def test_quantized_store_matches_exact_top_k(quantizer, tmp_path):
+    """Test reranked quantized search stays close to exact search"""
+    vectors = unit_vectors(12000)
+    ids = [f"m{i}" for i in range(len(vectors))]
+    exact = EmbeddingStore()
+    exact.add_many(ids, vectors)
+    store = QuantizedEmbeddingStore(quantizer(), path=str(tmp_path / "vectors.f32"), rerank=8)
+    store.add_many(ids, vectors)
+    store.wait_for_codes()
+    
+    assert store.quantizer.trained
+    assert store.nbytes * 4 <= exact.nbytes
+    
+    queries = unit_vectors(20, seed=3)
+    hits = 0
+    for query, want, got in zip(queries, exact.search(queries, 10), store.search(queries, 10)):
+        hits += len({m for m, _ in want} & {m for m, _ in got})
+        # Reranked scores are exact cosine similarities
+        best_id, best_score = got[0]
+        assert best_score == pytest.approx(float(vectors[int(best_id[1:])] @ query), abs=1e-5)
+    assert hits / 200 >= 0.9
+    
+    assert np.allclose(store.get("m5"), vectors[5], atol=1e-6)
+    store.close()
+
+
+def test_quantized_store_deletes_and_compaction(tmp_path):
+    """Test tombstones and compaction keep codes and disk rows aligned"""
+    vectors = unit_vectors(1500)
+    store = QuantizedEmbeddingStore(ScalarQuantizer(), path=str(tmp_path / "v.f32"))
+    store.add_many([f"m{i}" for i in range(1500)], vectors)
+    for i in range(0, 1000):
+        store.remove(f"m{i}")
+    
+    assert len(store) == 500
+    assert store.search(vectors[1200], 1)[0][0][0] == "m1200"
+    assert np.allclose(store.get("m1499"), vectors[1499], atol=1e-6)
+
+
+def test_quantizer_trains_off_the_write_path(tmp_path):
+    """Test adds return while the quantizer trains, searches use the disk vectors, and codes swap in when done"""
+    vectors = unit_vectors(1500)
+    release = threading.Event()
+    
+    class SlowQuantizer(ScalarQuantizer):
+        def train(self, vectors):
+            release.wait()
+            super().train(vectors)
+    
+    store = QuantizedEmbeddingStore(SlowQuantizer(), path=str(tmp_path / "v.f32"))
+    store.add_many([f"m{i}" for i in range(1200)], vectors[:1200])
+    store.add_many([f"m{i}" for i in range(1200, 1500)], vectors[1200:])
+    assert not store.quantizer.trained and store.nbytes == 0
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    
+    release.set()
+    store.wait_for_codes()
+    assert store.quantizer.trained and store.nbytes > 0
+    # Rows appended during training were encoded at the swap
+    assert np.abs(store.quantizer.decode(store._codes[1450:1451]) - vectors[1450]).max() < 0.02
+    assert store.search(vectors[1450], 1)[0][0][0] == "m1450"
+    store.close()
+
+
+def test_memory_uses_quantized_storage():
+    """Test MemoryConfig.embedding_storage selects a quantized store"""
+    memory = Memory(local_mode=True, config=MemoryConfig(embedding_storage="int8"))
+    assert isinstance(memory._vectors, QuantizedEmbeddingStore)
+    assert isinstance(memory._vectors.quantizer, ScalarQuantizer)
@@ -0,0 +1,98 @@
+"""
+Tests for client-side rate limiting against a local stub server
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from agentmind import Memory, TokenBucket
+from agentmind.client import APIClient, RateLimitError
+from agentmind.ratelimit import parse_retry_after
+from agentmind.retry import RetryPolicy
+
+
+def test_token_bucket_bursts_and_adapts(clock):
+    """Test bursts up to capacity, steady refill, and backing off on 429"""
+    bucket = TokenBucket(rate=8, burst=5, clock=clock)
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+    assert bucket._take(1) == 0.125
+    clock.now += 0.125
+    assert bucket.try_acquire()
+
+    bucket.on_rate_limited(retry_after=2.0)
+    assert bucket.rate == 4
+    assert bucket._take(1) == 2.0
+    clock.now += 2.0
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 8
+    with pytest.raises(ValueError):
+        bucket.acquire(tokens=6)
+
+
+def test_parse_retry_after():
+    """Test both Retry-After forms and garbage"""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert parse_retry_after(earlier) == 0.0
+
+
+def test_client_bursts_past_old_fixed_rate(stub_server):
+    """Test a client sends a burst without the old 100ms spacing"""
+    url, state = stub_server
+    client = APIClient("am_test_key", url, rate_limiter=TokenBucket(rate=1000, burst=50))
+    started = time.perf_counter()
+    for _ in range(30):
+        assert client.health_check()
+    # 30 requests at the old 10 req/sec would take 2.9s
+    assert time.perf_counter() - started < 1.5
+    assert len(state.requests) == 30
+
+
+def test_client_honours_retry_after(stub_server):
+    """Test a 429 raises with the server's delay and holds the next request"""
+    url, state = stub_server
+    limiter = TokenBucket(rate=100, burst=10)
+    client = APIClient("am_test_key", url, rate_limiter=limiter, retry_policy=RetryPolicy(max_attempts=1))
+    state.responses.append((429, {"Retry-After": "0.3"}))
+    with pytest.raises(RateLimitError) as excinfo:
+        client.get_usage()
+    assert excinfo.value.retry_after == 0.3
+    assert limiter.rate == 50
+
+    started = time.perf_counter()
+    client.get_usage()
+    assert time.perf_counter() - started >= 0.25
+
+
+def test_clients_share_one_bucket(stub_server):
+    """Test clients in several threads draw on a shared budget"""
+    url, state = stub_server
+    limiter = TokenBucket(rate=50, burst=5)
+    memories = [Memory(api_key="am_test_key", base_url=url, rate_limiter=limiter) for _ in range(2)]
+    assert all(memory.client.rate_limiter is limiter for memory in memories)
+
+    def worker(client):
+        for _ in range(10):
+            client.health_check()
+
+    threads = [threading.Thread(target=worker, args=(memory.client,)) for memory in memories]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 5 requests from the burst, the other 15 at 50 req/sec
+    assert time.perf_counter() - started >= 0.28
+    assert len(state.requests) == 20
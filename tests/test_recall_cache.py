@@ -0,0 +1,71 @@
+"""
+Tests for the recall result cache
+"""
+import time
+
+from agentmind import Memory, MemoryConfig, RecallStrategy
+from agentmind.recall_cache import RecallCache, recall_key
+
+
+def test_recall_cache_generations_and_eviction():
+    """Test entries go stale with their generation and the LRU bound holds"""
+    cache = RecallCache(max_entries=2)
+    key = recall_key("Dark  MODE?", "hybrid", 5, None, {"category": "ui"})
+    assert key == recall_key("dark mode", "hybrid", 5, "", {"category": "ui"})
+
+    cache.put(key, 3, ["a", "b"])
+    assert cache.get(key, 3) == ["a", "b"]
+    assert cache.get(key, 4) is None
+    assert len(cache) == 0
+
+    for i in range(3):
+        cache.put(("q", i), 0, [])
+    assert cache.get(("q", 0), 0) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "evictions": 1, "entries": 2}
+
+
+def test_repeated_recalls_are_served_from_cache():
+    """Test identical and near-identical recalls skip the search until a write"""
+    memory = Memory(local_mode=True)
+    memory.remember("User prefers dark mode", user_id="alice")
+    memory.remember("User likes Python", user_id="bob")
+
+    assert memory.recall("dark mode", user_id="alice") == ["User prefers dark mode"]
+    assert memory.recall("Dark mode?", user_id="alice") == ["User prefers dark mode"]
+    assert memory.recall_cache.hits == 1
+
+    # Another user's write leaves alice's recalls cached
+    memory.remember("Bob prefers light mode", user_id="bob")
+    assert memory.recall("dark mode", user_id="alice") == ["User prefers dark mode"]
+    assert memory.recall_cache.hits == 2
+
+    memory.remember("User wants dark mode in the editor", user_id="alice")
+    assert len(memory.recall("dark mode", user_id="alice")) == 2
+    assert memory.recall_cache.hits == 2
+
+
+def test_deletes_and_expiry_invalidate():
+    """Test removed or expired memories never come back from the cache"""
+    memory = Memory(local_mode=True, config=MemoryConfig(recall_cache_size=16))
+    keep = memory.remember("Deploy window is Friday")
+    brief = memory.remember("Deploy freeze this week", ttl=1)
+    recalled = memory.recall("deploy", strategy=RecallStrategy.RECENCY)
+    assert sorted(recalled) == ["Deploy freeze this week", "Deploy window is Friday"]
+
+    memory._expiry.add(brief, time.time_ns() - 1)
+    assert memory.recall("deploy", strategy=RecallStrategy.RECENCY) == ["Deploy window is Friday"]
+
+    memory.delete(keep)
+    assert memory.recall("deploy", strategy=RecallStrategy.RECENCY) == []
+    assert memory.recall_cache.hits == 0
+
+
+def test_overwriting_another_users_id_invalidates_their_recalls():
+    """Test a memory ID taken over by another user leaves the previous owner's recalls"""
+    memory = Memory(local_mode=True)
+    memory.remember("Alice has two cats", user_id="alice", id="x")
+    assert memory.recall("cats", user_id="alice") == ["Alice has two cats"]
+
+    memory.remember("Bob is allergic to cats", user_id="bob", id="x")
+    assert memory.recall("cats", user_id="alice") == []
+    assert memory.recall("cats", user_id="bob") == ["Bob is allergic to cats"]
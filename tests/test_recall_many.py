@@ -0,0 +1,51 @@
+"""
+Tests for batched multi-query recall
+"""
+import asyncio
+
+from agentmind import AsyncMemory, Memory, RecallStrategy
+from agentmind.index import TermIndex, tokenize
+
+
+def test_top_k_many_matches_top_k():
+    """Test the batched BM25 search returns what one search per query does"""
+    index = TermIndex()
+    for i, text in enumerate(["dark mode editor", "python editor", "dark roast coffee", "deploy on friday"]):
+        index.add(f"m{i}", text)
+    queries = [tokenize(q) for q in ("dark editor", "python", "coffee friday", "unknown")]
+    accept = lambda memory_id: memory_id != "m1"
+    assert index.top_k_many(queries, 2, accept) == [index.top_k(q, 2, accept) for q in queries]
+    assert index.top_k_many(queries, 0) == [[], [], [], []]
+
+
+def test_recall_many_matches_recall():
+    """Test every strategy answers each query as recall() would, in order"""
+    memory = Memory(local_mode=True)
+    memory.remember("User prefers dark mode", user_id="alice")
+    memory.remember("User writes Python services", user_id="alice")
+    memory.remember("User deploys on Fridays", user_id="bob")
+    memory.remember("Team standup is at nine", user_id="bob")
+
+    queries = ["dark mode", "python", "deploy fridays", "dark mode", "standup"]
+    for strategy in RecallStrategy:
+        for user_id in (None, "alice"):
+            expected = [memory.recall(q, strategy=strategy, limit=2, user_id=user_id) for q in queries]
+            memory.recall_cache.clear()
+            assert memory.recall_many(queries, strategy=strategy, limit=2, user_id=user_id) == expected
+    assert memory.recall_many([]) == []
+
+
+def test_recall_many_uses_and_fills_the_cache():
+    """Test cached queries are not searched again and duplicates are searched once"""
+    memory = Memory(local_mode=True)
+    memory.remember("User prefers dark mode")
+    memory.recall("dark mode")
+    results = memory.recall_many(["Dark mode", "coffee", "coffee"])
+    assert results == [["User prefers dark mode"], [], []]
+    assert memory.recall_cache.hits == 1 and len(memory.recall_cache) == 2
+
+    async def run():
+        async with AsyncMemory(local_mode=True) as async_memory:
+            await async_memory.remember("User prefers dark mode")
+            return await async_memory.recall_many(["dark", "mode"])
+    assert asyncio.run(run()) == [["User prefers dark mode"], ["User prefers dark mode"]]
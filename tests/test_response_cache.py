@@ -0,0 +1,101 @@
+"""
+Tests for the hosted-mode read-through cache
+"""
+import pytest
+
+from agentmind import Memory, MemoryConfig, RecallStrategy, TokenBucket
+from agentmind.client import APIClient
+from agentmind.response_cache import MISS, NOT_FOUND, ResponseCache
+
+
+def hosted_memory(url, **config):
+    return Memory(api_key="am_test_key", base_url=url, config=MemoryConfig(hosted_sync=True, **config))
+
+
+def test_response_cache_ttl_and_eviction(clock):
+    """Test fresh, stale, negative and evicted entries"""
+    cache = ResponseCache(ttl=10, negative_ttl=2, max_entries=2, clock=clock)
+    cache.put(("memory", "a"), {"content": "A"}, etag='"1"')
+    cache.put_missing(("memory", "b"))
+    assert cache.get(("memory", "a")) == {"content": "A"}
+    assert cache.get(("memory", "b")) is NOT_FOUND
+
+    clock.now += 5
+    assert cache.get(("memory", "b")) is MISS
+    clock.now += 5
+    # Stale but still revalidatable
+    assert cache.get(("memory", "a")) is MISS
+    assert cache.etag(("memory", "a")) == '"1"'
+    assert cache.revalidate(("memory", "a")) == {"content": "A"}
+    assert cache.get(("memory", "a")) == {"content": "A"}
+
+    cache.put(("recall", "q1"), {"memories": []})
+    cache.put(("recall", "q2"), {"memories": []})
+    assert cache.get(("memory", "a")) is MISS and len(cache) == 2
+    cache.invalidate_kind("recall")
+    assert len(cache) == 0
+
+
+def test_repeated_reads_hit_the_network_once(stub_server):
+    """Test repeated get, identical recall and missing IDs are answered from the cache"""
+    url, state = stub_server
+    memory = hosted_memory(url)
+    memory_id = memory.remember("User prefers dark mode")
+    assert state.memories[memory_id]["content"] == "User prefers dark mode"
+    sent = len(state.requests)
+
+    for _ in range(3):
+        assert memory.get(memory_id) == "User prefers dark mode"
+        assert memory.recall("dark mode", strategy=RecallStrategy.RECENCY) == ["User prefers dark mode"]
+        with pytest.raises(KeyError):
+            memory.get("mem_missing")
+    assert [path for _, path, _, _ in state.requests[sent:]] == [f"/memories/{memory_id}", "/recall", "/memories/mem_missing"]
+    assert memory.get(memory_id, include_metadata=True)["id"] == memory_id
+
+
+def test_stale_entries_revalidate_with_etag(stub_server):
+    """Test an expired entry is refreshed by a 304 without a new body"""
+    url, state = stub_server
+    memory = hosted_memory(url, api_cache_ttl=0)
+    memory_id = memory.remember("User prefers dark mode")
+    memory.get(memory_id)
+    memory.get(memory_id)
+    (_, _, first, _), (_, _, second, _) = state.requests[-2:]
+    assert "If-None-Match" not in first
+    assert second["If-None-Match"]
+    assert memory.client.cache.hits == 0
+
+
+def test_own_writes_invalidate(stub_server):
+    """Test storing and deleting through Memory drops cached reads they affect"""
+    url, state = stub_server
+    memory = hosted_memory(url)
+    first = memory.remember("User prefers dark mode")
+    assert memory.recall("mode", strategy=RecallStrategy.RECENCY) == ["User prefers dark mode"]
+    memory.remember("User wants compact mode")
+    assert len(memory.recall("mode", strategy=RecallStrategy.RECENCY)) == 2
+
+    memory.get(first)
+    assert memory.delete(first)
+    with pytest.raises(KeyError):
+        memory.get(first)
+    assert not memory.delete(first)
+    assert memory.recall("mode", strategy=RecallStrategy.RECENCY) == ["User wants compact mode"]
+
+
+def test_not_modified_after_invalidation_refetches(stub_server):
+    """Test a 304 for an entry dropped in the meantime is answered by fetching the body again"""
+    class RacingCache(ResponseCache):
+        def revalidate(self, key):
+            # A concurrent write invalidated the entry while the request was in flight
+            self.invalidate(key)
+            return super().revalidate(key)
+
+    url, state = stub_server
+    client = APIClient("am_test_key", url, rate_limiter=TokenBucket(rate=1000, burst=100), cache=RacingCache(ttl=0))
+    client.store_memory({"id": "a", "content": "User prefers dark mode"})
+    client.get_memory("a")
+    assert client.get_memory("a")["content"] == "User prefers dark mode"
+    (_, _, first, _), (_, _, conditional, _), (_, _, retried, _) = state.requests[1:]
+    assert "If-None-Match" not in first and conditional["If-None-Match"]
+    assert "If-None-Match" not in retried
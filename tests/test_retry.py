@@ -0,0 +1,141 @@
+"""
+Tests for retries, idempotency keys and the circuit breaker
+"""
+import socket
+
+import pytest
+
+from agentmind import Memory, MemoryConfig, TokenBucket
+from agentmind.client import APIClient, CircuitOpenError, ServerError
+from agentmind.retry import CircuitBreaker, RetryPolicy
+
+
+def fast_client(url, **kwargs):
+    """Client with short delays so tests do not sleep"""
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.02))
+    return APIClient("am_test_key", url, rate_limiter=TokenBucket(rate=1000, burst=100), **kwargs)
+
+
+def test_retry_delays_and_breaker_states(clock):
+    """Test backoff bounds and the closed -> open -> half-open -> closed cycle"""
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=3.0)
+    assert all(0 <= policy.delay(1) <= 1.0 for _ in range(50))
+    assert all(0 <= policy.delay(5) <= 3.0 for _ in range(50))
+    assert policy.delay(1, retry_after=10) == 10
+    assert RetryPolicy(base_delay=1.0, jitter=False).delay(3) == 4.0
+    assert policy.should_retry(2) and not policy.should_retry(3)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock.now += 5
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_transient_errors_are_retried(stub_server):
+    """Test 5xx and 429 responses are retried until the request succeeds"""
+    url, state = stub_server
+    state.responses.extend([(503, {}), (429, {"Retry-After": "0"}), (502, {})])
+    client = fast_client(url)
+    assert client.get_usage()["path"] == "/usage"
+    assert len(state.requests) == 4
+
+    state.responses.extend([(500, {})] * 4)
+    with pytest.raises(ServerError):
+        client.get_usage()
+    assert len(state.requests) == 8
+
+
+def test_stores_retry_with_one_idempotency_key(stub_server):
+    """Test a retried store sends the same key every time, and new stores a new one"""
+    url, state = stub_server
+    state.responses.extend([(503, {}), (503, {})])
+    client = fast_client(url)
+    client.store_memory({"content": "User likes tea"})
+    client.store_memory({"content": "User likes coffee"})
+    keys = [headers["Idempotency-Key"] for _, _, headers, _ in state.requests]
+    assert len(keys) == 4
+    assert keys[0] == keys[1] == keys[2] != keys[3]
+
+    # A POST without a key is never repeated
+    state.responses.append((503, {}))
+    with pytest.raises(ServerError):
+        client._make_request("POST", "/memories", data={"content": "x"})
+    assert len(state.requests) == 5
+
+
+def test_breaker_fails_fast_then_recovers(stub_server, clock):
+    """Test an open breaker stops requests reaching the server until it resets"""
+    url, state = stub_server
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    client = fast_client(url, circuit_breaker=breaker)
+    state.responses.extend([(503, {})] * 3)
+    with pytest.raises(ServerError):
+        client.get_usage()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get_usage()
+    assert len(state.requests) == 3
+
+    clock.now += 30
+    assert client.health_check()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_reads_fall_back_to_local_memory():
+    """Test gets and recalls are served locally while the service is unreachable"""
+    # Nothing listens on a port we just released
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = MemoryConfig(retry_attempts=2, retry_base_delay=0.01, breaker_failure_threshold=2)
+    memory = Memory(api_key="am_test_key", base_url=f"http://127.0.0.1:{port}", config=config)
+    memory_id = memory.remember("User prefers dark mode")
+
+    assert memory.client.get_memory(memory_id)["content"] == "User prefers dark mode"
+    assert memory.client.circuit_breaker.state == CircuitBreaker.OPEN
+    recalled = memory.client.recall_memories({"query": "dark mode", "strategy": "recency"})
+    assert recalled == {"memories": ["User prefers dark mode"], "source": "local"}
+
+    # Unknown reads and writes still raise
+    with pytest.raises(CircuitOpenError):
+        memory.client.get_memory("mem_missing")
+    with pytest.raises(CircuitOpenError):
+        memory.client.store_memory({"content": "x"})
+
+
+def test_failed_probe_never_wedges_the_breaker(stub_server, clock):
+    """Test a probe ending in an unmapped requests error or a local error releases the breaker"""
+    url, state = stub_server
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    client = fast_client(url, circuit_breaker=breaker, retry_policy=RetryPolicy(max_attempts=1))
+    state.responses.append((503, {}))
+    with pytest.raises(ServerError):
+        client.get_usage()
+
+    # The probe's body claims gzip but is not: requests raises ContentDecodingError
+    clock.now += 30
+    state.responses.append((200, {"Content-Encoding": "gzip"}))
+    with pytest.raises(ConnectionError):
+        client.get_usage()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A body that cannot be encoded never reaches the service
+    clock.now += 30
+    with pytest.raises(TypeError):
+        client._make_request("POST", "/recall", data={"query": object()})
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.health_check()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,88 @@
+"""
+Tests for columnar snapshot files
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from agentmind import Memory, RecallStrategy, SnapshotStorage
+from agentmind.index import to_epoch_ns
+
+
+def build_memory():
+    memory = Memory(local_mode=True)
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    for i in range(12):
+        entry, content = memory._build_entry(
+            f"Note {i} about python" if i % 4 else {"note": i, "topic": "python"},
+            {"tags": [f"t{i % 2}"], "category": "c" if i % 3 else None, "importance": i / 12},
+            f"u{i % 2}", f"s{i % 4}", 10 ** 7 if i == 5 else None, f"id{i:02d}"
+        )
+        # Pairs of memories share a timestamp so ties are ordered by ID
+        entry.timestamp = old + timedelta(hours=i // 2)
+        memory._store([(entry, content)])
+    return memory
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test every stored field survives a snapshot"""
+    memory = build_memory()
+    path = str(tmp_path / "memories.snap")
+    assert memory.save_snapshot(path) == 12
+
+    storage = SnapshotStorage(path)
+    assert list(storage) == list(memory._storage)
+    for memory_id in memory._storage:
+        assert storage.record(memory_id) == memory._storage.record(memory_id)
+        assert storage.entry(memory_id).model_dump() == memory._storage.entry(memory_id).model_dump()
+    assert "missing" not in storage
+    storage.close()
+
+
+def test_queries_match_in_memory_backend(tmp_path):
+    """Test search, filters and time-ordered scans against the default backend"""
+    default_memory = build_memory()
+    path = str(tmp_path / "memories.snap")
+    default_memory.save_snapshot(path)
+    snapshot_memory = Memory(local_mode=True, storage=SnapshotStorage(path))
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+
+    def results(memory):
+        page = memory.list_page(limit=5, user_id="u1")
+        return (
+            [m["id"] for m in memory.list()],
+            [m["id"] for m in memory.list(user_id="u1", offset=1)],
+            [m["id"] for m in memory.list_page(limit=5, cursor=page["next_cursor"], user_id="u1")["memories"]],
+            [m["id"] for m in memory.scan(batch_size=3, tags=["t0"])],
+            [m["id"] for m in memory.list(session_id="s1", category="c")],
+            memory._storage.search(["note", "python"], 5),
+            memory._storage.search(["python"], 3, user_id="u0"),
+            memory.recall("python", strategy=RecallStrategy.RECENCY, limit=3, user_id="u1"),
+            memory.get_facts(category="c", user_id="u1"),
+            memory.get_recent(hours=100, user_id="u0"),
+            memory._storage.time_range(to_epoch_ns(old + timedelta(hours=1)), to_epoch_ns(old + timedelta(hours=4))),
+            memory.get_stats().model_dump(exclude={"storage_used_mb"})
+        )
+
+    assert results(snapshot_memory) == results(default_memory)
+    snapshot_memory.close()
+
+
+def test_embeddings_are_searched_in_place(tmp_path):
+    """Test semantic recall reads the mapped embedding block without copying it"""
+    memory = Memory(local_mode=True)
+    memory.remember("The deploy pipeline runs on Fridays", id="deploy")
+    memory.remember("Alice prefers tea over coffee", id="tea", user_id="alice")
+    path = str(tmp_path / "memories.snap")
+    memory.save_snapshot(path)
+
+    reader = Memory(local_mode=True, storage=SnapshotStorage(path))
+    assert not reader._vectors._matrix.flags.owndata
+    assert len(reader._vectors) == 2
+    np.testing.assert_allclose(reader._vectors.get("tea"), memory._vectors.get("tea"))
+    query = "tea or coffee"
+    assert (
+        reader.recall(query, strategy=RecallStrategy.SEMANTIC, limit=1)
+        == memory.recall(query, strategy=RecallStrategy.SEMANTIC, limit=1)
+    )
+    reader.close()
@@ -0,0 +1,120 @@
+"""
+Tests for the write-behind spool
+"""
+import socket
+import threading
+import time
+
+import pytest
+
+from agentmind import Memory, MemoryConfig, RecallStrategy
+from agentmind.client import AuthenticationError, SpoolFullError
+from agentmind.spool import WriteSpool
+
+
+def dead_url():
+    """URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_writes_return_immediately_and_read_back(tmp_path):
+    """Test remember does not wait for an unreachable service, and reads see queued writes"""
+    config = MemoryConfig(write_behind=True, spool_path=str(tmp_path / "writes.spool"), retry_attempts=1)
+    memory = Memory(api_key="am_test_key", base_url=dead_url(), config=config)
+
+    started = time.perf_counter()
+    ids = [memory.remember(f"Turn {i}: user asked about deploy windows") for i in range(200)]
+    assert (time.perf_counter() - started) / 200 < 0.005
+    assert memory.get(ids[0]) == "Turn 0: user asked about deploy windows"
+    queued = memory.get(ids[1], include_metadata=True)
+    assert queued["id"] == ids[1]
+    assert queued == memory._get_local(ids[1], include_metadata=True)
+
+    assert memory.delete(ids[0])
+    with pytest.raises(KeyError):
+        memory.get(ids[0])
+    recalled = memory.recall("deploy", limit=3, strategy=RecallStrategy.RECENCY)
+    assert recalled == [f"Turn {i}: user asked about deploy windows" for i in (199, 198, 197)]
+    assert not memory.flush(timeout=0.05)
+    memory.close()
+
+
+def test_spool_survives_restart_and_keeps_order(tmp_path, stub_server, make_client):
+    """Test queued operations outlive the process and are sent in order, batched by kind"""
+    path = str(tmp_path / "writes.spool")
+    spool = WriteSpool(make_client(dead_url()), path=path, retry_interval=10)
+    spool.put_store("a", {"id": "a", "content": "first"})
+    spool.put_store("b", {"id": "b", "content": "other"})
+    spool.put_delete("a", "first")
+    spool.put_store("a", {"id": "a", "content": "second"})
+    assert spool.pending("a") == ("store", {"id": "a", "content": "second"})
+    spool.close(timeout=0.05)
+
+    url, state = stub_server
+    spool = WriteSpool(make_client(url), path=path)
+    assert len(spool) == 4 and spool.pending("b") == ("store", {"id": "b", "content": "other"})
+    assert spool.flush(timeout=5)
+    assert [(path, body) for _, path, _, body in state.requests] == [
+        ("/memories/batch", {"memories": [{"id": "a", "content": "first"}, {"id": "b", "content": "other"}]}),
+        ("/memories/batch/delete", {"ids": ["a"]}),
+        ("/memories/batch", {"memories": [{"id": "a", "content": "second"}]}),
+    ]
+    assert spool.pending("a") is None and spool.sent == 4
+    spool.close()
+
+
+def test_full_spool_applies_backpressure(make_client):
+    """Test writers wait, then fail, once max_pending operations are queued"""
+    spool = WriteSpool(make_client(dead_url()), max_pending=3, put_timeout=0.1, retry_interval=10)
+    for i in range(3):
+        spool.put_store(f"m{i}", {"id": f"m{i}", "content": "x"})
+    started = time.perf_counter()
+    with pytest.raises(SpoolFullError):
+        spool.put_delete("m0")
+    assert time.perf_counter() - started >= 0.1
+    spool.close(timeout=0)
+
+
+def test_full_spool_does_not_block_readers(stub_server):
+    """Test a writer waiting for spool capacity holds no lock readers need"""
+    url, state = stub_server
+    config = MemoryConfig(write_behind=True, spool_max_pending=1)
+    memory = Memory(api_key="am_test_key", base_url=url, config=config)
+    state.latency = 0.5
+    first = memory.remember("User prefers dark mode")
+
+    # Waits until the first store has been sent
+    writer = threading.Thread(target=memory.remember, args=("User likes tea",))
+    writer.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    assert memory.exists(first)
+    assert memory.get_stats().total_memories == 1
+    assert time.perf_counter() - started < 0.1
+    writer.join()
+    assert memory.flush(timeout=5)
+    memory.close()
+
+
+def test_rejected_key_stops_the_flusher(tmp_path, stub_server, make_client):
+    """Test a 401 parks the queue and surfaces from flush and put instead of retrying"""
+    url, state = stub_server
+    path = str(tmp_path / "writes.spool")
+    state.responses.append((401, {}))
+    spool = WriteSpool(make_client(url), path=path, retry_interval=0.01)
+    spool.put_store("a", {"id": "a", "content": "first"})
+    with pytest.raises(AuthenticationError):
+        spool.flush(timeout=5)
+    with pytest.raises(AuthenticationError):
+        spool.put_store("b", {"id": "b", "content": "other"})
+    time.sleep(0.05)
+    assert len(state.requests) == 1 and len(spool) == 1 and spool.dropped == 0
+    spool.close()
+
+    # Opening the spool again resumes with the parked rows
+    spool = WriteSpool(make_client(url), path=path)
+    assert spool.flush(timeout=5) and spool.sent == 1
+    assert state.requests[-1][1] == "/memories/batch"
+    spool.close()
@@ -0,0 +1,87 @@
+"""
+Tests for the SQLite storage backend
+"""
+from datetime import datetime, timedelta, timezone
+
+from agentmind import Memory, RecallStrategy, SQLiteStorage
+
+
+def open_memory(path):
+    return Memory(local_mode=True, storage=SQLiteStorage(str(path)))
+
+
+def test_memories_survive_restart(tmp_path):
+    """Test content, metadata and embeddings are reloaded from disk"""
+    path = tmp_path / "memories.db"
+    memory = open_memory(path)
+    memory_id = memory.remember(
+        {"language": "Python"},
+        metadata={"category": "preference", "tags": ["code"], "team": "core"},
+        user_id="u1"
+    )
+    memory.remember("Meeting notes about the database migration", user_id="u2", session_id="s1")
+    memory.close()
+
+    memory = open_memory(path)
+    assert len(memory.list()) == 2
+    data = memory.get(memory_id, include_metadata=True)
+    assert data["content"] == {"language": "Python"}
+    assert data["metadata"]["tags"] == ["code"]
+    assert data["metadata"]["custom"] == {"team": "core"}
+    assert len(memory._vectors) == 2
+
+    assert memory.recall("database migration") == ["Meeting notes about the database migration"]
+    assert memory.recall("database", strategy=RecallStrategy.SEMANTIC, user_id="u1") == []
+    assert memory.get_stats().total_users == 2
+    memory.close()
+
+
+def test_queries_match_in_memory_backend(tmp_path):
+    """Test filters, ordering, replacement and deletes against the default backend"""
+    sqlite_memory = open_memory(tmp_path / "memories.db")
+    default_memory = Memory(local_mode=True)
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+
+    for memory in (sqlite_memory, default_memory):
+        for i in range(8):
+            entry, content = memory._build_entry(
+                f"Note {i} about python", {"tags": [f"t{i % 2}"], "category": "c" if i % 3 else None},
+                f"u{i % 2}", f"s{i % 4}", None, f"id{i}"
+            )
+            entry.timestamp = old + timedelta(hours=i)
+            memory._store([(entry, content)])
+        memory.remember("Replaced note", user_id="u0", id="id2")
+
+    for memory in (sqlite_memory, default_memory):
+        assert len(memory._storage) == 8
+
+    def snapshot(memory):
+        return (
+            [m["id"] for m in memory.list(user_id="u1")],
+            [m["id"] for m in memory.scan(batch_size=3, tags=["t0"])],
+            memory.get_facts(category="c", user_id="u1"),
+            memory.get_recent(hours=100, user_id="u0"),
+            memory.recall("python", strategy=RecallStrategy.RECENCY, limit=3),
+            memory.summarize_session("s1"),
+            memory.clear_session("s3"),
+            memory.forget_before(old + timedelta(hours=1)),
+            [m["id"] for m in memory.list()]
+        )
+
+    assert snapshot(sqlite_memory) == snapshot(default_memory)
+    sqlite_memory.close()
+
+
+def test_replacing_without_an_embedding_drops_the_old_vector(tmp_path):
+    """Test a memory replaced with no embedding does not get its old vector back on reload"""
+    path = tmp_path / "memories.db"
+    memory = open_memory(path)
+    memory.remember("User prefers dark mode", id="m1")
+    memory.remember("User likes tea", id="m2")
+    entry, content = memory._build_entry("User prefers light mode", None, None, None, None, "m1")
+    memory._storage.put_many([(entry, content)])
+    memory.close()
+
+    storage = SQLiteStorage(str(path))
+    assert [memory_id for ids, _ in storage.embeddings() for memory_id in ids] == ["m2"]
+    storage.close()
@@ -0,0 +1,58 @@
+"""
+Tests for compact record storage
+"""
+from datetime import datetime, timezone
+
+from agentmind.store import RecordStore
+from agentmind.types import MemoryEntry, MemoryMetadata
+
+
+def make_entry(memory_id, user_id="u1", **metadata):
+    return MemoryEntry(
+        id=memory_id,
+        content="unused",
+        metadata=MemoryMetadata(**metadata),
+        user_id=user_id,
+        session_id="s1",
+        timestamp=datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        ttl=60
+    )
+
+
+def test_record_round_trip():
+    """Test records materialize back into equal entries"""
+    store = RecordStore()
+    content = {"name": "John", "langs": ["python"]}
+    store.put(make_entry("a", category="profile", tags=["x", "y"], custom={"k": 1}, importance=None), content)
+
+    assert store.content("a") is content
+    assert store.text("a") == '{"name": "John", "langs": ["python"]}'
+    entry = store.entry("a")
+    assert entry.timestamp == datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert entry.metadata.model_dump() == {
+        "importance": None, "confidence": 1.0, "category": "profile",
+        "source": None, "tags": ["x", "y"], "custom": {"k": 1}
+    }
+    assert (entry.user_id, entry.session_id, entry.ttl) == ("u1", "s1", 60)
+
+
+def test_slots_and_codes_are_reused():
+    """Test freed slots and interned values are recycled"""
+    store = RecordStore()
+    store.put(make_entry("a", user_id="alice"), "one")
+    store.put(make_entry("b", user_id="bob", tags=["t"]), "two")
+    assert len(store._users) == 2
+
+    assert store.remove("b")
+    assert not store.remove("b")
+    assert len(store._users) == 1
+
+    store.put(make_entry("c", user_id="carol"), "three")
+    assert len(store._ids) == 2
+    assert store.tags("c") == ()
+    assert list(store) == ["a", "c"]
+
+    # Replacing a record releases the old values
+    store.put(make_entry("a", user_id="carol"), "four")
+    assert len(store._users) == 1
+    assert store.text("a") == "four"
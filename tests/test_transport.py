@@ -0,0 +1,71 @@
+"""
+Tests for the pooled HTTP transport
+"""
+import logging
+import threading
+
+from agentmind import Memory, TokenBucket
+from agentmind.client import APIClient
+from agentmind.transport import Transport, shared_transport
+
+
+def test_memories_share_keep_alive_connections(stub_server):
+    """Test Memory instances on one host reuse a single warm connection"""
+    url, state = stub_server
+    memories = [Memory(api_key=f"am_key_{i}", base_url=url) for i in range(3)]
+    assert memories[0].client.transport is memories[2].client.transport is shared_transport(url)
+
+    for memory in memories * 3:
+        assert memory.client.health_check()
+    host = next(iter(memories[0].client.pool_stats()["hosts"].values()))
+    assert host["connections_opened"] == 1
+    assert host["requests"] == 9
+    # Each request still carries its own client's key
+    assert [headers["Authorization"] for _, _, headers, _ in state.requests[:3]] == [
+        "Bearer am_key_0", "Bearer am_key_1", "Bearer am_key_2"
+    ]
+
+
+def test_threads_wait_for_pooled_connections(stub_server, caplog):
+    """Test a small pool serves many threads without discarding connections"""
+    url, state = stub_server
+    transport = Transport(pool_maxsize=4)
+    client = APIClient("am_test_key", url, transport=transport, rate_limiter=TokenBucket(rate=10000, burst=1000))
+
+    def worker():
+        for _ in range(5):
+            client.get_usage()
+
+    with caplog.at_level(logging.WARNING, logger="urllib3"):
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert "pool is full" not in caplog.text
+    host = next(iter(client.pool_stats()["hosts"].values()))
+    assert host["connections_opened"] <= 4
+    assert host["requests"] == 60
+    assert host["idle"] == host["connections_opened"]
+    transport.close()
+
+
+def test_large_bodies_are_gzipped(stub_server):
+    """Test bodies over the threshold are compressed and arrive intact"""
+    url, state = stub_server
+    transport = Transport()
+    client = APIClient("am_test_key", url, transport=transport, compress_min_bytes=1024,
+                       connect_timeout=1.0, read_timeout=5.0)
+    assert client.timeout == (1.0, 5.0)
+    history = [{"content": f"Turn {i}: the user asked about deploy windows again"} for i in range(100)]
+    assert client.store_memories(history) == history
+    client.store_memory({"content": "short"})
+
+    (_, _, big, body), (_, _, small, _) = state.requests
+    assert big["Content-Encoding"] == "gzip" and body["memories"] == history
+    assert "Content-Encoding" not in small
+    stats = client.pool_stats()
+    assert stats["requests"] == 2 and stats["compressed_requests"] == 1
+    assert stats["bytes_sent"] < 2000
+    transport.close()
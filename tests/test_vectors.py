@@ -0,0 +1,103 @@
+"""
+Tests for the local embedding store
+"""
+import numpy as np
+import pytest
+
+from agentmind import Memory
+from agentmind.vectors import EmbeddingStore
+
+
+def test_search_returns_cosine_top_k():
+    """Test search ranks by cosine similarity"""
+    store = EmbeddingStore()
+    store.add("x", [1.0, 0.0, 0.0])
+    store.add("y", [0.0, 1.0, 0.0])
+    store.add("xy", [1.0, 1.0, 0.0])
+    
+    results = store.search(np.array([2.0, 0.1, 0.0]), k=2)[0]
+    assert [memory_id for memory_id, _ in results] == ["x", "xy"]
+    assert results[0][1] == pytest.approx(0.9988, abs=1e-3)
+
+
+def test_batched_queries():
+    """Test several queries are answered in one call"""
+    store = EmbeddingStore()
+    store.add_many(["x", "y"], np.eye(2))
+    
+    results = store.search(np.eye(2), k=1)
+    assert [r[0][0] for r in results] == ["x", "y"]
+
+
+def test_growth_and_dimension_check():
+    """Test the buffer grows on append and rejects mismatched vectors"""
+    store = EmbeddingStore(initial_capacity=2)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8))
+    store.add_many([f"m{i}" for i in range(50)], vectors)
+    
+    assert len(store) == 50
+    assert store.capacity >= 50
+    assert store.search(vectors[17], k=1)[0][0][0] == "m17"
+    
+    with pytest.raises(ValueError):
+        store.add("bad", [1.0, 2.0])
+
+
+def test_tombstones_and_compaction():
+    """Test deleted vectors disappear and compaction keeps lookups valid"""
+    store = EmbeddingStore()
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(200, 4))
+    ids = [f"m{i}" for i in range(200)]
+    store.add_many(ids, vectors)
+    
+    remaps = []
+    store.on_compact(remaps.append)
+    for memory_id in ids[:150]:
+        assert store.remove(memory_id)
+    
+    assert remaps, "compaction should have run"
+    assert len(store) == 50
+    assert not store.remove("m0")
+    for i in (150, 199):
+        assert store.search(vectors[i], k=1)[0][0][0] == f"m{i}"
+    assert np.allclose(store.get("m160"), vectors[160] / np.linalg.norm(vectors[160]))
+
+
+def test_search_with_filter():
+    """Test filtered search over-fetches to fill k"""
+    store = EmbeddingStore()
+    rng = np.random.default_rng(2)
+    store.add_many([f"m{i}" for i in range(100)], rng.normal(size=(100, 4)))
+    
+    results = store.search(rng.normal(size=4), k=3, accept=lambda m: m.endswith("7"))[0]
+    assert len(results) == 3
+    assert all(memory_id.endswith("7") for memory_id, _ in results)
+
+
+class KeywordEmbedder:
+    """Tiny embedder mapping a few words to axes"""
+    
+    words = ["python", "coffee", "dog"]
+    
+    def embed(self, texts):
+        return np.array([
+            [float(word in text.lower()) for word in self.words]
+            for text in texts
+        ])
+
+
+def test_memory_semantic_recall_with_embedder():
+    """Test Memory populates and searches embeddings when given an embedder"""
+    memory = Memory(local_mode=True, embedder=KeywordEmbedder())
+    memory.remember("I write Python")
+    dog_id = memory.remember("My dog is called Max")
+    
+    assert memory.recall("dog", strategy="semantic") == ["My dog is called Max"]
+    
+    export = memory.export_user_data("default")
+    assert any("embedding" in m for m in export["memories"])
+    
+    memory.delete(dog_id)
+    assert memory.recall("dog", strategy="semantic") == []